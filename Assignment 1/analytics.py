@@ -0,0 +1,263 @@
+import io
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+from csv_cache import read_batch
+
+TARGET = "Heart Disease"
+
+# Explicit compact types: coded columns fit in int8, measurements in int16.
+# Parsing straight into these avoids pandas' int64/float64/object defaults
+# (about 6x less memory per row).
+SCHEMA = {
+    "Age": pa.int8(),
+    "Sex": pa.int8(),
+    "Chest pain type": pa.int8(),
+    "BP": pa.int16(),
+    "Cholesterol": pa.int16(),
+    "FBS over 120": pa.int8(),
+    "EKG results": pa.int8(),
+    "Max HR": pa.int16(),
+    "Exercise angina": pa.int8(),
+    "ST depression": pa.float32(),
+    "Slope of ST": pa.int8(),
+    "Number of vessels fluro": pa.int8(),
+    "Thallium": pa.int8(),
+    # Arrow's CSV reader only dictionary-encodes with int32 indices; pandas
+    # turns this into a category with int8 codes.
+    TARGET: pa.dictionary(pa.int32(), pa.string()),
+}
+DTYPES = {name: ("category" if name == TARGET else pa_type.to_pandas_dtype().__name__)
+          for name, pa_type in SCHEMA.items()}
+# Integer columns with blanks cannot be int8/int16; they fall back to the
+# nullable pandas types of the same width, and HeartStats skips those rows.
+NULLABLE_DTYPES = {name: dtype.capitalize() if dtype.startswith("int") else dtype for name, dtype in DTYPES.items()}
+NUMERIC = [name for name in SCHEMA if name != TARGET]
+
+CHUNK_BYTES = int(os.getenv("ANALYTICS_CHUNK_BYTES", str(64 * 1024 * 1024)))
+WORKERS = int(os.getenv("ANALYTICS_WORKERS", str(os.cpu_count() or 1)))
+
+
+class Moments:
+    """Count, mean and co-moment matrix of some columns, mergeable across chunks.
+
+    Chunks are combined with Chan et al.'s pairwise update, which stays
+    numerically stable for billions of rows (unlike sum / sum-of-squares).
+    Variances and Pearson correlations are derived from the co-moments.
+    """
+
+    def __init__(self, k):
+        self.n = 0
+        self.mean = np.zeros(k)
+        self.comoment = np.zeros((k, k))
+
+    @classmethod
+    def of(cls, values):
+        moments = cls(values.shape[1])
+        moments.n = len(values)
+        if moments.n:
+            moments.mean = values.mean(axis=0)
+            centered = values - moments.mean
+            moments.comoment = centered.T @ centered
+        return moments
+
+    def merge(self, other):
+        if not other.n:
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.comoment += other.comoment + np.outer(delta, delta) * (self.n * other.n / n)
+        self.mean = self.mean + delta * (other.n / n)
+        self.n = n
+        return self
+
+    def std(self):
+        return np.sqrt(np.diag(self.comoment) / (self.n - 1)) if self.n > 1 else np.full(len(self.mean), np.nan)
+
+    def corr(self):
+        scale = np.sqrt(np.diag(self.comoment))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.comoment / np.outer(scale, scale)
+
+
+class HeartStats:
+    """Partial aggregates of one or more chunks: overall, per class, min/max."""
+
+    def __init__(self):
+        self.rows = 0
+        self.skipped = 0
+        self.overall = Moments(len(NUMERIC))
+        self.by_class = {}
+        self.minimum = np.full(len(NUMERIC), np.inf)
+        self.maximum = np.full(len(NUMERIC), -np.inf)
+
+    def update(self, df):
+        self.rows += len(df)
+        complete = df.dropna(subset=NUMERIC + [TARGET])
+        self.skipped += len(df) - len(complete)
+        values = complete[NUMERIC].to_numpy(dtype=np.float64)
+        if not len(values):
+            return self
+        self.overall.merge(Moments.of(values))
+        self.minimum = np.minimum(self.minimum, values.min(axis=0))
+        self.maximum = np.maximum(self.maximum, values.max(axis=0))
+        labels = complete[TARGET].to_numpy()
+        for label in pd.unique(labels):
+            part = Moments.of(values[labels == label])
+            self.by_class.setdefault(label, Moments(len(NUMERIC))).merge(part)
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.skipped += other.skipped
+        self.overall.merge(other.overall)
+        self.minimum = np.minimum(self.minimum, other.minimum)
+        self.maximum = np.maximum(self.maximum, other.maximum)
+        for label, moments in other.by_class.items():
+            self.by_class.setdefault(label, Moments(len(NUMERIC))).merge(moments)
+        return self
+
+    def summary(self):
+        return pd.DataFrame({"count": self.overall.n, "mean": self.overall.mean, "std": self.overall.std(),
+                             "min": self.minimum, "max": self.maximum}, index=NUMERIC)
+
+    def class_means(self):
+        return pd.DataFrame({label: m.mean for label, m in sorted(self.by_class.items())}, index=NUMERIC).T
+
+    def class_counts(self):
+        return pd.Series({label: m.n for label, m in sorted(self.by_class.items())}, name="count")
+
+    def correlation(self):
+        return pd.DataFrame(self.overall.corr(), index=NUMERIC, columns=NUMERIC)
+
+
+def _convert_options():
+    return pacsv.ConvertOptions(column_types=SCHEMA)
+
+
+def _compact(df):
+    return df.astype({name: NULLABLE_DTYPES[name] if df[name].hasnans else dtype for name, dtype in DTYPES.items()})
+
+
+def to_frame(table):
+    """Arrow table/batch -> pandas with the compact DTYPES."""
+    return _compact(table.to_pandas())
+
+
+def read_frame(path):
+    """Whole file as one compact DataFrame (pyarrow engine); for files that fit in memory."""
+    return to_frame(pacsv.read_csv(path, convert_options=_convert_options()))
+
+
+def read_head(path, n=5):
+    """First n rows without reading the rest of the file."""
+    return _compact(pd.read_csv(path, nrows=n))
+
+
+def _data_start(path):
+    with open(path, "rb") as handle:
+        header = handle.readline()
+    return len(header), [name.strip() for name in header.decode("utf-8").rstrip("\r\n").split(",")]
+
+
+def plan_ranges(path, chunk_bytes=None):
+    """Split the data part of the file into (start, end) byte ranges of ~chunk_bytes."""
+    chunk_bytes = chunk_bytes or CHUNK_BYTES
+    start, _ = _data_start(path)
+    size = os.path.getsize(path)
+    return [(offset, min(offset + chunk_bytes, size)) for offset in range(start, size, chunk_bytes)]
+
+
+def read_range(path, start, end):
+    """Parse the lines that begin inside [start, end) into a compact DataFrame.
+
+    The line straddling `start` belongs to the previous range and the line
+    straddling `end` to this one, so ranges can be parsed independently.
+    The file must not contain quoted newlines.
+    """
+    data_start, header = _data_start(path)
+    with open(path, "rb") as handle:
+        if start > data_start:
+            handle.seek(start - 1)
+            handle.readline()
+        else:
+            handle.seek(start)
+        position = handle.tell()
+        if position >= end:
+            return to_frame(pa.table({name: pa.array([], type=SCHEMA[name]) for name in header}))
+        block = handle.read(end - position)
+        if not block.endswith(b"\n"):
+            block += handle.readline()
+    table = pacsv.read_csv(io.BytesIO(block), read_options=pacsv.ReadOptions(column_names=header),
+                           convert_options=_convert_options())
+    return to_frame(table)
+
+
+def _analyze_range(path, start, end):
+    return HeartStats().update(read_range(path, start, end))
+
+
+def _analyze_cached_batch(data_path, index):
+    return HeartStats().update(to_frame(read_batch(data_path, index)))
+
+
+def _merge_all(function, tasks, workers):
+    """Merged HeartStats of function(*task) for every task, in a process pool when workers > 1."""
+    workers = workers or WORKERS
+    stats = HeartStats()
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            stats.merge(function(*task))
+        return stats
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for task in tasks:
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stats.merge(future.result())
+            pending.add(pool.submit(function, *task))
+        for future in pending:
+            stats.merge(future.result())
+    return stats
+
+
+def analyze(path, chunk_bytes=None, workers=None):
+    """Stream path in byte-range chunks and return the merged HeartStats.
+
+    Each chunk is parsed and aggregated independently (in a process pool
+    when workers > 1); only small partial aggregates are sent back. Peak
+    memory is about 2 * workers chunks, whatever the file size.
+    """
+    return _merge_all(_analyze_range, [(path, start, end) for start, end in plan_ranges(path, chunk_bytes)], workers)
+
+
+def analyze_cached(cache, path, workers=None):
+    """Like analyze, but each worker memory-maps one batch of path's columnar cache entry."""
+    return _merge_all(_analyze_cached_batch, cache.batch_refs(path, SCHEMA), workers)
+
+
+def analyze_batches(batches):
+    """HeartStats over Arrow record batches, e.g. from a columnar cache of the CSV."""
+    stats = HeartStats()
+    for batch in batches:
+        stats.update(to_frame(batch))
+    return stats
+
+
+def print_report(stats):
+    with pd.option_context("display.width", 160, "display.max_columns", 20, "display.precision", 3):
+        print(f"\nRows: {stats.rows} ({stats.skipped} skipped with missing values)")
+        print("\nSummary statistics:")
+        print(stats.summary())
+        print(f"\nRows per {TARGET}:")
+        print(stats.class_counts().to_string())
+        print(f"\nMean per {TARGET}:")
+        print(stats.class_means())
+        print("\nCorrelation:")
+        print(stats.correlation())
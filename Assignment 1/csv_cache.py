@@ -0,0 +1,237 @@
+import hashlib
+import json
+import os
+import time
+
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+CACHE_DIR = os.getenv("CSV_CACHE_DIR", ".csv_cache")
+CACHE_MAX_BYTES = int(float(os.getenv("CSV_CACHE_MAX_MB", "2048")) * 2 ** 20)
+# "arrow" (IPC, uncompressed) is memory-mapped on load; "parquet" is smaller
+# on disk but has to be decoded.
+CACHE_FORMAT = os.getenv("CSV_CACHE_FORMAT", "arrow")
+# Also compare a content hash when size/mtime differ (e.g. a file was copied
+# or touched without changing); costs one extra read of the CSV.
+CACHE_HASH = os.getenv("CSV_CACHE_HASH", "false").lower() == "true"
+BLOCK_SIZE = 16 * 2 ** 20
+
+
+def content_hash(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _storage_schema(schema):
+    # The CSV reader builds a new dictionary per block, which an IPC file
+    # cannot hold; dictionary columns are stored as their plain values.
+    return pa.schema([field.with_type(field.type.value_type) if pa.types.is_dictionary(field.type) else field
+                      for field in schema])
+
+
+def read_batch(data_path, index):
+    """One record batch (Arrow) or row group (Parquet) of a cached file."""
+    if data_path.endswith(".arrow"):
+        return pa.ipc.open_file(pa.memory_map(data_path, "r")).get_batch(index)
+    return pq.ParquetFile(data_path, memory_map=True).read_row_group(index)
+
+
+def _schema_key(column_types):
+    return json.dumps({name: str(pa_type) for name, pa_type in (column_types or {}).items()}, sort_keys=True)
+
+
+class CsvCache:
+    """Columnar copies of CSV files, keyed by source path.
+
+    An entry is valid while the source's size and mtime match what was
+    cached (or, with use_hash, while its content hash does) and it was
+    written with the same column types. Anything else is rebuilt on the
+    next load. Entries are evicted least-recently-used first once the
+    cache exceeds max_bytes.
+    """
+
+    def __init__(self, directory=None, max_bytes=None, fmt=None, use_hash=None):
+        self.directory = directory or CACHE_DIR
+        self.max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.format = fmt or CACHE_FORMAT
+        self.use_hash = CACHE_HASH if use_hash is None else use_hash
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _paths(self, source):
+        key = hashlib.sha1(os.path.abspath(source).encode("utf-8")).hexdigest()
+        extension = "arrow" if self.format == "arrow" else "parquet"
+        return (os.path.join(self.directory, f"{key}.{extension}"),
+                os.path.join(self.directory, f"{key}.json"))
+
+    def _read_meta(self, meta_path):
+        try:
+            with open(meta_path, encoding="utf-8") as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, meta_path, meta):
+        tmp_path = f"{meta_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(meta, handle)
+        os.replace(tmp_path, meta_path)
+
+    def lookup(self, source, column_types=None):
+        """Path of a valid cached copy of source, or None."""
+        data_path, meta_path = self._paths(source)
+        meta = self._read_meta(meta_path)
+        if (meta is None or meta["format"] != self.format or not os.path.exists(data_path)
+                or meta["schema"] != _schema_key(column_types)):
+            return None
+        stat = os.stat(source)
+        if (meta["size"], meta["mtime_ns"]) != (stat.st_size, stat.st_mtime_ns):
+            if not (self.use_hash and meta.get("hash") and meta["size"] == stat.st_size
+                    and content_hash(source) == meta["hash"]):
+                return None
+            meta["mtime_ns"] = stat.st_mtime_ns
+        meta["last_used"] = time.time()
+        self._write_meta(meta_path, meta)
+        return data_path
+
+    def store(self, source, column_types=None, block_size=None):
+        """Convert source to the cache format batch by batch; returns the cached path."""
+        data_path, meta_path = self._paths(source)
+        self._remove(data_path)
+        stat = os.stat(source)
+        tmp_path = f"{data_path}.tmp"
+        reader = pacsv.open_csv(source, read_options=pacsv.ReadOptions(block_size=block_size or BLOCK_SIZE),
+                                convert_options=pacsv.ConvertOptions(column_types=column_types or {}))
+        schema = _storage_schema(reader.schema)
+        rows = 0
+        try:
+            if self.format == "arrow":
+                with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+                    for batch in reader:
+                        writer.write_batch(batch.cast(schema))
+                        rows += batch.num_rows
+            else:
+                with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+                    for batch in reader:
+                        writer.write_batch(batch.cast(schema))
+                        rows += batch.num_rows
+            os.replace(tmp_path, data_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        self._write_meta(meta_path, {
+            "source": os.path.abspath(source), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+            "hash": content_hash(source) if self.use_hash else None, "schema": _schema_key(column_types),
+            "format": self.format, "rows": rows, "bytes": os.path.getsize(data_path),
+            "created": time.time(), "last_used": time.time(),
+        })
+        self.evict(keep=data_path)
+        return data_path
+
+    def entries(self):
+        """[(data path, metadata)] of every complete entry."""
+        found = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            meta = self._read_meta(os.path.join(self.directory, name))
+            if meta is None:
+                continue
+            extension = "arrow" if meta["format"] == "arrow" else "parquet"
+            data_path = os.path.join(self.directory, f"{name[:-5]}.{extension}")
+            if os.path.exists(data_path):
+                found.append((data_path, meta))
+        return found
+
+    def size(self):
+        return sum(meta["bytes"] for _, meta in self.entries())
+
+    def evict(self, keep=None):
+        """Drop least-recently-used entries until the cache fits in max_bytes."""
+        entries = sorted(self.entries(), key=lambda entry: entry[1]["last_used"])
+        total = sum(meta["bytes"] for _, meta in entries)
+        evicted = []
+        for data_path, meta in entries:
+            if total <= self.max_bytes:
+                break
+            if data_path == keep:
+                continue
+            self._remove(data_path)
+            total -= meta["bytes"]
+            evicted.append(meta["source"])
+        return evicted
+
+    def _remove(self, data_path):
+        base = os.path.splitext(data_path)[0]
+        for path in (f"{base}.arrow", f"{base}.parquet", f"{base}.json"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def invalidate(self, source):
+        data_path, _ = self._paths(source)
+        self._remove(data_path)
+
+    def clear(self):
+        for data_path, _ in self.entries():
+            self._remove(data_path)
+
+    def _open(self, data_path):
+        if data_path.endswith(".arrow"):
+            # Zero-copy: column buffers point into the mapped file.
+            return pa.ipc.open_file(pa.memory_map(data_path, "r"))
+        return pq.ParquetFile(data_path, memory_map=True)
+
+    def _cached_path(self, source, column_types):
+        data_path = self.lookup(source, column_types)
+        if data_path is None:
+            self.misses += 1
+            return self.store(source, column_types)
+        self.hits += 1
+        return data_path
+
+    def load_table(self, source, column_types=None):
+        """Whole file as an Arrow table, converting it into the cache on a miss."""
+        data_path = self._cached_path(source, column_types)
+        opened = self._open(data_path)
+        return opened.read_all() if data_path.endswith(".arrow") else opened.read()
+
+    def batch_refs(self, source, column_types=None):
+        """[(cached path, index)] of every batch, for read_batch in other processes."""
+        data_path = self._cached_path(source, column_types)
+        opened = self._open(data_path)
+        count = opened.num_record_batches if data_path.endswith(".arrow") else opened.num_row_groups
+        return [(data_path, index) for index in range(count)]
+
+    def iter_batches(self, source, column_types=None):
+        """Yield record batches from the cached copy, one at a time."""
+        data_path = self._cached_path(source, column_types)
+        opened = self._open(data_path)
+        if data_path.endswith(".arrow"):
+            for i in range(opened.num_record_batches):
+                yield opened.get_batch(i)
+        else:
+            yield from opened.iter_batches()
+
+    def compare(self, source, column_types=None):
+        """Time a cold load (CSV parse + cache write) against a warm load from the cache."""
+        self.invalidate(source)
+        start = time.perf_counter()
+        rows = self.load_table(source, column_types).num_rows
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        self.load_table(source, column_types)
+        warm = time.perf_counter() - start
+        print(f"Cold load ({rows} rows, CSV -> {self.format}): {cold:.3f}s")
+        print(f"Warm load ({'memory-mapped ' if self.format == 'arrow' else ''}{self.format}): "
+              f"{warm:.3f}s ({cold / warm if warm else float('inf'):.1f}x faster)")
+        return {"rows": rows, "cold_seconds": cold, "warm_seconds": warm}
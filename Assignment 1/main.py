@@ -1,5 +1,34 @@
-import pandas as pd
+import argparse
 
-df = pd.read_csv("Heart_Disease_Prediction.csv")
+import analytics
+from csv_cache import CsvCache
 
-print(df.head())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Heart disease dataset analysis")
+    parser.add_argument("csv", nargs="?", default="Heart_Disease_Prediction.csv")
+    parser.add_argument("--chunk-mb", type=float, default=None,
+                        help="MB parsed per chunk with --no-cache (bounds memory per worker)")
+    parser.add_argument("--workers", type=int, default=analytics.WORKERS)
+    parser.add_argument("--no-cache", action="store_true",
+                        help="parse the CSV in parallel chunks instead of loading the columnar cache")
+    parser.add_argument("--cache-format", choices=["arrow", "parquet"], default=None)
+    parser.add_argument("--cache-compare", action="store_true", help="report cold vs warm load time")
+    args = parser.parse_args(argv)
+
+    print(analytics.read_head(args.csv))
+    if args.no_cache:
+        chunk_mb = args.chunk_mb or analytics.CHUNK_BYTES / 2 ** 20
+        stats = analytics.analyze(args.csv, int(chunk_mb * 2 ** 20), args.workers)
+    else:
+        if args.chunk_mb is not None:
+            print("--chunk-mb is ignored with the cache: workers take the batches it was written in")
+        cache = CsvCache(fmt=args.cache_format)
+        if args.cache_compare:
+            cache.compare(args.csv, analytics.SCHEMA)
+        stats = analytics.analyze_cached(cache, args.csv, args.workers)
+    analytics.print_report(stats)
+
+
+if __name__ == "__main__":
+    main()
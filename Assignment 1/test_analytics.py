@@ -0,0 +1,57 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import analytics  # noqa: E402
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV = os.path.join(PROJECT_DIR, 'Heart_Disease_Prediction.csv')
+
+
+class TestAnalytics(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_chunked_analysis_matches_whole_file(self):
+        df = analytics.read_frame(CSV)
+        stats = analytics.analyze(CSV, chunk_bytes=2048, workers=1)
+        self.assertEqual(stats.rows, len(df))
+        self.assertEqual(stats.skipped, 0)
+        np.testing.assert_allclose(stats.summary()['mean'], df[analytics.NUMERIC].mean(), rtol=1e-6)
+        np.testing.assert_allclose(stats.correlation(), df[analytics.NUMERIC].astype(float).corr(), atol=1e-9)
+
+    def test_missing_values_are_skipped(self):
+        with open(CSV) as f:
+            lines = f.read().splitlines()
+        # blank BP on row 1 and blank Max HR on row 3
+        for index, column in ((1, 3), (3, 7)):
+            fields = lines[index].split(',')
+            fields[column] = ''
+            lines[index] = ','.join(fields)
+        path = os.path.join(self.tmpdir, 'heart.csv')
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+        df = analytics.read_frame(path)
+        self.assertEqual(str(df['BP'].dtype), 'Int16')
+        self.assertEqual(str(df['Age'].dtype), 'int8')
+        self.assertTrue(df['Max HR'].isna().iloc[2])
+        self.assertEqual(str(analytics.read_head(path)['BP'].dtype), 'Int16')
+
+        stats = analytics.analyze(path, chunk_bytes=2048, workers=1)
+        self.assertEqual((stats.rows, stats.skipped), (len(lines) - 1, 2))
+        complete = df.dropna()[analytics.NUMERIC].astype(float)
+        np.testing.assert_allclose(stats.summary()['mean'], complete.mean(), rtol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
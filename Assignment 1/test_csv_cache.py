@@ -0,0 +1,131 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+import numpy as np
+import pyarrow as pa
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import analytics  # noqa: E402
+from csv_cache import CsvCache  # noqa: E402
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV = os.path.join(PROJECT_DIR, 'Heart_Disease_Prediction.csv')
+
+
+class TestCsvCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def cache(self, fmt):
+        return CsvCache(directory=os.path.join(self.tmpdir, fmt), fmt=fmt)
+
+    def test_multi_block_file_with_category_column(self):
+        for fmt in ('arrow', 'parquet'):
+            with self.subTest(fmt=fmt):
+                cache = self.cache(fmt)
+                cache.store(CSV, analytics.SCHEMA, block_size=2048)
+                refs = cache.batch_refs(CSV, analytics.SCHEMA)
+                self.assertGreater(len(refs), 1)
+                self.assertEqual((cache.hits, cache.misses), (1, 0))
+                table = cache.load_table(CSV, analytics.SCHEMA)
+                self.assertEqual(table.num_rows, 270)
+                self.assertEqual(table.schema.field(analytics.TARGET).type, pa.string())
+                self.assertEqual(table.schema.field('Age').type, pa.int8())
+
+    def test_parallel_cached_analysis_matches_csv(self):
+        expected = analytics.analyze(CSV, workers=1)
+        cache = self.cache('arrow')
+        cache.store(CSV, analytics.SCHEMA, block_size=2048)
+        stats = analytics.analyze_cached(cache, CSV, workers=2)
+        self.assertEqual(stats.rows, expected.rows)
+        self.assertEqual(stats.class_counts().to_dict(), expected.class_counts().to_dict())
+        np.testing.assert_allclose(stats.summary(), expected.summary(), rtol=1e-6)
+
+    def test_failed_store_leaves_no_files(self):
+        with open(CSV) as f:
+            lines = f.read().splitlines()
+        # a bad value in the last block fails only after earlier batches were written
+        lines[-1] = 'old,' + lines[-1].split(',', 1)[1]
+        path = os.path.join(self.tmpdir, 'bad.csv')
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        cache = self.cache('arrow')
+        with self.assertRaises(pa.ArrowInvalid):
+            cache.store(path, analytics.SCHEMA, block_size=2048)
+        self.assertEqual(os.listdir(cache.directory), [])
+
+    def _copy(self, name):
+        path = os.path.join(self.tmpdir, name)
+        shutil.copyfile(CSV, path)
+        return path
+
+    def test_entry_is_rebuilt_when_the_source_changes(self):
+        path = self._copy('heart.csv')
+        cache = self.cache('arrow')
+        self.assertEqual(cache.load_table(path, analytics.SCHEMA).num_rows, 270)
+        self.assertIsNotNone(cache.lookup(path, analytics.SCHEMA))
+        # other column types are a different entry
+        self.assertIsNone(cache.lookup(path))
+
+        with open(CSV) as f:
+            extra = f.read().splitlines()[1]
+        with open(path, 'a') as f:
+            # the sample file has no trailing newline
+            f.write('\n' + extra)
+        self.assertIsNone(cache.lookup(path, analytics.SCHEMA))
+        self.assertEqual(cache.load_table(path, analytics.SCHEMA).num_rows, 271)
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+        # same size, new mtime
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertIsNone(cache.lookup(path, analytics.SCHEMA))
+
+    def test_touched_source_is_kept_when_hashing(self):
+        path = self._copy('heart.csv')
+        cache = CsvCache(directory=os.path.join(self.tmpdir, 'hashed'), use_hash=True)
+        cache.store(path, analytics.SCHEMA)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertIsNotNone(cache.lookup(path, analytics.SCHEMA))
+        with open(path, 'r+b') as f:
+            f.seek(-3, os.SEEK_END)
+            f.write(b'XXX')
+        self.assertIsNone(cache.lookup(path, analytics.SCHEMA))
+
+    def test_eviction_keeps_total_under_max_bytes(self):
+        paths = [self._copy(f'heart{i}.csv') for i in range(4)]
+        probe = self.cache('arrow')
+        entry_bytes = os.path.getsize(probe.store(paths[0], analytics.SCHEMA))
+        probe.clear()
+        cache = CsvCache(directory=probe.directory, max_bytes=int(3.5 * entry_bytes))
+        for path in paths[:3]:
+            cache.store(path, analytics.SCHEMA)
+            time.sleep(0.01)
+        # touching the oldest entry makes heart1 the least recently used
+        self.assertIsNotNone(cache.lookup(paths[0], analytics.SCHEMA))
+        time.sleep(0.01)
+        cache.store(paths[3], analytics.SCHEMA)
+        self.assertLessEqual(cache.size(), cache.max_bytes)
+        cached = sorted(os.path.basename(meta['source']) for _, meta in cache.entries())
+        self.assertEqual(cached, ['heart0.csv', 'heart2.csv', 'heart3.csv'])
+
+    def test_entry_larger_than_the_cache_is_still_kept(self):
+        cache = CsvCache(directory=os.path.join(self.tmpdir, 'tiny'), max_bytes=1)
+        path = self._copy('heart.csv')
+        data_path = cache.store(path, analytics.SCHEMA)
+        self.assertTrue(os.path.exists(data_path))
+        cache.store(self._copy('other.csv'), analytics.SCHEMA)
+        self.assertFalse(os.path.exists(data_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,224 @@
+import argparse
+import csv
+import io
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from itertools import islice
+
+import psycopg2
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+PG_USER = os.getenv("PG_USER")
+PG_PASS = os.getenv("PG_PASS")
+PG_HOST = os.getenv("PG_HOST", "localhost")
+PG_PORT = os.getenv("PG_PORT")
+PG_DB   = os.getenv("PG_DB")
+
+# Rows per COPY / execute_values round trip, and connections loading in parallel.
+CHUNK_ROWS = int(os.getenv("PG_CHUNK_ROWS", "50000"))
+WORKERS = int(os.getenv("PG_LOAD_WORKERS", "4"))
+DEFAULT_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Assignment 1",
+                           "Heart_Disease_Prediction.csv")
+
+
+class PgPool:
+    """Thread-safe psycopg2 pool: every borrowed connection is its own socket."""
+
+    def __init__(self, minconn=1, maxconn=None, **params):
+        params = params or {"dbname": PG_DB, "user": PG_USER, "password": PG_PASS,
+                            "host": PG_HOST, "port": PG_PORT}
+        self.pool = ThreadedConnectionPool(minconn, maxconn or WORKERS, **params)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commit on success, roll back on error, always return it."""
+        conn = self.pool.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.pool.putconn(conn)
+
+    def close(self):
+        self.pool.closeall()
+
+
+def column_name(header):
+    """'Chest pain type' -> 'chest_pain_type'."""
+    name = re.sub(r"[^0-9a-z]+", "_", header.strip().lower()).strip("_") or "column"
+    return f"c_{name}" if name[0].isdigit() else name
+
+
+def _value_type(value):
+    for cast, pg_type in ((int, "BIGINT"), (float, "DOUBLE PRECISION")):
+        try:
+            cast(value)
+            return pg_type
+        except ValueError:
+            pass
+    return "TEXT"
+
+
+def infer_schema(path, sample_rows=1000):
+    """[(column, postgres type)] from the header and the first sample_rows rows.
+
+    A column is BIGINT if every non-empty sampled value is an integer,
+    DOUBLE PRECISION if they are all numbers, and TEXT otherwise.
+    """
+    order = ("BIGINT", "DOUBLE PRECISION", "TEXT")
+    with open(path, newline="", encoding="utf-8") as handle:
+        reader = csv.reader(handle)
+        header = next(reader)
+        types = ["BIGINT"] * len(header)
+        for row in islice(reader, sample_rows):
+            for i, value in enumerate(row):
+                if value != "" and types[i] != "TEXT":
+                    types[i] = max(types[i], _value_type(value), key=order.index)
+    return [(column_name(h), t) for h, t in zip(header, types)]
+
+
+def create_table(pool, table, schema, drop=False):
+    columns = sql.SQL(", ").join(sql.SQL("{} {}").format(sql.Identifier(name), sql.SQL(pg_type))
+                                 for name, pg_type in schema)
+    with pool.connection() as conn, conn.cursor() as cur:
+        if drop:
+            cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(table)))
+        cur.execute(sql.SQL("CREATE TABLE IF NOT EXISTS {} ({})").format(sql.Identifier(table), columns))
+
+
+def _insert_into(table, schema):
+    return sql.SQL("INSERT INTO {} ({}) VALUES ").format(
+        sql.Identifier(table), sql.SQL(", ").join(sql.Identifier(name) for name, _ in schema))
+
+
+def iter_chunks(path, chunk_rows=None):
+    """Yield lists of CSV rows (header skipped), chunk_rows at a time."""
+    with open(path, newline="", encoding="utf-8") as handle:
+        reader = csv.reader(handle)
+        next(reader)
+        while True:
+            chunk = list(islice(reader, chunk_rows or CHUNK_ROWS))
+            if not chunk:
+                return
+            yield chunk
+
+
+def copy_chunk(pool, table, schema, rows):
+    """Stream one chunk with COPY ... FROM STDIN (CSV); empty fields load as NULL."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    statement = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+        sql.Identifier(table), sql.SQL(", ").join(sql.Identifier(name) for name, _ in schema))
+    with pool.connection() as conn, conn.cursor() as cur:
+        cur.copy_expert(statement, buffer)
+    return len(rows)
+
+
+def values_chunk(pool, table, schema, rows, page_size=1000):
+    """Fallback for servers/proxies without COPY: multi-row INSERTs via execute_values."""
+    rows = [[value if value != "" else None for value in row] for row in rows]
+    with pool.connection() as conn, conn.cursor() as cur:
+        query = _insert_into(table, schema).as_string(cur) + "%s"
+        execute_values(cur, query, rows, page_size=page_size)
+    return len(rows)
+
+
+def insert_chunk(pool, table, schema, rows):
+    """Baseline: one INSERT statement (one round trip) per row."""
+    with pool.connection() as conn, conn.cursor() as cur:
+        query = _insert_into(table, schema).as_string(cur) + "(" + ", ".join(["%s"] * len(schema)) + ")"
+        for row in rows:
+            cur.execute(query, [value if value != "" else None for value in row])
+    return len(rows)
+
+
+METHODS = {"copy": copy_chunk, "values": values_chunk, "insert": insert_chunk}
+
+
+def load_csv(pool, path, table, method="copy", chunk_rows=None, workers=None, drop=False):
+    """Load a CSV into a typed table; returns {"method", "rows", "seconds", "rows_per_sec"}.
+
+    Chunks are committed independently by up to `workers` pooled connections.
+    At most 2 * workers chunks are held in memory at once.
+    """
+    schema = infer_schema(path)
+    create_table(pool, table, schema, drop=drop)
+    load_chunk = METHODS[method]
+    workers = workers or WORKERS
+    rows = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for chunk in iter_chunks(path, chunk_rows):
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                rows += sum(future.result() for future in done)
+            pending.add(executor.submit(load_chunk, pool, table, schema, chunk))
+        rows += sum(future.result() for future in pending)
+    seconds = time.perf_counter() - start
+    report = {"method": method, "rows": rows, "seconds": seconds,
+              "rows_per_sec": rows / seconds if seconds else 0.0}
+    print(f"✅ {method}: {rows} rows into {table} in {seconds:.2f}s ({report['rows_per_sec']:.0f} rows/s)")
+    return report
+
+
+def compare(pool, path, table, chunk_rows=None, workers=None):
+    """Load the same CSV with each method into its own table and compare to row-by-row INSERT."""
+    reports = {}
+    for method in ("insert", "values", "copy"):
+        reports[method] = load_csv(pool, path, f"{table}_{method}", method, chunk_rows,
+                                   1 if method == "insert" else workers, drop=True)
+    baseline = reports["insert"]["rows_per_sec"] or 1.0
+    for method, report in reports.items():
+        report["speedup"] = report["rows_per_sec"] / baseline
+        print(f"📊 {method:>6}: {report['rows_per_sec']:>10.0f} rows/s  ({report['speedup']:.1f}x INSERT)")
+    return reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-load a CSV into PostgreSQL")
+    parser.add_argument("csv", nargs="?", default=DEFAULT_CSV)
+    parser.add_argument("--table", default=None, help="defaults to the CSV file name")
+    parser.add_argument("--method", choices=[*METHODS, "compare"], default="copy")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--drop", action="store_true", help="recreate the table first")
+    args = parser.parse_args(argv)
+    table = args.table or column_name(os.path.splitext(os.path.basename(args.csv))[0])
+
+    try:
+        pool = PgPool(maxconn=args.workers)
+    except psycopg2.Error as exc:
+        print("❌ Connection failed:", exc)
+        return 1
+    try:
+        if args.method == "compare":
+            compare(pool, args.csv, table, args.chunk_rows, args.workers)
+        else:
+            load_csv(pool, args.csv, table, args.method, args.chunk_rows, args.workers, args.drop)
+    except (psycopg2.Error, OSError) as exc:
+        print("❌ Load failed:", exc)
+        return 1
+    finally:
+        pool.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
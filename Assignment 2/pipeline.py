@@ -0,0 +1,318 @@
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+import loader
+
+# Chunks buffered per sink before the reader blocks (backpressure), and
+# how often a failed batch is retried before it is counted as failed.
+QUEUE_CHUNKS = int(os.getenv("PIPELINE_QUEUE_CHUNKS", "4"))
+SINK_RETRIES = int(os.getenv("PIPELINE_RETRIES", "3"))
+RETRY_BACKOFF = float(os.getenv("PIPELINE_RETRY_BACKOFF", "0.5"))
+READ_CHUNK_ROWS = int(os.getenv("PIPELINE_CHUNK_ROWS", "10000"))
+
+_CASTS = {"BIGINT": int, "DOUBLE PRECISION": float, "TEXT": str}
+
+
+def iter_records(path, schema, chunk_rows=None):
+    """Yield lists of typed dicts (empty fields -> None), one list per CSV chunk."""
+    names = [name for name, _ in schema]
+    casts = [_CASTS[pg_type] for _, pg_type in schema]
+    for rows in loader.iter_chunks(path, chunk_rows or READ_CHUNK_ROWS):
+        yield [{name: cast(value) if value != "" else None
+                for name, cast, value in zip(names, casts, row)} for row in rows]
+
+
+class PartialWriteError(Exception):
+    """Some records of a batch were written; only `remaining` must be retried."""
+
+    def __init__(self, message, remaining):
+        super().__init__(message)
+        self.remaining = remaining
+
+
+class Sink:
+    """One destination of the pipeline.
+
+    Subclasses implement write(records) for a single batch and raise on
+    failure, or raise PartialWriteError when part of the batch went in
+    (resending it would duplicate those rows); the pipeline handles
+    batching, retries and timing.
+    """
+
+    name = "sink"
+
+    def __init__(self, batch_size=1000, workers=1):
+        self.batch_size = batch_size
+        self.workers = workers
+
+    def prepare(self, schema):
+        """Called once before the first batch (create tables, indexes...)."""
+
+    def write(self, records):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class PostgresSink(Sink):
+    """COPY FROM STDIN into a typed table through loader.PgPool."""
+
+    name = "postgres"
+
+    def __init__(self, table, pool=None, batch_size=50000, workers=2, drop=False):
+        super().__init__(batch_size, workers)
+        self.table = table
+        self.pool = pool or loader.PgPool(maxconn=workers)
+        self.drop = drop
+        self.schema = None
+
+    def prepare(self, schema):
+        self.schema = schema
+        loader.create_table(self.pool, self.table, schema, drop=self.drop)
+
+    def write(self, records):
+        names = [name for name, _ in self.schema]
+        loader.copy_chunk(self.pool, self.table, self.schema, [[r[n] for n in names] for r in records])
+
+    def close(self):
+        self.pool.close()
+
+
+class MongoSink(Sink):
+    """insert_many(ordered=False) into any pymongo-compatible collection."""
+
+    name = "mongo"
+
+    def __init__(self, collection=None, batch_size=5000, workers=2):
+        super().__init__(batch_size, workers)
+        if collection is None:
+            from pymongo import MongoClient
+            uri = (f"mongodb://{os.getenv('MONGO_USER')}:{os.getenv('MONGO_PASS')}@"
+                   f"{os.getenv('MONGO_HOST', 'localhost')}:{os.getenv('MONGO_PORT', '27017')}/?authSource=admin")
+            collection = MongoClient(uri)[os.getenv("MONGO_DB", "mydatabase")][os.getenv("MONGO_COLLECTION", "records")]
+        self.collection = collection
+        self._pending = threading.local()
+
+    def write(self, records):
+        from pymongo.errors import BulkWriteError
+        # insert_many adds _id to the documents it is given, so copy them once
+        # per batch: the records are shared with the other sinks, and a retry
+        # resends the same _ids, which makes it idempotent.
+        if getattr(self._pending, "source", None) is not records:
+            self._pending.source = records
+            self._pending.documents = [dict(record) for record in records]
+        try:
+            self.collection.insert_many(self._pending.documents, ordered=False)
+        except BulkWriteError as exc:
+            errors = exc.details.get("writeErrors", [])
+            if any(error.get("code") != 11000 for error in errors):
+                raise
+
+
+class ElasticsearchSink(Sink):
+    """POST batches to the _bulk API; only the items that failed are retried.
+
+    Documents are indexed without an _id, so a rejected item is reported
+    through PartialWriteError instead of resending the whole batch.
+    """
+
+    name = "elasticsearch"
+
+    def __init__(self, index, base_url=None, auth=None, batch_size=2000, workers=2, session=None):
+        super().__init__(batch_size, workers)
+        import requests
+        self.index = index
+        self.base_url = (base_url or f"http://localhost:{os.getenv('ES_PORT', '9200')}").rstrip("/")
+        if auth is None and os.getenv("ES_USER"):
+            auth = (os.getenv("ES_USER"), os.getenv("ES_PASS"))
+        self.session = session or requests.Session()
+        self.session.auth = auth
+
+    def write(self, records):
+        action = json.dumps({"index": {"_index": self.index}})
+        body = "".join(f"{action}\n{json.dumps(record)}\n" for record in records)
+        response = self.session.post(f"{self.base_url}/_bulk", data=body.encode("utf-8"),
+                                     headers={"Content-Type": "application/x-ndjson"}, timeout=60)
+        response.raise_for_status()
+        result = response.json()
+        if not result.get("errors"):
+            return
+        failed = [(record, item["index"]) for record, item in zip(records, result["items"])
+                  if item["index"].get("status", 200) >= 300]
+        statuses = sorted({item["status"] for _, item in failed})
+        raise PartialWriteError(f"{len(failed)} document(s) failed (status {statuses}): {failed[0][1].get('error')}",
+                                [record for record, _ in failed])
+
+    def close(self):
+        self.session.close()
+
+
+class MemorySink(Sink):
+    """Local stand-in that keeps records in a list; can be slowed down or made to fail."""
+
+    def __init__(self, name="memory", batch_size=1000, workers=1, delay=0.0, fail_every=0):
+        super().__init__(batch_size, workers)
+        self.name = name
+        self.delay = delay
+        self.fail_every = fail_every
+        self.records = []
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def write(self, records):
+        with self._lock:
+            self.calls += 1
+            fail = self.fail_every and self.calls % self.fail_every == 0
+        if self.delay:
+            time.sleep(self.delay)
+        if fail:
+            raise RuntimeError(f"{self.name}: injected failure")
+        with self._lock:
+            self.records.extend(records)
+
+
+class _SinkRunner:
+    """Bounded queue plus worker threads that re-batch chunks for one sink."""
+
+    def __init__(self, sink, queue_chunks, retries):
+        self.sink = sink
+        self.retries = retries
+        self.queue = queue.Queue(maxsize=queue_chunks)
+        self.stats = {"rows": 0, "batches": 0, "retries": 0, "failed_batches": 0,
+                      "failed_rows": 0, "busy_seconds": 0.0, "errors": []}
+        self._lock = threading.Lock()
+        self.threads = [threading.Thread(target=self._run, name=f"sink-{sink.name}-{i}", daemon=True)
+                        for i in range(sink.workers)]
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+
+    def finish(self):
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.stats["seconds"] = self.finished - self.started
+
+    def _run(self):
+        buffer = []
+        while True:
+            chunk = self.queue.get()
+            if chunk is None:
+                break
+            buffer.extend(chunk)
+            while len(buffer) >= self.sink.batch_size:
+                batch, buffer = buffer[:self.sink.batch_size], buffer[self.sink.batch_size:]
+                self._write(batch)
+        if buffer:
+            self._write(buffer)
+        with self._lock:
+            self.finished = max(getattr(self, "finished", 0.0), time.perf_counter())
+
+    def _write(self, batch):
+        start = time.perf_counter()
+        pending = batch
+        for attempt in range(self.retries + 1):
+            try:
+                self.sink.write(pending)
+                pending, error = [], None
+                break
+            except PartialWriteError as exc:
+                pending, error = exc.remaining, exc
+            except Exception as exc:
+                error = exc
+            if attempt < self.retries:
+                with self._lock:
+                    self.stats["retries"] += 1
+                time.sleep(RETRY_BACKOFF * 2 ** attempt)
+        with self._lock:
+            self.stats["busy_seconds"] += time.perf_counter() - start
+            self.stats["batches"] += 1
+            self.stats["rows"] += len(batch) - len(pending)
+            if pending:
+                self.stats["failed_batches"] += 1
+                self.stats["failed_rows"] += len(pending)
+                self.stats["errors"].append(str(error))
+
+
+def run_pipeline(path, sinks, chunk_rows=None, queue_chunks=None, retries=None, schema=None):
+    """Read path once and fan every chunk out to all sinks concurrently.
+
+    Each sink has a bounded queue of queue_chunks chunks, so a slow sink
+    throttles the reader instead of letting memory grow. Returns
+    {sink name: stats} with rows/sec measured over the sink's wall time.
+    """
+    schema = schema or loader.infer_schema(path)
+    for sink in sinks:
+        sink.prepare(schema)
+    runners = [_SinkRunner(sink, queue_chunks or QUEUE_CHUNKS, SINK_RETRIES if retries is None else retries)
+               for sink in sinks]
+    start = time.perf_counter()
+    for runner in runners:
+        runner.started = start
+        runner.start()
+    rows_read = 0
+    try:
+        for records in iter_records(path, schema, chunk_rows):
+            rows_read += len(records)
+            for runner in runners:
+                runner.queue.put(records)
+    finally:
+        for runner in runners:
+            runner.finish()
+        for sink in sinks:
+            sink.close()
+
+    print(f"📥 Read {rows_read} rows in {time.perf_counter() - start:.2f}s")
+    summary = {}
+    for runner in runners:
+        stats = runner.stats
+        stats["rows_per_sec"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+        icon = "⚠️" if stats["failed_rows"] else "✅"
+        print(f"{icon} {runner.sink.name:>13}: {stats['rows']} rows in {stats['seconds']:.2f}s "
+              f"({stats['rows_per_sec']:.0f} rows/s), {stats['retries']} retries, "
+              f"{stats['failed_rows']} rows failed")
+        summary[runner.sink.name] = stats
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load one CSV into Postgres, MongoDB and Elasticsearch at once")
+    parser.add_argument("csv", nargs="?", default=loader.DEFAULT_CSV)
+    parser.add_argument("--name", default=None, help="table / collection / index name (default: CSV name)")
+    parser.add_argument("--sinks", default="postgres,mongo,elasticsearch")
+    parser.add_argument("--chunk-rows", type=int, default=READ_CHUNK_ROWS)
+    parser.add_argument("--pg-batch", type=int, default=50000)
+    parser.add_argument("--mongo-batch", type=int, default=5000)
+    parser.add_argument("--es-batch", type=int, default=2000)
+    parser.add_argument("--drop", action="store_true", help="recreate the Postgres table first")
+    args = parser.parse_args(argv)
+    name = args.name or loader.column_name(os.path.splitext(os.path.basename(args.csv))[0])
+
+    factories = {
+        "postgres": lambda: PostgresSink(name, batch_size=args.pg_batch, drop=args.drop),
+        "mongo": lambda: MongoSink(batch_size=args.mongo_batch),
+        "elasticsearch": lambda: ElasticsearchSink(name, batch_size=args.es_batch),
+        "memory": lambda: MemorySink(),
+    }
+    try:
+        sinks = [factories[key.strip()]() for key in args.sinks.split(",") if key.strip()]
+    except KeyError as exc:
+        print(f"❌ Unknown sink {exc}; choose from {', '.join(factories)}")
+        return 1
+    except Exception as exc:
+        print("❌ Connection failed:", exc)
+        return 1
+    summary = run_pipeline(args.csv, sinks, args.chunk_rows)
+    return 1 if any(stats["failed_rows"] for stats in summary.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
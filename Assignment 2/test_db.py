@@ -1,6 +1,7 @@
 import os
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import URL
 import psycopg2
 
 load_dotenv()
@@ -19,9 +20,16 @@ try:
         port=PG_PORT
     )
     print("✅ Raw psycopg2 connection successful")
+    raw_conn.close()
 
-    engine = create_engine("postgresql+psycopg2://", creator=lambda: raw_conn)
+    # Let SQLAlchemy open and pool its own connections; reusing raw_conn via
+    # creator= would hand the same socket to every "pooled" connection.
+    url = URL.create("postgresql+psycopg2", username=PG_USER, password=PG_PASS,
+                     host="localhost", port=PG_PORT, database=PG_DB)
+    engine = create_engine(url, pool_size=5, max_overflow=5, pool_pre_ping=True)
     with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
         print("✅ SQLAlchemy connection successful")
+    engine.dispose()
 except Exception as e:
     print("❌ Connection failed:", e)
@@ -0,0 +1,144 @@
+import csv
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pipeline  # noqa: E402
+
+SCHEMA = [("id", "BIGINT"), ("score", "DOUBLE PRECISION"), ("label", "TEXT")]
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class FakeBulkSession:
+    """Answers _bulk requests; statuses(attempt, count) gives one status per item."""
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.sent = []
+        self.indexed = []
+        self.auth = None
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        lines = data.decode("utf-8").splitlines()
+        documents = lines[1::2]
+        self.sent.append(documents)
+        codes = self.statuses(len(self.sent) - 1, len(documents))
+        self.indexed.extend(json.loads(doc) for doc, code in zip(documents, codes) if code < 300)
+        items = [{"index": {"status": code, "error": None if code < 300 else {"type": "es_rejected_execution_exception"}}}
+                 for code in codes]
+        return FakeResponse({"errors": any(code >= 300 for code in codes), "items": items})
+
+    def close(self):
+        pass
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "data.csv")
+        with open(self.path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "score", "label"])
+            for i in range(1000):
+                writer.writerow([i, "" if i % 10 == 0 else i / 2, f"row {i}"])
+        self.backoff = pipeline.RETRY_BACKOFF
+        pipeline.RETRY_BACKOFF = 0.0
+
+    def tearDown(self):
+        pipeline.RETRY_BACKOFF = self.backoff
+        shutil.rmtree(self.tmpdir)
+
+    def run_pipeline(self, sinks, **kwargs):
+        with redirect_stdout(io.StringIO()):
+            return pipeline.run_pipeline(self.path, sinks, schema=SCHEMA, **kwargs)
+
+    def test_every_sink_receives_every_row(self):
+        sinks = [pipeline.MemorySink("a", batch_size=64), pipeline.MemorySink("b", batch_size=300, workers=3)]
+        summary = self.run_pipeline(sinks, chunk_rows=100)
+        for sink in sinks:
+            self.assertEqual(summary[sink.name]["rows"], 1000)
+            self.assertEqual(sorted(r["id"] for r in sink.records), list(range(1000)))
+        record = next(r for r in sinks[0].records if r["id"] == 10)
+        self.assertEqual(record, {"id": 10, "score": None, "label": "row 10"})
+        self.assertEqual(summary["a"]["batches"], 16)
+
+    def test_slow_sink_throttles_reader(self):
+        slow = pipeline.MemorySink("slow", batch_size=100, delay=0.02)
+        read = []
+        chunks = pipeline.iter_records
+
+        def counting(*args, **kwargs):
+            for records in chunks(*args, **kwargs):
+                read.append(time.perf_counter())
+                yield records
+
+        pipeline.iter_records = counting
+        try:
+            ahead = []
+            sampler = threading.Timer(0.05, lambda: ahead.append(len(read) - slow.calls))
+            sampler.start()
+            summary = self.run_pipeline([slow], chunk_rows=100, queue_chunks=2)
+            sampler.join()
+        finally:
+            pipeline.iter_records = chunks
+        self.assertEqual(summary["slow"]["rows"], 1000)
+        # the reader can only be queue_chunks (+1 being written, +1 blocked in put) ahead
+        self.assertLessEqual(ahead[0], 4)
+
+    def test_failed_batches_are_retried_then_counted(self):
+        flaky = pipeline.MemorySink("flaky", batch_size=100, fail_every=2)
+        broken = pipeline.MemorySink("broken", batch_size=100, fail_every=1)
+        summary = self.run_pipeline([flaky, broken], chunk_rows=100, retries=1)
+        # calls alternate ok/fail, so every batch after the first needs one retry
+        self.assertEqual(summary["flaky"]["rows"], 1000)
+        self.assertEqual(summary["flaky"]["retries"], 9)
+        self.assertEqual(summary["flaky"]["failed_rows"], 0)
+        self.assertEqual(summary["broken"]["rows"], 0)
+        self.assertEqual(summary["broken"]["failed_batches"], 10)
+        self.assertEqual(summary["broken"]["failed_rows"], 1000)
+        self.assertEqual(summary["broken"]["retries"], 10)
+        self.assertEqual(len(summary["broken"]["errors"]), 10)
+
+    def test_elasticsearch_resends_only_failed_items(self):
+        # the first request of each batch throttles every other document
+        session = FakeBulkSession(lambda attempt, n: [429 if n == 100 and i % 2 else 201 for i in range(n)])
+        sink = pipeline.ElasticsearchSink("heart", batch_size=100, workers=1, session=session)
+        summary = self.run_pipeline([sink], chunk_rows=100, retries=2)
+        self.assertEqual(sorted(doc["id"] for doc in session.indexed), list(range(1000)))
+        self.assertEqual([len(sent) for sent in session.sent[:2]], [100, 50])
+        self.assertEqual(summary["elasticsearch"]["rows"], 1000)
+        self.assertEqual(summary["elasticsearch"]["retries"], 10)
+
+    def test_elasticsearch_counts_only_unwritten_rows_as_failed(self):
+        session = FakeBulkSession(lambda attempt, n: [429 if i < 10 else 201 for i in range(n)])
+        sink = pipeline.ElasticsearchSink("heart", batch_size=500, workers=1, session=session)
+        summary = self.run_pipeline([sink], chunk_rows=100, retries=2)
+        stats = summary["elasticsearch"]
+        # one retry layer: each batch is sent once plus `retries` times
+        self.assertEqual(len(session.sent), 2 * 3)
+        self.assertEqual(len(session.indexed), len({doc["id"] for doc in session.indexed}))
+        self.assertEqual((stats["rows"], stats["failed_rows"], stats["failed_batches"]), (980, 20, 2))
+        self.assertIn("429", stats["errors"][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
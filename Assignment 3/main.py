@@ -1,6 +1,18 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, InsertOne, UpdateOne, IndexModel, ASCENDING, TEXT
+from pymongo.errors import BulkWriteError, OperationFailure
+from pymongo.write_concern import WriteConcern
 from bson.objectid import ObjectId
+from collections import OrderedDict
+from itertools import islice
+import argparse
+import csv
+import functools
+import json
 import os
+import re
+import sys
+import threading
+import time
 
 # Load MongoDB credentials from environment variables
 mongo_user = os.getenv("MONGO_USER")
@@ -19,35 +31,465 @@ client = MongoClient(mongo_uri)
 db = client["mydatabase"]
 collection = db["items"]
 
+# Operations per bulk_write round trip (the driver splits further at 100k ops / 48MB).
+BATCH_SIZE = int(os.getenv("MONGO_BATCH_SIZE", "1000"))
+# Documents per page for read_items, and per cursor round trip while reading.
+PAGE_SIZE = int(os.getenv("MONGO_PAGE_SIZE", "20"))
+CURSOR_BATCH_SIZE = int(os.getenv("MONGO_CURSOR_BATCH_SIZE", "1000"))
+DEFAULT_FIELDS = ("name", "description")
+# Enforce one item per name (fails to build while duplicates exist).
+UNIQUE_NAMES = os.getenv("MONGO_UNIQUE_NAMES", "false").lower() == "true"
+
+# Declared indexes; ensure_indexes() creates them, which is a no-op when they exist.
+INDEXES = [
+    IndexModel([("name", ASCENDING)], name="name_unique", unique=True) if UNIQUE_NAMES
+    else IndexModel([("name", ASCENDING), ("_id", ASCENDING)], name="name_id"),
+    IndexModel([("name", TEXT), ("description", TEXT)], name="name_description_text",
+               weights={"name": 10, "description": 1}),
+]
+
+# Read-through cache for get_item: MONGO_CACHE_SIZE items (0 disables) kept
+# for MONGO_CACHE_TTL seconds; MONGO_CACHE_WATCH=true adds change-stream invalidation.
+CACHE_SIZE = int(os.getenv("MONGO_CACHE_SIZE", "10000"))
+CACHE_TTL = float(os.getenv("MONGO_CACHE_TTL", "300"))
+CACHE_WATCH = os.getenv("MONGO_CACHE_WATCH", "false").lower() == "true"
+
+TIMING_HOOKS = []
+
+def add_timing_hook(hook):
+    TIMING_HOOKS.append(hook)
+    return hook
+
+def remove_timing_hook(hook):
+    if hook in TIMING_HOOKS:
+        TIMING_HOOKS.remove(hook)
+
+def timed(operation):
+    """Report each call to TIMING_HOOKS as hook(operation, seconds, ok); see MONGO_TIMING_LOG."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not TIMING_HOOKS:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                elapsed = time.perf_counter() - start
+                for hook in list(TIMING_HOOKS):
+                    try:
+                        hook(operation, elapsed, ok)
+                    except Exception as exc:
+                        print(f"⚠️ Timing hook failed: {exc}")
+        return wrapper
+    return decorate
+
+if os.getenv("MONGO_TIMING_LOG", "false").lower() == "true":
+    add_timing_hook(lambda operation, seconds, ok:
+                    print(f"[timing] {operation} {seconds * 1000:.2f} ms{'' if ok else ' (failed)'}"))
+
+class ItemCache:
+    """Thread-safe LRU of documents keyed by ObjectId, with a per-entry TTL.
+
+    The TTL bounds staleness for writes made by other processes; writes
+    through this module invalidate their ids immediately, and watch() does
+    the same for everyone else's writes when the server is a replica set.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    def get(self, item_id):
+        """Return (found, document)."""
+        with self._lock:
+            entry = self._entries.get(item_id)
+            if entry is not None and (self.ttl <= 0 or entry[0] > time.monotonic()):
+                self._entries.move_to_end(item_id)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[item_id]
+            self.misses += 1
+            return False, None
+
+    def put(self, item_id, document):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[item_id] = (time.monotonic() + self.ttl, document)
+            self._entries.move_to_end(item_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, item_id):
+        with self._lock:
+            self._entries.pop(item_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions,
+                    "hit_rate": self.hits / lookups if lookups else 0.0,
+                    "watching": self._watcher is not None and self._watcher.is_alive()}
+
+    def watch(self, source):
+        """Invalidate from a change stream on source in a daemon thread.
+
+        Returns False (and changes nothing) when change streams are not
+        available, e.g. on a standalone server.
+        """
+        try:
+            stream = source.watch()
+        except OperationFailure as exc:
+            print(f"⚠️ Change streams unavailable, relying on TTL: {exc}")
+            return False
+
+        def run():
+            with stream:
+                for change in stream:
+                    key = change.get("documentKey", {}).get("_id")
+                    if key is not None:
+                        self.invalidate(key)
+                    elif change.get("operationType") in ("drop", "rename", "dropDatabase", "invalidate"):
+                        self.clear()
+        self._watcher = threading.Thread(target=run, name="item-cache-watch", daemon=True)
+        self._watcher.start()
+        return True
+
+ITEM_CACHE = ItemCache(CACHE_SIZE, CACHE_TTL)
+
+@timed("get_item")
+def get_item(item_id):
+    """Fetch one item by id, through ITEM_CACHE; None if it does not exist.
+
+    Cached documents are shared between callers, so treat them as read-only.
+    """
+    item_id = _object_id(item_id)
+    found, item = ITEM_CACHE.get(item_id)
+    if not found:
+        item = collection.find_one({"_id": item_id})
+        if item is not None:
+            ITEM_CACHE.put(item_id, item)
+    return item
+
+@timed("create_item")
 def create_item(name, description):
     result = collection.insert_one({"name": name, "description": description})
     print(f"✅ Item created with ID: {result.inserted_id}")
 
-def read_items():
-    items = collection.find()
+def _projection(fields):
+    if fields is None:
+        return None
+    return {field: 1 for field in fields}
+
+@timed("read_page")
+def read_page(page_size=None, after=None, filters=None, fields=DEFAULT_FIELDS, batch_size=None):
+    """Return (items, next_after) for one page in _id order.
+
+    Keyset pagination: the page starts at ``_id > after`` and is served by
+    the _id index, so page N costs the same as page 1 (no skip()). Pass the
+    returned next_after back in to get the following page; it is None once
+    the collection is exhausted. fields=None returns whole documents.
+    """
+    page_size = page_size or PAGE_SIZE
+    query = dict(filters or {})
+    if after is not None:
+        keyset = {"_id": {"$gt": _object_id(after)}}
+        query = {"$and": [query, keyset]} if "_id" in query else {**query, **keyset}
+    cursor = (collection.find(query, _projection(fields))
+              .sort("_id", 1)
+              .limit(page_size)
+              .batch_size(min(batch_size or CURSOR_BATCH_SIZE, page_size)))
+    items = list(cursor)
+    next_after = items[-1]["_id"] if len(items) == page_size else None
+    return items, next_after
+
+def iter_items(filters=None, fields=DEFAULT_FIELDS, batch_size=None, after=None):
+    """Stream every matching item, one keyset page of batch_size at a time."""
+    batch_size = batch_size or CURSOR_BATCH_SIZE
+    while True:
+        items, after = read_page(batch_size, after, filters, fields, batch_size)
+        yield from items
+        if after is None:
+            return
+
+def read_items(page_size=None, after=None, filters=None, fields=DEFAULT_FIELDS):
+    """Print one page of items and return the id to pass as after for the next one."""
+    items, next_after = read_page(page_size, after, filters, fields)
     for item in items:
-        print(f"📄 {item['_id']}: {item['name']} - {item['description']}")
+        print(f"📄 {item['_id']}: {item.get('name')} - {item.get('description')}")
+    if not items:
+        print("📭 No items.")
+    return next_after
 
+@timed("update_item")
 def update_item(item_id, name, description):
+    item_id = ObjectId(item_id)
+    # before and after, as in bulk_write: a get_item racing the write may re-cache the old document
+    ITEM_CACHE.invalidate(item_id)
     result = collection.update_one(
-        {"_id": ObjectId(item_id)},
+        {"_id": item_id},
         {"$set": {"name": name, "description": description}}
     )
+    ITEM_CACHE.invalidate(item_id)
     if result.modified_count:
         print("✅ Item updated.")
     else:
         print("⚠️ Item not found.")
 
+@timed("delete_item")
 def delete_item(item_id):
-    result = collection.delete_one({"_id": ObjectId(item_id)})
+    item_id = ObjectId(item_id)
+    ITEM_CACHE.invalidate(item_id)
+    result = collection.delete_one({"_id": item_id})
+    ITEM_CACHE.invalidate(item_id)
     if result.deleted_count:
         print("🗑️ Item deleted.")
     else:
         print("⚠️ Item not found.")
 
-if __name__ == "__main__":
+def ensure_indexes():
+    """Create the INDEXES; existing identical indexes are left untouched."""
+    try:
+        names = collection.create_indexes(INDEXES)
+        print(f"🗂️ Indexes ready: {', '.join(names)}")
+        return names
+    except OperationFailure as exc:
+        print(f"⚠️ Could not create indexes: {exc}")
+        return []
+
+@timed("find_by_name")
+def find_by_name(name, fields=DEFAULT_FIELDS, limit=0):
+    """Exact name lookup, served by the name index."""
+    return list(collection.find({"name": name}, _projection(fields)).sort([("name", 1), ("_id", 1)]).limit(limit))
+
+@timed("search_name_prefix")
+def search_name_prefix(prefix, fields=DEFAULT_FIELDS, limit=50):
+    """Names starting with prefix; an anchored, case-sensitive regex is an index range scan."""
+    query = {"name": {"$regex": f"^{re.escape(prefix)}"}}
+    return list(collection.find(query, _projection(fields)).sort([("name", 1), ("_id", 1)]).limit(limit))
+
+@timed("search_text")
+def search_text(terms, fields=DEFAULT_FIELDS, limit=50):
+    """Full-text search over name and description, best matches first."""
+    projection = _projection(fields) or {}
+    projection["score"] = {"$meta": "textScore"}
+    cursor = collection.find({"$text": {"$search": terms}}, projection)
+    return list(cursor.sort([("score", {"$meta": "textScore"})]).limit(limit))
+
+def _plan_stages(plan):
+    """Flatten a winning plan tree into its stage dicts (root first)."""
+    stages = []
+    pending = [plan]
+    while pending:
+        stage = pending.pop()
+        if not stage:
+            continue
+        stages.append(stage)
+        pending.extend(stage.get("inputStages", []))
+        pending.append(stage.get("inputStage"))
+        pending.append(stage.get("queryPlan"))
+    return stages
+
+def summarize_explain(explain):
+    """Reduce explain(executionStats) output to scan type, index and doc counts."""
+    plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+    stages = _plan_stages(plan)
+    names = [stage["stage"] for stage in stages if stage.get("stage")]
+    stats = explain.get("executionStats", {})
+    if "COLLSCAN" in names:
+        scan = "COLLSCAN"
+    elif "IXSCAN" in names or "TEXT_MATCH" in names or "TEXT" in names:
+        scan = "IXSCAN"
+    else:
+        scan = names[-1] if names else "UNKNOWN"
+    return {
+        "scan": scan,
+        "indexes": sorted({stage["indexName"] for stage in stages if stage.get("indexName")}),
+        "stages": names,
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "returned": stats.get("nReturned"),
+        "millis": stats.get("executionTimeMillis"),
+    }
+
+def explain_query(query, fields=DEFAULT_FIELDS, sort=None, limit=0):
+    """Run explain(executionStats) for a find and print whether it used an index."""
+    command = {"find": collection.name, "filter": query}
+    if fields is not None:
+        command["projection"] = _projection(fields)
+    if sort:
+        command["sort"] = dict(sort)
+    if limit:
+        command["limit"] = limit
+    explain = db.command({"explain": command, "verbosity": "executionStats"})
+    summary = summarize_explain(explain)
+    icon = "⚠️" if summary["scan"] == "COLLSCAN" else "✅"
+    print(f"{icon} {summary['scan']} via {', '.join(summary['indexes']) or 'no index'}: "
+          f"examined {summary['docs_examined']} doc(s) / {summary['keys_examined']} key(s), "
+          f"returned {summary['returned']} in {summary['millis']} ms")
+    return summary
+
+def _object_id(item_id):
+    return item_id if isinstance(item_id, ObjectId) else ObjectId(item_id)
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+_ANY_ITEM = object()
+
+def _targeted(entry):
+    """Return (operation, item_id) for a bulk_write entry.
+
+    Builders pass the id of the item they touch alongside the operation (None
+    for inserts); a bare update or delete may match any item.
+    """
+    if isinstance(entry, tuple):
+        return entry
+    return entry, None if isinstance(entry, InsertOne) else _ANY_ITEM
+
+def _invalidate_items(item_ids):
+    """Drop cached items touched by a batch; unknown targets clear the cache."""
+    for item_id in item_ids:
+        if item_id is _ANY_ITEM:
+            ITEM_CACHE.clear()
+            return
+        if item_id is not None:
+            ITEM_CACHE.invalidate(item_id)
+
+def _target(write_concern):
+    if write_concern is None:
+        return collection
+    if not isinstance(write_concern, WriteConcern):
+        write_concern = WriteConcern(w=write_concern)
+    return collection.with_options(write_concern=write_concern)
+
+@timed("bulk_write")
+def bulk_write(operations, batch_size=None, ordered=True, write_concern=None, quiet=False):
+    """Send InsertOne/UpdateOne/DeleteOne operations batch_size at a time.
+
+    operations may be any iterable (e.g. a generator over a huge file); only
+    one batch is held in memory. Entries may be ``(operation, item_id)`` pairs
+    so that only that item is evicted from ITEM_CACHE; a bare update or delete
+    clears the whole cache. With ordered=True the first failing batch
+    stops the run, with ordered=False the server keeps going and every
+    failure is collected. write_concern is a WriteConcern or a ``w`` value
+    (e.g. 1, 0, "majority"). Returns a summary dict.
+    """
+    target = _target(write_concern)
+    summary = {"inserted": 0, "matched": 0, "modified": 0, "deleted": 0, "upserted": 0,
+               "batches": 0, "errors": [], "seconds": 0.0}
+    start = time.perf_counter()
+    for batch in _batches(map(_targeted, operations), batch_size or BATCH_SIZE):
+        summary["batches"] += 1
+        item_ids = [item_id for _, item_id in batch]
+        # before: readers stop serving the old version; after: drop what they re-cached meanwhile
+        _invalidate_items(item_ids)
+        try:
+            result = target.bulk_write([operation for operation, _ in batch], ordered=ordered)
+            details = result.bulk_api_result if result.acknowledged else {}
+        except BulkWriteError as exc:
+            details = exc.details
+            summary["errors"].extend(details.get("writeErrors", []))
+        finally:
+            _invalidate_items(item_ids)
+        summary["inserted"] += details.get("nInserted", 0)
+        summary["matched"] += details.get("nMatched", 0)
+        summary["modified"] += details.get("nModified", 0)
+        summary["deleted"] += details.get("nRemoved", 0)
+        summary["upserted"] += details.get("nUpserted", 0)
+        if ordered and summary["errors"]:
+            break
+    summary["seconds"] = time.perf_counter() - start
+    if not quiet:
+        total = summary["inserted"] + summary["modified"] + summary["deleted"] + summary["upserted"]
+        rate = total / summary["seconds"] if summary["seconds"] else 0
+        print(f"📦 Bulk write: {summary['inserted']} inserted, {summary['modified']} updated, "
+              f"{summary['deleted']} deleted in {summary['batches']} batch(es), "
+              f"{summary['seconds']:.2f}s ({rate:.0f} docs/s)")
+        if summary["errors"]:
+            print(f"⚠️ {len(summary['errors'])} write error(s); first: {summary['errors'][0].get('errmsg')}")
+    return summary
+
+def create_items(items, batch_size=None, ordered=True, write_concern=None):
+    """Insert (name, description) pairs or dicts; returns the bulk_write summary."""
+    def operations():
+        for item in items:
+            if not isinstance(item, dict):
+                name, description = item
+                item = {"name": name, "description": description}
+            yield InsertOne(item), None
+    return bulk_write(operations(), batch_size, ordered, write_concern)
+
+def update_items(updates, batch_size=None, ordered=True, write_concern=None):
+    """Apply (item_id, fields) pairs as $set updates, batch_size per round trip."""
+    def operations():
+        for item_id, fields in updates:
+            item_id = _object_id(item_id)
+            yield UpdateOne({"_id": item_id}, {"$set": fields}), item_id
+    return bulk_write(operations(), batch_size, ordered, write_concern)
+
+@timed("delete_items")
+def delete_items(item_ids, batch_size=None, write_concern=None):
+    """Delete by id with one delete_many({"_id": {"$in": batch}}) per batch."""
+    target = _target(write_concern)
+    deleted = 0
+    start = time.perf_counter()
+    for batch in _batches((_object_id(item_id) for item_id in item_ids), batch_size or BATCH_SIZE):
+        _invalidate_items(batch)
+        result = target.delete_many({"_id": {"$in": batch}})
+        _invalidate_items(batch)
+        deleted += result.deleted_count if result.acknowledged else 0
+    elapsed = time.perf_counter() - start
+    print(f"🗑️ Deleted {deleted} item(s) in {elapsed:.2f}s.")
+    return {"deleted": deleted, "seconds": elapsed}
+
+def _read_import_file(path):
+    """Yield documents from a JSON Lines, JSON array or CSV (name,description) file."""
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as handle:
+            yield from csv.DictReader(handle)
+        return
+    with open(path, encoding="utf-8") as handle:
+        if path.lower().endswith(".json"):
+            yield from json.load(handle)
+            return
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+
+def import_items(path, batch_size=None, ordered=False, write_concern=None):
+    """Stream a file into the collection through create_items."""
+    print(f"📥 Importing {path} ...")
+    return create_items(_read_import_file(path), batch_size, ordered, write_concern)
+
+def _write_concern_arg(value):
+    return int(value) if value.isdigit() else value
+
+def menu():
     while True:
-        print("\n🔧 Choose operation: create / read / update / delete / exit")
+        print("\n🔧 Choose operation: create / read / get / update / delete / search / explain / import / cache / exit")
         op = input("Operation: ").strip().lower()
 
         if op == "create":
@@ -56,7 +498,9 @@ if __name__ == "__main__":
             create_item(name, desc)
 
         elif op == "read":
-            read_items()
+            next_after = read_items()
+            while next_after is not None and input("➡️ Next page? (y/n): ").strip().lower() == "y":
+                next_after = read_items(after=next_after)
 
         elif op == "update":
             item_id = input("🔄 Item ID to update: ")
@@ -68,6 +512,42 @@ if __name__ == "__main__":
             item_id = input("🗑️ Item ID to delete: ")
             delete_item(item_id)
 
+        elif op == "get":
+            item_id = input("🔍 Item ID: ").strip()
+            try:
+                item = get_item(item_id)
+            except Exception as exc:
+                print(f"❌ Invalid ID: {exc}")
+                continue
+            if item is None:
+                print("⚠️ Item not found.")
+            else:
+                print(f"📄 {item['_id']}: {item.get('name')} - {item.get('description')}")
+
+        elif op == "cache":
+            print(f"🧮 Cache: {ITEM_CACHE.stats()}")
+
+        elif op == "search":
+            mode = input("🔎 Exact name (1), name prefix (2) or text (3): ").strip()
+            term = input("🔎 Search: ").strip()
+            search = {"1": find_by_name, "2": search_name_prefix, "3": search_text}.get(mode)
+            if search is None:
+                print("❌ Invalid option.")
+            else:
+                for item in search(term):
+                    print(f"📄 {item['_id']}: {item.get('name')} - {item.get('description')}")
+
+        elif op == "explain":
+            name = input("🔎 Name to look up: ").strip()
+            explain_query({"name": name})
+
+        elif op == "import":
+            path = input("📥 File (.jsonl / .json / .csv): ").strip()
+            try:
+                import_items(path)
+            except (OSError, ValueError) as exc:
+                print(f"❌ Import failed: {exc}")
+
         elif op == "exit":
             print("👋 Exiting.")
             break
@@ -75,4 +555,26 @@ if __name__ == "__main__":
         else:
             print("❌ Invalid operation.")
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MongoDB items CRUD")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("menu", help="interactive menu (default)")
+    importer = commands.add_parser("import", help="bulk-load items from a file")
+    importer.add_argument("path", help=".jsonl, .json (array) or .csv with name,description columns")
+    importer.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    importer.add_argument("--ordered", action="store_true", help="stop at the first failed write")
+    importer.add_argument("--w", type=_write_concern_arg, default=None,
+                          help='write concern, e.g. 0, 1 or "majority"')
+    args = parser.parse_args(argv)
+    ensure_indexes()
+    if CACHE_WATCH and CACHE_SIZE > 0:
+        ITEM_CACHE.watch(collection)
+
+    if args.command == "import":
+        summary = import_items(args.path, args.batch_size, args.ordered, args.w)
+        return 1 if summary["errors"] else 0
+    menu()
+    return 0
 
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+import importlib.util
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+
+import mongomock
+from pymongo import DeleteOne, UpdateOne
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_main():
+    # the module builds its (lazy) client from these at import time
+    for name, value in (('MONGO_USER', 'test'), ('MONGO_PASS', 'test'),
+                        ('MONGO_HOST', '127.0.0.1'), ('MONGO_PORT', '27017')):
+        os.environ.setdefault(name, value)
+    spec = importlib.util.spec_from_file_location('mongo_main', os.path.join(PROJECT_DIR, 'main.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class MongoTestCase(unittest.TestCase):
+    def setUp(self):
+        self.main = load_main()
+        self.main.db = mongomock.MongoClient()['test']
+        self.main.collection = self.main.db['items']
+        self.calls = []
+        bulk_write = self.main.collection.bulk_write
+
+        def counting_bulk_write(requests, **kwargs):
+            self.calls.append(len(requests))
+            return bulk_write(requests, **kwargs)
+        self.main.collection.bulk_write = counting_bulk_write
+
+    def quietly(self, function, *args, **kwargs):
+        with redirect_stdout(io.StringIO()):
+            return function(*args, **kwargs)
+
+    def insert(self, count):
+        self.quietly(self.main.create_items, ((f'item {i:03d}', f'description {i}') for i in range(count)))
+        return [doc['_id'] for doc in self.main.collection.find().sort('_id', 1)]
+
+
+class TestBulkWrites(MongoTestCase):
+    def test_create_items_in_batches(self):
+        summary = self.quietly(self.main.create_items,
+                               [('a', 'first'), {'name': 'b', 'description': 'second'}, ('c', 'third')],
+                               batch_size=2)
+        self.assertEqual(self.calls, [2, 1])
+        self.assertEqual((summary['inserted'], summary['batches'], summary['errors']), (3, 2, []))
+        self.assertEqual(sorted(doc['name'] for doc in self.main.collection.find()), ['a', 'b', 'c'])
+
+    def test_update_and_delete_items(self):
+        ids = self.insert(5)
+        summary = self.quietly(self.main.update_items, [(str(ids[0]), {'name': 'x'}), (ids[1], {'name': 'y'})],
+                               batch_size=1)
+        self.assertEqual((summary['matched'], summary['modified'], summary['batches']), (2, 2, 2))
+        self.assertEqual(self.main.collection.find_one({'_id': ids[1]})['name'], 'y')
+        result = self.quietly(self.main.delete_items, [str(ids[0]), ids[2], ids[2]], batch_size=2)
+        self.assertEqual(result['deleted'], 2)
+        self.assertEqual(self.main.collection.count_documents({}), 3)
+
+    def test_bulk_update_and_delete_invalidate_only_touched_items(self):
+        ids = self.insert(3)
+        for item_id in ids:
+            self.main.get_item(item_id)
+        self.quietly(self.main.update_items, [(ids[0], {'name': 'renamed'})])
+        self.assertEqual(self.main.ITEM_CACHE.stats()['size'], 2)
+        self.assertEqual(self.main.get_item(ids[0])['name'], 'renamed')
+        self.quietly(self.main.delete_items, [ids[1]])
+        self.assertIsNone(self.main.get_item(ids[1]))
+        self.assertEqual(self.main.get_item(ids[2])['name'], 'item 002')
+        self.assertEqual(self.main.ITEM_CACHE.stats()['misses'], 3 + 2)
+
+    def test_bulk_write_pairs_and_bare_operations(self):
+        ids = self.insert(3)
+        for item_id in ids:
+            self.main.get_item(item_id)
+        # (operation, item_id) pairs evict just that item
+        self.quietly(self.main.bulk_write, [(DeleteOne({'_id': ids[0]}), ids[0])])
+        self.assertEqual(self.main.ITEM_CACHE.stats()['size'], 2)
+        # a bare operation may match anything, so the cache is cleared
+        self.quietly(self.main.bulk_write, [UpdateOne({'name': 'item 001'}, {'$set': {'description': 'new'}})])
+        self.assertEqual(self.main.ITEM_CACHE.stats()['size'], 0)
+        self.assertEqual(self.main.get_item(ids[1])['description'], 'new')
+
+    def test_ordered_bulk_write_stops_at_the_first_failing_batch(self):
+        ids = self.insert(1)
+        operations = ([self.main.InsertOne({'_id': ids[0], 'name': 'duplicate'})]
+                      + [self.main.InsertOne({'name': f'n{i}'}) for i in range(4)])
+        summary = self.quietly(self.main.bulk_write, operations, batch_size=2)
+        self.assertEqual(len(summary['errors']), 1)
+        self.assertEqual(summary['batches'], 1)
+        summary = self.quietly(self.main.bulk_write, operations, batch_size=2, ordered=False)
+        self.assertEqual((summary['inserted'], summary['batches']), (4, 3))
+
+    def test_import_items_from_each_format(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        files = {
+            'items.jsonl': '{"name": "j1", "description": "a"}\n\n{"name": "j2", "description": "b"}\n',
+            'items.json': json.dumps([{'name': 'a1', 'description': 'c'}]),
+            'items.csv': 'name,description\nc1,d\nc2,"with, comma"\n',
+        }
+        for name, content in files.items():
+            with open(os.path.join(tmpdir, name), 'w', encoding='utf-8') as f:
+                f.write(content)
+            self.quietly(self.main.import_items, os.path.join(tmpdir, name), batch_size=1)
+        names = sorted(doc['name'] for doc in self.main.collection.find())
+        self.assertEqual(names, ['a1', 'c1', 'c2', 'j1', 'j2'])
+        self.assertEqual(self.main.collection.find_one({'name': 'c2'})['description'], 'with, comma')
+
+
+class TestPaging(MongoTestCase):
+    def test_pages_cover_every_item_once(self):
+        ids = self.insert(25)
+        seen, after, pages = [], None, 0
+        while True:
+            items, after = self.main.read_page(page_size=10, after=after)
+            seen.extend(item['_id'] for item in items)
+            pages += 1
+            if after is None:
+                break
+        self.assertEqual(seen, ids)
+        self.assertEqual(pages, 3)
+        self.assertEqual(set(items[0]), {'_id', 'name', 'description'})
+
+    def test_inserts_between_pages_are_neither_skipped_nor_repeated(self):
+        ids = self.insert(10)
+        first, after = self.main.read_page(page_size=4)
+        # new ids sort after every existing one, so they show up on a later page
+        added = self.insert(13)[10:]
+        self.quietly(self.main.delete_items, [ids[0]])
+        seen = [item['_id'] for item in first]
+        while after is not None:
+            items, after = self.main.read_page(page_size=4, after=str(after))
+            seen.extend(item['_id'] for item in items)
+        self.assertEqual(seen, ids + added)
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_exact_multiple_of_page_size_ends_with_an_empty_page(self):
+        self.insert(4)
+        items, after = self.main.read_page(page_size=4)
+        self.assertEqual(len(items), 4)
+        self.assertEqual(self.main.read_page(page_size=4, after=after), ([], None))
+
+    def test_filters_and_keyset_on_id(self):
+        ids = self.insert(10)
+        items, _ = self.main.read_page(page_size=3, after=ids[2], filters={'_id': {'$lte': ids[7]}}, fields=None)
+        self.assertEqual([item['_id'] for item in items], ids[3:6])
+        self.assertIn('description', items[0])
+
+    def test_iter_items_streams_all_pages(self):
+        ids = self.insert(23)
+        self.assertEqual([item['_id'] for item in self.main.iter_items(batch_size=5)], ids)
+        names = [item['name'] for item in self.main.iter_items(filters={'name': {'$gte': 'item 020'}}, batch_size=2)]
+        self.assertEqual(names, ['item 020', 'item 021', 'item 022'])
+
+    def test_read_items_prints_a_page_and_returns_the_cursor(self):
+        ids = self.insert(3)
+        out = io.StringIO()
+        with redirect_stdout(out):
+            after = self.main.read_items(page_size=2)
+            self.assertIsNone(self.main.read_items(page_size=2, after=after))
+        self.assertEqual(after, ids[1])
+        self.assertEqual(out.getvalue().count('📄'), 3)
+
+
+class TestItemCache(MongoTestCase):
+    def test_lru_eviction(self):
+        cache = self.main.ItemCache(maxsize=2, ttl=60)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertEqual(cache.get('b'), (False, None))
+        self.assertEqual((cache.get('a'), cache.get('c')), ((True, 1), (True, 3)))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_ttl_expiry_and_disabled_cache(self):
+        cache = self.main.ItemCache(maxsize=10, ttl=60)
+        cache.put('a', 1)
+        cache._entries['a'] = (time.monotonic() - 1, 1)
+        self.assertEqual(cache.get('a'), (False, None))
+        self.assertEqual(cache.stats()['size'], 0)
+        disabled = self.main.ItemCache(maxsize=0, ttl=60)
+        disabled.put('a', 1)
+        self.assertEqual(disabled.get('a'), (False, None))
+
+    def test_get_item_reads_through_the_cache(self):
+        ids = self.insert(2)
+        self.assertEqual(self.main.get_item(str(ids[0]))['name'], 'item 000')
+        self.main.collection.update_one({'_id': ids[0]}, {'$set': {'name': 'changed elsewhere'}})
+        # served from the cache until the TTL runs out or this module writes it
+        self.assertEqual(self.main.get_item(ids[0])['name'], 'item 000')
+        self.assertIsNone(self.main.get_item(self.main.ObjectId()))
+        stats = self.main.ITEM_CACHE.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (1, 2, 1))
+
+    def test_single_writes_invalidate_before_and_after(self):
+        ids = self.insert(1)
+        self.main.get_item(ids[0])
+        update_one = self.main.collection.update_one
+
+        def racing_update(*args, **kwargs):
+            # nothing stale is left to read during the write, and a reader
+            # that re-caches the old document is undone afterwards
+            self.assertEqual(self.main.ITEM_CACHE.get(ids[0]), (False, None))
+            self.main.get_item(ids[0])
+            return update_one(*args, **kwargs)
+        self.main.collection.update_one = racing_update
+        self.quietly(self.main.update_item, str(ids[0]), 'new', 'desc')
+        self.assertEqual(self.main.get_item(ids[0])['name'], 'new')
+        self.quietly(self.main.delete_item, str(ids[0]))
+        self.assertIsNone(self.main.get_item(ids[0]))
+
+
+class TestSearch(MongoTestCase):
+    def test_find_by_name(self):
+        self.quietly(self.main.create_items, [('b', '1'), ('a', '2'), ('b', '3')])
+        found = self.main.find_by_name('b')
+        self.assertEqual([item['description'] for item in found], ['1', '3'])
+        self.assertEqual(len(self.main.find_by_name('b', limit=1)), 1)
+        self.assertEqual(self.main.find_by_name('B'), [])
+
+    def test_prefix_is_anchored_and_escaped(self):
+        self.quietly(self.main.create_items, [('a.b', '1'), ('axb', '2'), ('xa.b', '3'), ('a.bc', '4'), ('(x', '5')])
+        self.assertEqual([item['name'] for item in self.main.search_name_prefix('a.b')], ['a.b', 'a.bc'])
+        self.assertEqual([item['name'] for item in self.main.search_name_prefix('(')], ['(x'])
+        self.assertEqual(len(self.main.search_name_prefix('', limit=2)), 2)
+
+
+class TestExplain(unittest.TestCase):
+    def setUp(self):
+        self.main = load_main()
+
+    def test_index_scan_below_fetch(self):
+        explain = {
+            'queryPlanner': {'winningPlan': {
+                'stage': 'LIMIT', 'inputStage': {
+                    'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN', 'indexName': 'name_id'}}}},
+            'executionStats': {'totalKeysExamined': 5, 'totalDocsExamined': 5, 'nReturned': 5,
+                               'executionTimeMillis': 1},
+        }
+        self.assertEqual(self.main.summarize_explain(explain), {
+            'scan': 'IXSCAN', 'indexes': ['name_id'], 'stages': ['LIMIT', 'FETCH', 'IXSCAN'],
+            'keys_examined': 5, 'docs_examined': 5, 'returned': 5, 'millis': 1,
+        })
+
+    def test_collection_scan(self):
+        explain = {
+            'queryPlanner': {'winningPlan': {'stage': 'SORT', 'inputStage': {'stage': 'COLLSCAN'}}},
+            'executionStats': {'totalKeysExamined': 0, 'totalDocsExamined': 1000, 'nReturned': 3},
+        }
+        summary = self.main.summarize_explain(explain)
+        self.assertEqual((summary['scan'], summary['indexes'], summary['docs_examined']), ('COLLSCAN', [], 1000))
+        self.assertIsNone(summary['millis'])
+
+    def test_text_and_slot_based_plans(self):
+        # $text plans branch through inputStages; 7.x wraps the tree in queryPlan
+        text = {'queryPlanner': {'winningPlan': {'stage': 'TEXT_MATCH', 'inputStage': {
+            'stage': 'TEXT_OR', 'inputStages': [{'stage': 'IXSCAN', 'indexName': 'name_description_text'},
+                                                {'stage': 'IXSCAN', 'indexName': 'name_description_text'}]}}}}
+        sbe = {'queryPlanner': {'winningPlan': {'queryPlan': {
+            'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN', 'indexName': 'name_unique'}}}}}
+        self.assertEqual(self.main.summarize_explain(text)['indexes'], ['name_description_text'])
+        self.assertEqual(self.main.summarize_explain(text)['scan'], 'IXSCAN')
+        self.assertEqual(self.main.summarize_explain(sbe)['indexes'], ['name_unique'])
+        self.assertEqual(self.main.summarize_explain({})['scan'], 'UNKNOWN')
+        self.assertEqual(self.main.summarize_explain({'queryPlanner': {'winningPlan': {'stage': 'EOF'}}})['scan'],
+                         'EOF')
+
+
+if __name__ == '__main__':
+    unittest.main()
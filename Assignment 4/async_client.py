@@ -0,0 +1,308 @@
+import asyncio
+import json
+import os
+import posixpath
+import sys
+import time
+from urllib.parse import quote
+
+import aiohttp
+from hdfs import HdfsError
+
+from main import _rewrite_host
+
+
+class AsyncHadoopCRUD:
+    """asyncio counterpart of HadoopCRUD for many small files.
+
+    Every request goes through one aiohttp session (keep-alive connection
+    pool) and a semaphore caps how many are in flight, so thousands of
+    create/read calls can be issued with asyncio.gather without opening
+    thousands of sockets. NameNode -> DataNode redirects are followed by hand
+    so the HDFS_DATANODE_HOST rewrite used by _RedirectAdapter still applies.
+
+    Use it as an async context manager::
+
+        async with AsyncHadoopCRUD() as hadoop:
+            await hadoop.create_files({"/data/a.txt": "a", "/data/b.txt": "b"})
+    """
+
+    def __init__(self, base_url=None, user=None, concurrency=None, datanode_host=None, timeout=None):
+        self.hdfs_host = os.getenv("HDFS_HOST", "localhost")
+        self.hdfs_port = os.getenv("HDFS_PORT", "9870")
+        self.hdfs_user = user or os.getenv("HDFS_USER", "hdfs")
+        self.base_url = (base_url or f"http://{self.hdfs_host}:{self.hdfs_port}").rstrip("/")
+        self.concurrency = concurrency or int(os.getenv("HDFS_ASYNC_CONCURRENCY", "64"))
+        self.datanode_host_override = datanode_host or os.getenv("HDFS_DATANODE_HOST")
+        self.allowed_hosts = {self.hdfs_host, self.datanode_host_override}
+        self.timeout = aiohttp.ClientTimeout(total=timeout or float(os.getenv("HDFS_TIMEOUT", "60")))
+        self.session = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def open(self):
+        if self.session is None:
+            # One pooled connection per concurrent request; idle sockets are
+            # kept alive and reused for the next request to the same host.
+            connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.concurrency,
+                                             keepalive_timeout=30)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            print(f"Connected to HDFS at {self.base_url} as {self.hdfs_user} (async)")
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def resolve(self, hdfs_path):
+        if not posixpath.isabs(hdfs_path):
+            hdfs_path = posixpath.join(f"/user/{self.hdfs_user}", hdfs_path)
+        return posixpath.normpath(hdfs_path)
+
+    def _url(self, hdfs_path):
+        return f"{self.base_url}/webhdfs/v1{quote(self.resolve(hdfs_path))}"
+
+    def _datanode_url(self, location):
+        if not self.datanode_host_override:
+            return location
+        return _rewrite_host(location, self.datanode_host_override, self.allowed_hosts)
+
+    @staticmethod
+    async def _check(response):
+        if response.status < 400:
+            return
+        try:
+            remote = (await response.json(content_type=None))["RemoteException"]
+            message, exception = remote["message"], remote.get("exception")
+        except Exception:
+            message, exception = await response.text() or response.reason, None
+        raise HdfsError(message, exception=exception)
+
+    async def _request(self, method, hdfs_path, op, data=None, **params):
+        """Issue one WebHDFS call; returns (status, body bytes).
+
+        CREATE/APPEND/OPEN answer with a 307 to a DataNode: the NameNode step
+        is sent without a body and the payload only goes to the DataNode.
+        """
+        if self.session is None:
+            await self.open()
+        query = {"op": op, "user.name": self.hdfs_user}
+        query.update({k: str(v).lower() if isinstance(v, bool) else str(v) for k, v in params.items()})
+        async with self._semaphore:
+            async with self.session.request(method, self._url(hdfs_path), params=query,
+                                            allow_redirects=False) as response:
+                if response.status not in (301, 302, 303, 307, 308):
+                    await self._check(response)
+                    return response.status, await response.read()
+                location = self._datanode_url(response.headers["Location"])
+                await response.read()
+            async with self.session.request(method, location, data=data, allow_redirects=False) as response:
+                await self._check(response)
+                return response.status, await response.read()
+
+    async def _json(self, method, hdfs_path, op, **params):
+        _, body = await self._request(method, hdfs_path, op, **params)
+        return json.loads(body) if body else {}
+
+    async def write(self, hdfs_path, data, overwrite=True, append=False):
+        """Write bytes/str or a binary file object (streamed) to a file; raises HdfsError on failure."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if append:
+            await self._request("POST", hdfs_path, "APPEND", data=data)
+        else:
+            await self._request("PUT", hdfs_path, "CREATE", data=data, overwrite=overwrite)
+
+    async def read(self, hdfs_path, offset=0, length=None):
+        """Return the file (or a byte range of it) as bytes; raises HdfsError."""
+        params = {"offset": offset} if offset else {}
+        if length is not None:
+            params["length"] = length
+        _, body = await self._request("GET", hdfs_path, "OPEN", **params)
+        return body
+
+    async def status(self, hdfs_path, strict=True):
+        """FileStatus of a path; with strict=False None if it does not exist.
+
+        Other errors (permissions, server failures) are raised either way.
+        """
+        try:
+            return (await self._json("GET", hdfs_path, "GETFILESTATUS"))["FileStatus"]
+        except HdfsError as exc:
+            if strict or exc.exception != "FileNotFoundException":
+                raise
+            return None
+
+    async def create_file(self, hdfs_path, local_file_path=None, data=None):
+        try:
+            if local_file_path:
+                with open(local_file_path, "rb") as handle:
+                    await self.write(hdfs_path, handle)
+                print(f"File uploaded: {local_file_path} -> {hdfs_path}")
+            elif data is not None:
+                await self.write(hdfs_path, data)
+                print(f"Data written to: {hdfs_path}")
+            else:
+                print("Either local_file_path or data must be provided")
+                return False
+            return True
+        except Exception as exc:
+            print(f"Error creating file: {exc}")
+            return False
+
+    async def read_file(self, hdfs_path, download_to=None):
+        try:
+            content = await self.read(hdfs_path)
+            if download_to:
+                await asyncio.to_thread(_write_bytes, download_to, content)
+                print(f"File downloaded: {hdfs_path} -> {download_to}")
+                return download_to
+            print(f"File read: {hdfs_path}")
+            return content.decode("utf-8")
+        except Exception as exc:
+            print(f"Error reading file: {exc}")
+            return None
+
+    async def update_file(self, hdfs_path, local_file_path=None, data=None):
+        try:
+            if not await self.file_exists(hdfs_path):
+                print(f"File does not exist: {hdfs_path}")
+                return False
+            return await self.create_file(hdfs_path, local_file_path, data)
+        except Exception as exc:
+            print(f"Error updating file: {exc}")
+            return False
+
+    async def delete_file(self, hdfs_path, recursive=False):
+        try:
+            result = await self._json("DELETE", hdfs_path, "DELETE", recursive=recursive)
+            if not result.get("boolean"):
+                print(f"Error deleting file: File does not exist: {hdfs_path}")
+                return False
+            print(f"Deleted: {hdfs_path}")
+            return True
+        except Exception as exc:
+            print(f"Error deleting file: {exc}")
+            return False
+
+    async def list_status(self, hdfs_path="/"):
+        """Return [(name, FileStatus)] for a directory in one LISTSTATUS call."""
+        result = await self._json("GET", hdfs_path, "LISTSTATUS")
+        return [(st["pathSuffix"], st) for st in result["FileStatuses"]["FileStatus"]]
+
+    async def list_files(self, hdfs_path="/"):
+        try:
+            files = [name for name, _ in await self.list_status(hdfs_path)]
+            print(f"Files in {hdfs_path}:")
+            for entry in files:
+                print(f"  - {entry}")
+            return files
+        except Exception as exc:
+            print(f"Error listing files: {exc}")
+            return []
+
+    async def file_exists(self, hdfs_path):
+        try:
+            return await self.status(hdfs_path, strict=False) is not None
+        except Exception:
+            return False
+
+    async def create_directory(self, hdfs_path):
+        try:
+            await self._request("PUT", hdfs_path, "MKDIRS")
+            print(f"Directory created: {hdfs_path}")
+            return True
+        except Exception as exc:
+            print(f"Error creating directory: {exc}")
+            return False
+
+    async def get_file_info(self, hdfs_path):
+        try:
+            info = await self.status(hdfs_path)
+            print(f"File info for {hdfs_path}:")
+            for key, value in info.items():
+                print(f"  {key}: {value}")
+            return info
+        except Exception as exc:
+            print(f"Error getting file info: {exc}")
+            return None
+
+    async def _gather(self, coros):
+        """Run coroutines concurrently; failures come back as exceptions, not raised."""
+        return await asyncio.gather(*coros, return_exceptions=True)
+
+    async def create_files(self, files, overwrite=True):
+        """Write {hdfs_path: data} concurrently; returns {hdfs_path: True | exception}."""
+        paths = list(files)
+        results = await self._gather(self.write(p, files[p], overwrite=overwrite) for p in paths)
+        return {p: True if r is None else r for p, r in zip(paths, results)}
+
+    async def read_files(self, hdfs_paths):
+        """Read files concurrently; returns {hdfs_path: bytes | exception}."""
+        hdfs_paths = list(hdfs_paths)
+        return dict(zip(hdfs_paths, await self._gather(self.read(p) for p in hdfs_paths)))
+
+    async def delete_files(self, hdfs_paths, recursive=False):
+        """Delete paths concurrently; returns {hdfs_path: bool | exception}."""
+        hdfs_paths = list(hdfs_paths)
+        results = await self._gather(self._json("DELETE", p, "DELETE", recursive=recursive) for p in hdfs_paths)
+        return {p: r if isinstance(r, Exception) else bool(r.get("boolean"))
+                for p, r in zip(hdfs_paths, results)}
+
+    async def upload_directory(self, local_dir, hdfs_dir):
+        """Upload every file under local_dir concurrently and report files/sec.
+
+        concurrency workers take files one at a time, so at most that many
+        files are open, and each is streamed rather than read into memory.
+        """
+        files = {}
+        for root, _, names in os.walk(local_dir):
+            for name in names:
+                local_path = os.path.join(root, name)
+                rel = os.path.relpath(local_path, local_dir).replace(os.sep, "/")
+                files[posixpath.join(hdfs_dir, rel)] = local_path
+        start = time.perf_counter()
+
+        pending = iter(files.items())
+        failed = {}
+
+        async def worker():
+            for hdfs_path, local_path in pending:
+                try:
+                    with open(local_path, "rb") as handle:
+                        await self.write(hdfs_path, handle)
+                except Exception as exc:
+                    failed[hdfs_path] = exc
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(files)))))
+        elapsed = time.perf_counter() - start
+        for path, exc in failed.items():
+            print(f"Error uploading {path}: {exc}")
+        print(f"Uploaded {len(files) - len(failed)}/{len(files)} files in {elapsed:.2f}s "
+              f"({len(files) / elapsed if elapsed else 0:.0f} files/s)")
+        return {"files": len(files), "failed": failed, "seconds": elapsed}
+
+
+def _write_bytes(path, data):
+    with open(path, "wb") as handle:
+        handle.write(data)
+
+
+async def _main(argv):
+    if len(argv) != 2:
+        print("Usage: python async_client.py LOCAL_DIR HDFS_DIR")
+        return 1
+    async with AsyncHadoopCRUD() as hadoop:
+        report = await hadoop.upload_directory(argv[0], argv[1])
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
@@ -1,28 +1,262 @@
+import functools
+import json
 import os
-from urllib.parse import urlparse, urlunparse
-
-from hdfs import InsecureClient
+import posixpath
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, quote, urlparse, urlunparse
+
+from hdfs import HdfsError, InsecureClient
 from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError
 
 
-class _RedirectAdapter(HTTPAdapter):
-    """Rewrite unknown hosts (e.g., Docker container IDs) to a fixed target host."""
+def _rewrite_host(url, target_host, allowed_hosts):
+    """Point a URL whose host is not in allowed_hosts at target_host (port kept)."""
+    parsed = urlparse(url)
+    hostname = parsed.hostname
+    if hostname and hostname not in allowed_hosts:
+        netloc = target_host
+        if parsed.port:
+            netloc = f"{target_host}:{parsed.port}"
+        return urlunparse(parsed._replace(netloc=netloc))
+    return url
+
 
-    def __init__(self, target_host, allowed_hosts=None):
-        super().__init__()
+class _RedirectAdapter(HTTPAdapter):
+    """Rewrite unknown hosts (e.g., Docker container IDs) to a fixed target host.
+
+    Every host (the NameNode and each DataNode a redirect points at) gets its
+    own keep-alive pool of pool_maxsize connections; with pool_block=True
+    extra threads wait for a pooled connection instead of opening throwaway
+    ones. Host rewrites are memoised per netloc, and NameNode OPEN redirects
+    are remembered for redirect_ttl seconds so repeated reads of a file go
+    straight to its DataNode. Ranged reads make every offset its own entry, so
+    at most redirect_cache_size redirects are kept (least recently used are
+    dropped, expired ones first). stats() reports how well all of this works.
+    """
+
+    REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+    def __init__(self, target_host=None, allowed_hosts=None, pool_connections=10, pool_maxsize=10,
+                 pool_block=False, redirect_ttl=0, redirect_cache_size=1024):
+        super().__init__(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
         self.target_host = target_host
-        self.allowed_hosts = set(allowed_hosts or ()) | {self.target_host}
+        self.allowed_hosts = set(allowed_hosts or ())
+        if target_host:
+            self.allowed_hosts.add(target_host)
+        self.redirect_ttl = redirect_ttl
+        self.redirect_cache_size = redirect_cache_size
+        self._rewrites = {}
+        self._redirects = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"rewrite_hits": 0, "rewrite_misses": 0, "redirect_cache_hits": 0,
+                          "redirect_cache_misses": 0, "redirects": 0}
+        self._redirect_seconds = []
+
+    def _rewrite(self, url):
+        if not self.target_host:
+            return url
+        netloc = urlparse(url).netloc
+        with self._lock:
+            rewritten = self._rewrites.get(netloc)
+            self._counters["rewrite_hits" if rewritten else "rewrite_misses"] += 1
+        if rewritten is None:
+            rewritten = urlparse(_rewrite_host(url, self.target_host, self.allowed_hosts)).netloc
+            with self._lock:
+                self._rewrites[netloc] = rewritten
+        if rewritten == netloc:
+            return url
+        return urlunparse(urlparse(url)._replace(netloc=rewritten))
+
+    def _is_open(self, request):
+        if self.redirect_ttl <= 0 or request.method != "GET":
+            return False
+        op = parse_qs(urlparse(request.url).query).get("op", [""])[0]
+        return op.upper() == "OPEN"
+
+    def _cached_redirect(self, key):
+        with self._lock:
+            entry = self._redirects.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._counters["redirect_cache_hits"] += 1
+                self._redirects.move_to_end(key)
+                return entry[1]
+            self._redirects.pop(key, None)
+            return None
 
     def send(self, request, **kwargs):
-        parsed = urlparse(request.url)
-        hostname = parsed.hostname
-        if hostname and hostname not in self.allowed_hosts:
-            netloc = self.target_host
-            if parsed.port:
-                netloc = f"{self.target_host}:{parsed.port}"
-            new_url = urlunparse(parsed._replace(netloc=netloc))
-            request.url = new_url
-        return super().send(request, **kwargs)
+        request.url = self._rewrite(request.url)
+        cacheable = self._is_open(request)
+        if cacheable:
+            location = self._cached_redirect(request.url)
+            if location is not None:
+                original = request.url
+                request.url = location
+                try:
+                    response = super().send(request, **kwargs)
+                    if response.status_code == 200:
+                        return response
+                    response.close()
+                except RequestsConnectionError:
+                    pass
+                # The DataNode is gone or no longer serves this path; ask the NameNode again.
+                with self._lock:
+                    self._redirects.pop(original, None)
+                request.url = original
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+        if response.status_code in self.REDIRECT_CODES:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._counters["redirects"] += 1
+                self._redirect_seconds.append(elapsed)
+                del self._redirect_seconds[:-1000]
+            location = response.headers.get("Location")
+            if cacheable and location:
+                location = self._rewrite(location)
+                with self._lock:
+                    self._counters["redirect_cache_misses"] += 1
+                    self._store_redirect(request.url, location)
+        return response
+
+    def _store_redirect(self, key, location):
+        """Cache one redirect; caller holds _lock."""
+        now = time.monotonic()
+        self._redirects[key] = (now + self.redirect_ttl, location)
+        self._redirects.move_to_end(key)
+        # entries share one TTL, so the least recently used are usually the expired ones
+        while self._redirects and next(iter(self._redirects.values()))[0] <= now:
+            self._redirects.popitem(last=False)
+        while len(self._redirects) > self.redirect_cache_size:
+            self._redirects.popitem(last=False)
+
+    def clear_redirects(self):
+        with self._lock:
+            self._redirects.clear()
+
+    def stats(self):
+        """Counters plus, per host, requests sent vs connections opened."""
+        with self._lock:
+            stats = dict(self._counters)
+            latencies = list(self._redirect_seconds)
+        stats["redirect_latency_avg"] = sum(latencies) / len(latencies) if latencies else 0.0
+        stats["redirect_latency_max"] = max(latencies, default=0.0)
+        stats["redirect_cache_entries"] = len(self._redirects)
+        pools = {}
+        manager = self.poolmanager
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is None:
+                continue
+            pools[f"{pool.host}:{pool.port}"] = {
+                "requests": pool.num_requests,
+                "connections": pool.num_connections,
+                "reused": max(pool.num_requests - pool.num_connections, 0),
+                "idle": pool.pool.qsize() if pool.pool is not None else 0,
+            }
+        stats["pools"] = pools
+        return stats
+
+
+class _MetadataCache:
+    """Path-keyed TTL cache for FileStatus objects and directory listings.
+
+    Missing paths are cached too (as None) so repeated existence checks do not
+    hit the NameNode either. Writers call invalidate() for the paths they touch.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, kind, path):
+        """Return (found, value) for a "status" or "list" entry."""
+        with self._lock:
+            entry = self._entries.get((kind, path))
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return True, entry[1]
+            self.misses += 1
+            return False, None
+
+    def put(self, kind, path, value):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[(kind, path)] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, path, recursive=False):
+        """Drop path, its ancestors' entries and, if recursive, everything below it."""
+        prefix = path.rstrip("/") + "/"
+        with self._lock:
+            if recursive:
+                for key in [k for k in self._entries if k[1].startswith(prefix)]:
+                    del self._entries[key]
+            current = path
+            while True:
+                self._entries.pop(("status", current), None)
+                self._entries.pop(("list", current), None)
+                parent = posixpath.dirname(current)
+                if parent == current:
+                    break
+                current = parent
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class _RangedDownload:
+    """State of one file being downloaded as independent byte ranges."""
+
+    def __init__(self, hdfs_path, local_path, length, chunk_size, resume=False):
+        self.hdfs_path = hdfs_path
+        self.local_path = local_path
+        self.length = length
+        self.chunk_size = chunk_size
+        self.part_path = f"{local_path}.part"
+        self.progress_path = f"{local_path}.part.json"
+        self.done = set()
+        self.fetched = 0
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(local_path)), exist_ok=True)
+        if resume and os.path.exists(self.part_path) and os.path.exists(self.progress_path):
+            with open(self.progress_path, encoding="utf-8") as progress:
+                saved = json.load(progress)
+            if saved.get("length") == length and saved.get("chunk_size") == chunk_size:
+                self.done = set(saved["done"])
+        if not self.done:
+            with open(self.part_path, "wb") as part:
+                part.truncate(length)
+
+    def missing_ranges(self):
+        return [offset for offset in range(0, self.length, self.chunk_size) if offset not in self.done]
+
+    def write(self, offset, data):
+        with open(self.part_path, "r+b") as part:
+            part.seek(offset)
+            part.write(data)
+        with self._lock:
+            self.done.add(offset)
+            self.fetched += len(data)
+            with open(self.progress_path, "w", encoding="utf-8") as progress:
+                json.dump({"length": self.length, "chunk_size": self.chunk_size, "done": sorted(self.done)}, progress)
+
+    def finish(self):
+        os.replace(self.part_path, self.local_path)
+        if os.path.exists(self.progress_path):
+            os.remove(self.progress_path)
+        return {"path": self.local_path, "bytes": self.fetched, "resumed_from": self.length - self.fetched,
+                "seconds": time.perf_counter() - self.started}
+
 
 try:
     from dotenv import load_dotenv
@@ -31,25 +265,77 @@ except ImportError:
     pass
 
 
+TIMING_HOOKS = []
+
+
+def add_timing_hook(hook):
+    TIMING_HOOKS.append(hook)
+    return hook
+
+
+def remove_timing_hook(hook):
+    if hook in TIMING_HOOKS:
+        TIMING_HOOKS.remove(hook)
+
+
+def timed(operation):
+    """Pass (operation, seconds, ok) of every call to the registered hooks."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not TIMING_HOOKS:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                elapsed = time.perf_counter() - start
+                for hook in list(TIMING_HOOKS):
+                    try:
+                        hook(operation, elapsed, ok)
+                    except Exception as exc:
+                        print(f"Timing hook failed: {exc}")
+        return wrapper
+    return decorate
+
+
+if os.getenv("HDFS_TIMING_LOG", "false").lower() == "true":
+    add_timing_hook(lambda operation, seconds, ok:
+                    print(f"[timing] {operation} {seconds * 1000:.2f} ms{'' if ok else ' (failed)'}"))
+
+
 class HadoopCRUD:
     """Simple CRUD helper around HDFS using WebHDFS."""
 
-    def __init__(self):
+    def __init__(self, transfer_threads=None, chunk_size=None):
+        self.transfer_threads = transfer_threads or int(os.getenv("HDFS_TRANSFER_THREADS", "4"))
+        self.chunk_size = chunk_size or int(os.getenv("HDFS_CHUNK_SIZE", str(8 * 1024 * 1024)))
         self.hdfs_host = os.getenv("HDFS_HOST", "localhost")
         self.hdfs_port = os.getenv("HDFS_PORT", "9870")
         self.hdfs_user = os.getenv("HDFS_USER", "hdfs")
         self.datanode_host_override = os.getenv("HDFS_DATANODE_HOST")
         self.base_url = f"http://{self.hdfs_host}:{self.hdfs_port}"
         self.client = InsecureClient(self.base_url, user=self.hdfs_user)
+        self.metadata = _MetadataCache(float(os.getenv("HDFS_METADATA_TTL", "30")))
+        self._list_batch_supported = True
         session = self._get_client_session()
-        if self.datanode_host_override and session is not None:
-            adapter = _RedirectAdapter(
+        self.adapter = None
+        if session is not None:
+            self.adapter = _RedirectAdapter(
                 target_host=self.datanode_host_override,
                 allowed_hosts={self.hdfs_host, self.datanode_host_override},
+                pool_connections=int(os.getenv("HDFS_POOL_HOSTS", "10")),
+                pool_maxsize=int(os.getenv("HDFS_POOL_SIZE", str(max(10, self.transfer_threads)))),
+                pool_block=os.getenv("HDFS_POOL_BLOCK", "true").lower() == "true",
+                redirect_ttl=float(os.getenv("HDFS_REDIRECT_TTL", "60")),
+                redirect_cache_size=int(os.getenv("HDFS_REDIRECT_CACHE_SIZE", "1024")),
             )
             # Ensure both HTTP and HTTPS requests reuse the same override logic.
-            session.mount("http://", adapter)
-            session.mount("https://", adapter)
+            session.mount("http://", self.adapter)
+            session.mount("https://", self.adapter)
         print(f"Connected to HDFS at {self.base_url} as {self.hdfs_user}")
 
     def _get_client_session(self):
@@ -58,10 +344,12 @@ class HadoopCRUD:
             session = getattr(self.client, "_session", None)
         return session
 
-    def create_file(self, hdfs_path, local_file_path=None, data=None):
+    @timed("create_file")
+    def create_file(self, hdfs_path, local_file_path=None, data=None, resume=False):
+        self.metadata.invalidate(self.client.resolve(hdfs_path), recursive=True)
         try:
             if local_file_path:
-                self.client.upload(hdfs_path, local_file_path, overwrite=True)
+                self.upload(local_file_path, hdfs_path, resume=resume)
                 print(f"File uploaded: {local_file_path} -> {hdfs_path}")
             elif data is not None:
                 with self.client.write(hdfs_path, encoding="utf-8", overwrite=True) as writer:
@@ -75,10 +363,11 @@ class HadoopCRUD:
             print(f"Error creating file: {exc}")
             return False
 
-    def read_file(self, hdfs_path, download_to=None):
+    @timed("read_file")
+    def read_file(self, hdfs_path, download_to=None, resume=False):
         try:
             if download_to:
-                self.client.download(hdfs_path, download_to, overwrite=True)
+                self.download(hdfs_path, download_to, resume=resume)
                 print(f"File downloaded: {hdfs_path} -> {download_to}")
                 return download_to
             with self.client.read(hdfs_path, encoding="utf-8") as reader:
@@ -89,6 +378,178 @@ class HadoopCRUD:
             print(f"Error reading file: {exc}")
             return None
 
+    def iter_chunks(self, hdfs_path, chunk_size=None, offset=0, length=None):
+        """Yield the file (or the given byte range) as bytes chunks.
+
+        Only one chunk is held in memory at a time, whatever the file size.
+        """
+        chunk_size = chunk_size or self.chunk_size
+        with self.client.read(hdfs_path, offset=offset, length=length, chunk_size=chunk_size) as reader:
+            for chunk in reader:
+                if chunk:
+                    yield chunk
+
+    def iter_lines(self, hdfs_path, encoding="utf-8", chunk_size=None):
+        """Yield decoded lines (without the trailing newline) from a text file."""
+        pending = b""
+        for chunk in self.iter_chunks(hdfs_path, chunk_size=chunk_size):
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                yield line.decode(encoding)
+        if pending:
+            yield pending.decode(encoding)
+
+    @timed("read_range")
+    def read_range(self, hdfs_path, offset, length=None):
+        """Return length bytes starting at offset using a WebHDFS ranged OPEN.
+
+        A negative offset counts from the end of the file, so
+        ``read_range(path, -4096)`` fetches only the last 4 KiB.
+        """
+        try:
+            if offset < 0:
+                size = self.client.status(hdfs_path)["length"]
+                offset = max(0, size + offset)
+            with self.client.read(hdfs_path, offset=offset, length=length) as reader:
+                return reader.read()
+        except Exception as exc:
+            print(f"Error reading range: {exc}")
+            return None
+
+    def tail(self, hdfs_path, nbytes=4096, encoding="utf-8"):
+        """Return the last nbytes of a file decoded as text."""
+        data = self.read_range(hdfs_path, -nbytes)
+        if data is None:
+            return None
+        return data.decode(encoding, errors="replace")
+
+    @timed("upload")
+    def upload(self, local_path, hdfs_path, resume=False):
+        """Upload a file or directory tree, several files at a time.
+
+        HDFS files have a single writer, so a file is streamed in chunk_size
+        pieces by one thread; directories are spread over transfer_threads.
+        With resume=True a remote file shorter than the local one is completed
+        by appending the missing tail instead of being uploaded again.
+
+        As with InsecureClient.upload, an existing remote directory receives
+        the upload inside it, and a (non-resumed) upload over an existing path
+        goes to a temporary path that is renamed into place once complete, so
+        a failed upload leaves the old content untouched.
+        """
+        start = time.perf_counter()
+        target = self.client.resolve(hdfs_path)
+        status = self.client.status(target, strict=False)
+        if status is not None and status["type"] == "DIRECTORY":
+            target = posixpath.join(target, os.path.basename(os.path.normpath(local_path)))
+            status = self.client.status(target, strict=False)
+        destination = target
+        if status is not None and not resume:
+            parent, name = posixpath.split(target)
+            destination = posixpath.join(parent, f"{name}.temp-{int(time.time() * 1e6)}")
+        self.metadata.invalidate(target, recursive=True)
+        if os.path.isdir(local_path):
+            jobs = []
+            for root, _, names in os.walk(local_path):
+                for name in names:
+                    src = os.path.join(root, name)
+                    rel = os.path.relpath(src, local_path).replace(os.sep, "/")
+                    jobs.append((src, posixpath.join(destination, rel)))
+        else:
+            jobs = [(local_path, destination)]
+        try:
+            with ThreadPoolExecutor(max_workers=self.transfer_threads) as pool:
+                results = list(pool.map(lambda job: self._upload_one(*job, resume=resume), jobs))
+        except Exception:
+            if not resume:
+                try:
+                    self.client.delete(destination, recursive=True)
+                except Exception as exc:
+                    print(f"Could not remove partial upload {destination}: {exc}")
+            raise
+        finally:
+            self.metadata.invalidate(target, recursive=True)
+        if destination != target:
+            self.client.delete(target, recursive=True)
+            self.client.rename(destination, target)
+            for result in results:
+                result["path"] = target + result["path"][len(destination):]
+        return self._transfer_report("Uploaded", results, start)
+
+    def _upload_one(self, local_path, hdfs_path, resume=False):
+        start = time.perf_counter()
+        size = os.path.getsize(local_path)
+        offset = 0
+        if resume:
+            status = self.client.status(hdfs_path, strict=False)
+            if status and status["type"] == "FILE" and status["length"] <= size:
+                offset = status["length"]
+        with open(local_path, "rb") as reader:
+            reader.seek(offset)
+            chunks = iter(lambda: reader.read(self.chunk_size), b"")
+            if offset == 0:
+                self.client.write(hdfs_path, data=chunks, overwrite=True)
+            elif offset < size:
+                self.client.write(hdfs_path, data=chunks, append=True)
+        return {"path": hdfs_path, "bytes": size - offset, "resumed_from": offset,
+                "seconds": time.perf_counter() - start}
+
+    @timed("download")
+    def download(self, hdfs_path, local_path, resume=False):
+        """Download a file or directory tree using parallel ranged reads.
+
+        Every file is split into chunk_size byte ranges and all ranges of all
+        files are fetched by transfer_threads workers. Data is written to
+        ``<file>.part``; finished ranges are recorded in ``<file>.part.json`` so
+        that resume=True only fetches the ranges that are still missing.
+        """
+        start = time.perf_counter()
+        status = self.client.status(hdfs_path)
+        if status["type"] == "DIRECTORY":
+            files = []
+            base = self.client.resolve(hdfs_path)
+            for root, _, names in self.walk(base):
+                for name, file_status in names:
+                    src = posixpath.join(root, name)
+                    rel = posixpath.relpath(src, base)
+                    files.append((src, os.path.join(local_path, *rel.split("/")), file_status["length"]))
+        else:
+            if os.path.isdir(local_path):
+                local_path = os.path.join(local_path, posixpath.basename(hdfs_path))
+            files = [(hdfs_path, local_path, status["length"])]
+
+        transfers = [_RangedDownload(src, dst, length, self.chunk_size, resume) for src, dst, length in files]
+        tasks = [(t, offset) for t in transfers for offset in t.missing_ranges()]
+        with ThreadPoolExecutor(max_workers=self.transfer_threads) as pool:
+            for future in [pool.submit(self._download_range, t, offset) for t, offset in tasks]:
+                future.result()
+        results = [t.finish() for t in transfers]
+        return self._transfer_report("Downloaded", results, start)
+
+    def _download_range(self, transfer, offset):
+        length = min(self.chunk_size, transfer.length - offset)
+        with self.client.read(transfer.hdfs_path, offset=offset, length=length) as reader:
+            data = reader.read()
+        transfer.write(offset, data)
+
+    def _transfer_report(self, verb, results, start):
+        elapsed = time.perf_counter() - start
+        total = sum(r["bytes"] for r in results)
+        report = {
+            "files": results,
+            "bytes": total,
+            "seconds": elapsed,
+            "bytes_per_sec": total / elapsed if elapsed > 0 else 0.0,
+        }
+        for result in results:
+            rate = result["bytes"] / result["seconds"] if result["seconds"] > 0 else 0.0
+            print(f"  {result['path']}: {result['bytes']} bytes in {result['seconds']:.2f}s ({rate / 1e6:.1f} MB/s)")
+        print(f"{verb} {len(results)} file(s), {total} bytes in {elapsed:.2f}s "
+              f"({report['bytes_per_sec'] / 1e6:.1f} MB/s)")
+        return report
+
+    @timed("update_file")
     def update_file(self, hdfs_path, local_file_path=None, data=None):
         try:
             if not self.file_exists(hdfs_path):
@@ -99,7 +560,9 @@ class HadoopCRUD:
             print(f"Error updating file: {exc}")
             return False
 
+    @timed("delete_file")
     def delete_file(self, hdfs_path, recursive=False):
+        self.metadata.invalidate(self.client.resolve(hdfs_path), recursive=True)
         try:
             self.client.delete(hdfs_path, recursive=recursive)
             print(f"Deleted: {hdfs_path}")
@@ -108,9 +571,10 @@ class HadoopCRUD:
             print(f"Error deleting file: {exc}")
             return False
 
+    @timed("list_files")
     def list_files(self, hdfs_path="/"):
         try:
-            files = self.client.list(hdfs_path)
+            files = [name for name, _ in self._listing(hdfs_path)]
             print(f"Files in {hdfs_path}:")
             for entry in files:
                 print(f"  - {entry}")
@@ -121,12 +585,96 @@ class HadoopCRUD:
 
     def file_exists(self, hdfs_path):
         try:
-            status = self.client.status(hdfs_path, strict=False)
-            return status is not None
+            return self._status(hdfs_path) is not None
         except Exception:
             return False
 
+    def _status(self, hdfs_path):
+        """FileStatus of a path (None if missing), served from the metadata cache."""
+        path = self.client.resolve(hdfs_path)
+        found, status = self.metadata.get("status", path)
+        if not found:
+            # strict=False would also turn permission and server errors into None
+            try:
+                status = self.client.status(path)
+            except HdfsError as exc:
+                if exc.exception != "FileNotFoundException":
+                    raise
+                status = None
+            self.metadata.put("status", path, status)
+        return status
+
+    def _listing(self, hdfs_path, fresh=False):
+        """[(name, FileStatus)] of a directory: one cached listing per directory.
+
+        fresh=True always asks the NameNode (and refreshes the cache), for
+        callers that must not miss files written by other clients.
+        """
+        path = self.client.resolve(hdfs_path)
+        found, entries = (False, None) if fresh else self.metadata.get("list", path)
+        if not found:
+            entries = list(self._list_directory(path))
+            self.metadata.put("list", path, entries)
+            for name, status in entries:
+                self.metadata.put("status", posixpath.join(path, name), status)
+        return entries
+
+    def _list_directory(self, path):
+        """Yield (name, FileStatus), paging with LISTSTATUS_BATCH when available.
+
+        LISTSTATUS_BATCH returns large directories in NameNode-sized pages
+        instead of one huge response; clusters without it (Hadoop < 2.8) fall
+        back to a single LISTSTATUS.
+        """
+        session = self._get_client_session()
+        if self._list_batch_supported and session is not None:
+            url = f"{self.base_url}/webhdfs/v1{quote(path)}"
+            params = {"op": "LISTSTATUS_BATCH", "user.name": self.hdfs_user}
+            while True:
+                response = session.get(url, params=params, timeout=getattr(self.client, "_timeout", None))
+                if response.status_code in (400, 501) and "startAfter" not in params:
+                    self._list_batch_supported = False
+                    break
+                response.raise_for_status()
+                listing = response.json()["DirectoryListing"]
+                statuses = listing["partialListing"]["FileStatuses"]["FileStatus"]
+                for status in statuses:
+                    yield status["pathSuffix"], status
+                if not listing.get("remainingEntries") or not statuses:
+                    return
+                params["startAfter"] = statuses[-1]["pathSuffix"]
+        yield from self.client.list(path, status=True)
+
+    def list_status(self, hdfs_path="/", recursive=False):
+        """Return [(path, FileStatus)] for a directory's entries, optionally recursively."""
+        if not recursive:
+            base = self.client.resolve(hdfs_path)
+            return [(posixpath.join(base, name), status) for name, status in self._listing(hdfs_path)]
+        results = []
+        for root, dirs, files in self.walk(hdfs_path):
+            results.extend((posixpath.join(root, name), status) for name, status in dirs + files)
+        return results
+
+    def walk(self, hdfs_path="/", fresh=True):
+        """Top-down walk yielding (dirpath, [(name, status)] dirs, [(name, status)] files).
+
+        Each directory costs one listing call, which returns names and
+        FileStatus together; no per-entry status requests are made. Listings
+        are fetched fresh unless fresh=False, so recursive listings and
+        downloads see every file that exists when the walk reaches it.
+        """
+        pending = [self.client.resolve(hdfs_path)]
+        while pending:
+            root = pending.pop()
+            entries = self._listing(root, fresh)
+            dirs = [(n, st) for n, st in entries if st["type"] == "DIRECTORY"]
+            files = [(n, st) for n, st in entries if st["type"] != "DIRECTORY"]
+            yield root, dirs, files
+            pending.extend(posixpath.join(root, n) for n, _ in reversed(dirs))
+
+    @timed("create_directory")
     def create_directory(self, hdfs_path):
+        self.metadata.invalidate(self.client.resolve(hdfs_path))
         try:
             self.client.makedirs(hdfs_path)
             print(f"Directory created: {hdfs_path}")
@@ -135,9 +683,17 @@ class HadoopCRUD:
             print(f"Error creating directory: {exc}")
             return False
 
+    def connection_stats(self):
+        """Connection reuse and redirect statistics from the session adapter."""
+        return self.adapter.stats() if self.adapter is not None else {}
+
+    @timed("get_file_info")
     def get_file_info(self, hdfs_path):
         try:
-            info = self.client.status(hdfs_path)
+            info = self._status(hdfs_path)
+            if info is None:
+                print(f"Error getting file info: File does not exist: {hdfs_path}")
+                return None
             print(f"File info for {hdfs_path}:")
             for key, value in info.items():
                 print(f"  {key}: {value}")
@@ -146,6 +702,78 @@ class HadoopCRUD:
             print(f"Error getting file info: {exc}")
             return None
 
+    def _run_many(self, operation, paths, workers=None):
+        """Apply operation to every path on a bounded pool; never prints or raises.
+
+        Returns one {"path", "ok", "result", "error", "seconds"} dict per path,
+        in input order.
+        """
+        def run(path):
+            start = time.perf_counter()
+            try:
+                result, error = operation(path), None
+            except Exception as exc:
+                result, error = None, str(exc)
+            return {"path": path, "ok": error is None, "result": result, "error": error,
+                    "seconds": time.perf_counter() - start}
+
+        paths = list(paths)
+        with ThreadPoolExecutor(max_workers=workers or self.transfer_threads) as pool:
+            return list(pool.map(run, paths))
+
+    def delete_many(self, hdfs_paths, recursive=False, workers=None):
+        """Delete many paths concurrently; result is True if the path existed."""
+        def delete(path):
+            self.metadata.invalidate(self.client.resolve(path), recursive=True)
+            return self.client.delete(path, recursive=recursive)
+        return self._run_many(delete, hdfs_paths, workers)
+
+    def makedirs_many(self, hdfs_paths, dedupe=True, workers=None):
+        """Create many directories concurrently.
+
+        MKDIRS creates missing parents, so with dedupe=True a path that is an
+        ancestor of (or equal to) another requested path is not sent at all:
+        each prefix is created exactly once, by its deepest descendant's call.
+        Skipped paths get the result of the call that covered them.
+        """
+        hdfs_paths = list(hdfs_paths)
+        resolved = {path: self.client.resolve(path).rstrip("/") or "/" for path in hdfs_paths}
+        targets = sorted(set(resolved.values()))
+        if dedupe:
+            # Descendants of t sort together from "t/" on; the entry right
+            # after t may be a sibling such as "t.bak", so search for "t/"
+            # (past t itself, which equals the prefix for the root).
+            def covered(t):
+                prefix = t.rstrip("/") + "/"
+                i = bisect_left(targets, prefix, bisect_right(targets, t))
+                return i < len(targets) and targets[i].startswith(prefix)
+            targets = [t for t in targets if not covered(t)]
+
+        def makedirs(path):
+            self.metadata.invalidate(path)
+            self.client.makedirs(path)
+            return True
+        done = {entry["path"]: entry for entry in self._run_many(makedirs, targets, workers)}
+        results = []
+        for path in hdfs_paths:
+            target = resolved[path]
+            # targets is sorted, so the first entry after "<target>/" is a descendant.
+            covering = done.get(target) or done[targets[bisect_left(targets, target.rstrip("/") + "/")]]
+            results.append(dict(covering, path=path, seconds=covering["seconds"] if target in done else 0.0))
+        return results
+
+    def status_many(self, hdfs_paths, workers=None):
+        """FileStatus (None if missing) of many paths, concurrently and via the metadata cache."""
+        return self._run_many(self._status, hdfs_paths, workers)
+
+    def exists_many(self, hdfs_paths, workers=None):
+        """Existence of many paths; result is True/False per path."""
+        results = self.status_many(hdfs_paths, workers)
+        for entry in results:
+            if entry["ok"]:
+                entry["result"] = entry["result"] is not None
+        return results
+
 
 def main():
     print("Hadoop HDFS CRUD Operations")
@@ -159,7 +787,8 @@ def main():
         "5": "List Files",
         "6": "Create Directory",
         "7": "Get File Info",
-        "8": "Exit",
+        "8": "Walk Directory",
+        "9": "Exit",
     }
 
     while True:
@@ -181,12 +810,19 @@ def main():
 
         elif choice == "2":
             hdfs_path = input("HDFS path: ").strip()
-            method = input("Download (1) or view (2): ").strip()
+            method = input("Download (1), view (2) or tail (3): ").strip()
             if method == "1":
                 local_path = input("Local path: ").strip()
                 hadoop.read_file(hdfs_path, download_to=local_path)
             elif method == "2":
-                content = hadoop.read_file(hdfs_path)
+                try:
+                    for line in hadoop.iter_lines(hdfs_path):
+                        print(line)
+                except Exception as exc:
+                    print(f"Error reading file: {exc}")
+            elif method == "3":
+                nbytes = input("Bytes from end (default 4096): ").strip()
+                content = hadoop.tail(hdfs_path, int(nbytes) if nbytes.isdigit() else 4096)
                 if content is not None:
                     print(content)
             else:
@@ -222,6 +858,15 @@ def main():
             hadoop.get_file_info(hdfs_path)
 
         elif choice == "8":
+            hdfs_path = input("Directory path (default /): ").strip() or "/"
+            try:
+                for path, status in hadoop.list_status(hdfs_path, recursive=True):
+                    kind = "d" if status["type"] == "DIRECTORY" else "-"
+                    print(f"  {kind} {status['length']:>12} {path}")
+            except Exception as exc:
+                print(f"Error walking directory: {exc}")
+
+        elif choice == "9":
             print("Goodbye")
             break
 
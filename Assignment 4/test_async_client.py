@@ -0,0 +1,130 @@
+import asyncio
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, PROJECT_DIR)
+# the in-memory WebHDFS server shared with the benchmarks
+sys.path.insert(0, os.path.join(PROJECT_DIR, '..', 'benchmarks'))
+
+from hdfs import HdfsError  # noqa: E402
+
+from async_client import AsyncHadoopCRUD  # noqa: E402
+from fake_webhdfs import serve  # noqa: E402
+
+
+class TestAsyncHadoopCRUD(unittest.TestCase):
+    def setUp(self):
+        # redirects point at an unresolvable DataNode name, as inside Docker
+        self.server, self.fs, port = serve(datanode_host='datanode.invalid')
+        self.base_url = f'http://127.0.0.1:{port}'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def run_client(self, scenario, **kwargs):
+        async def run():
+            async with AsyncHadoopCRUD(self.base_url, user='hdfs', datanode_host='127.0.0.1',
+                                       **kwargs) as hadoop:
+                return await scenario(hadoop)
+
+        with redirect_stdout(io.StringIO()):
+            return asyncio.run(run())
+
+    def test_batch_create_read_delete_through_redirects(self):
+        files = {f'/data/f{i}.txt': f'payload {i}' for i in range(50)}
+
+        async def scenario(hadoop):
+            created = await hadoop.create_files(files)
+            read = await hadoop.read_files(files)
+            listed = await hadoop.list_files('/data')
+            deleted = await hadoop.delete_files(files)
+            return created, read, listed, deleted
+
+        created, read, listed, deleted = self.run_client(scenario, concurrency=8)
+        self.assertTrue(all(result is True for result in created.values()))
+        self.assertEqual({p: data.decode() for p, data in read.items()}, files)
+        self.assertEqual(len(listed), 50)
+        self.assertTrue(all(deleted.values()))
+        self.assertEqual(self.fs.files, {})
+        # every CREATE and OPEN went NameNode -> DataNode
+        self.assertEqual(self.fs.calls['CREATE'], 100)
+        self.assertEqual(self.fs.calls['OPEN'], 100)
+
+    def test_crud_and_ranged_read(self):
+        async def scenario(hadoop):
+            await hadoop.create_directory('/docs')
+            ok = await hadoop.create_file('/docs/a.txt', data='hello world')
+            updated = await hadoop.update_file('/docs/a.txt', data='HELLO world')
+            missing = await hadoop.update_file('/docs/none.txt', data='x')
+            part = await hadoop.read('/docs/a.txt', offset=6, length=5)
+            content = await hadoop.read_file('/docs/a.txt')
+            info = await hadoop.get_file_info('/docs/a.txt')
+            return ok, updated, missing, part, content, info
+
+        ok, updated, missing, part, content, info = self.run_client(scenario)
+        self.assertEqual((ok, updated, missing), (True, True, False))
+        self.assertEqual(part, b'world')
+        self.assertEqual(content, 'HELLO world')
+        self.assertEqual((info['type'], info['length']), ('FILE', 11))
+
+    def test_status_only_maps_missing_files_to_none(self):
+        self.fs.files['/secret.txt'] = b'x'
+        self.fs.denied.add('/secret.txt')
+
+        async def scenario(hadoop):
+            missing = await hadoop.status('/nope.txt', strict=False)
+            try:
+                await hadoop.status('/secret.txt', strict=False)
+            except HdfsError as exc:
+                return missing, exc
+            return missing, None
+
+        missing, error = self.run_client(scenario)
+        self.assertIsNone(missing)
+        self.assertIsInstance(error, HdfsError)
+        self.assertEqual(error.exception, 'AccessControlException')
+
+    def test_upload_directory_streams_with_bounded_concurrency(self):
+        local = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, local)
+        os.makedirs(os.path.join(local, 'sub'))
+        expected = {}
+        for i in range(20):
+            rel = f'sub/f{i}.bin' if i % 2 else f'f{i}.bin'
+            with open(os.path.join(local, *rel.split('/')), 'wb') as f:
+                f.write(bytes([i]) * 1000)
+            expected[f'/up/{rel}'] = bytes([i]) * 1000
+        in_flight, peak, bodies = [0], [0], []
+
+        async def scenario(hadoop):
+            write = hadoop.write
+
+            async def tracking_write(hdfs_path, data, **kwargs):
+                bodies.append(data)
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+                try:
+                    return await write(hdfs_path, data, **kwargs)
+                finally:
+                    in_flight[0] -= 1
+
+            hadoop.write = tracking_write
+            return await hadoop.upload_directory(local, '/up')
+
+        report = self.run_client(scenario, concurrency=3)
+        self.assertEqual((report['files'], report['failed']), (20, {}))
+        self.assertEqual(self.fs.files, expected)
+        self.assertEqual(peak[0], 3)
+        # file objects are streamed, not read into bytes first
+        self.assertFalse(any(isinstance(body, bytes) for body in bodies))
+
+
+if __name__ == '__main__':
+    unittest.main()
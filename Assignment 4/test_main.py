@@ -0,0 +1,221 @@
+import importlib.util
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+# the in-memory WebHDFS server shared with the benchmarks
+sys.path.insert(0, os.path.join(PROJECT_DIR, '..', 'benchmarks'))
+
+from fake_webhdfs import serve  # noqa: E402
+
+
+def load_main():
+    spec = importlib.util.spec_from_file_location('hadoop_main', os.path.join(PROJECT_DIR, 'main.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestHadoopCRUD(unittest.TestCase):
+    def setUp(self):
+        self.server, self.fs, port = serve()
+        self.env = {k: os.environ.get(k) for k in ('HDFS_HOST', 'HDFS_PORT', 'HDFS_USER', 'HDFS_DATANODE_HOST')}
+        os.environ.update({'HDFS_HOST': '127.0.0.1', 'HDFS_PORT': str(port), 'HDFS_USER': 'hdfs'})
+        os.environ.pop('HDFS_DATANODE_HOST', None)
+        self.main = load_main()
+        with redirect_stdout(io.StringIO()):
+            self.crud = self.main.HadoopCRUD(chunk_size=4)
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        for key, value in self.env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        shutil.rmtree(self.tmpdir)
+
+    def _local(self, name, data):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_upload_into_existing_directory(self):
+        self.fs.mkdirs('/d')
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(self.crud.create_file('/d', local_file_path=self._local('x.txt', b'hello world')))
+        self.assertIn('/d', self.fs.dirs)
+        self.assertEqual(self.fs.files['/d/x.txt'], b'hello world')
+
+    def test_upload_replaces_existing_file_via_temp_and_rename(self):
+        self.fs.files['/data.txt'] = b'old content'
+        with redirect_stdout(io.StringIO()):
+            report = self.crud.upload(self._local('data.txt', b'new content!'), '/data.txt')
+        self.assertEqual(self.fs.files['/data.txt'], b'new content!')
+        self.assertEqual(report['files'][0]['path'], '/data.txt')
+        self.assertEqual(self.fs.calls['RENAME'], 1)
+        self.assertEqual(sorted(self.fs.files), ['/data.txt'])
+
+    def test_failed_upload_keeps_old_content(self):
+        self.fs.files['/data.txt'] = b'old content'
+        original = self.crud.client.write
+        written = []
+
+        def failing_write(hdfs_path, data=None, **kwargs):
+            written.append(hdfs_path)
+
+            def chunks():
+                yield next(iter(data))
+                raise IOError('connection lost')
+            return original(hdfs_path, data=chunks(), **kwargs)
+
+        self.crud.client.write = failing_write
+        with redirect_stdout(io.StringIO()), self.assertRaises(Exception):
+            self.crud.upload(self._local('data.txt', b'new content!'), '/data.txt')
+        # real HDFS truncates a file opened for overwrite, so it must not be the target
+        self.assertTrue(written[0].startswith('/data.txt.temp-'))
+        self.assertEqual(self.fs.files['/data.txt'], b'old content')
+        self.assertEqual(sorted(self.fs.files), ['/data.txt'])
+
+    def test_ranged_download_keeps_redirect_cache_bounded(self):
+        self.fs.files['/big.bin'] = bytes(range(256)) * 4
+        self.crud.adapter.redirect_cache_size = 8
+        with redirect_stdout(io.StringIO()):
+            self.crud.download('/big.bin', os.path.join(self.tmpdir, 'big.bin'))
+        with open(os.path.join(self.tmpdir, 'big.bin'), 'rb') as f:
+            self.assertEqual(f.read(), self.fs.files['/big.bin'])
+        # 256 chunks, each its own OPEN redirect
+        self.assertEqual(self.crud.adapter.stats()['redirect_cache_misses'], 256)
+        self.assertEqual(self.crud.adapter.stats()['redirect_cache_entries'], 8)
+
+    def test_resume_appends_missing_tail(self):
+        self.fs.files['/big.bin'] = b'0123'
+        with redirect_stdout(io.StringIO()):
+            report = self.crud.upload(self._local('big.bin', b'0123456789'), '/big.bin', resume=True)
+        self.assertEqual(self.fs.files['/big.bin'], b'0123456789')
+        self.assertEqual(report['files'][0]['resumed_from'], 4)
+
+    def test_makedirs_many_sends_each_leaf_once(self):
+        paths = ['/a', '/a.bak', '/a/b', '/x/y', '/x', '/a/b']
+        results = self.crud.makedirs_many(paths)
+        self.assertEqual(self.fs.calls['MKDIRS'], 3)
+        self.assertTrue({'/a', '/a.bak', '/a/b', '/x', '/x/y'} <= self.fs.dirs)
+        self.assertEqual([r['path'] for r in results], paths)
+        self.assertTrue(all(r['ok'] and r['result'] for r in results))
+
+    def test_makedirs_many_without_dedupe_and_for_root(self):
+        self.crud.makedirs_many(['/r', '/r/s'], dedupe=False)
+        self.assertEqual(self.fs.calls['MKDIRS'], 2)
+        self.assertTrue(self.crud.makedirs_many(['/'])[0]['ok'])
+        self.assertEqual(self.fs.calls['MKDIRS'], 3)
+
+    def test_delete_many(self):
+        self.fs.files.update({'/d/one': b'1', '/d/two': b'2'})
+        self.fs.mkdirs('/d')
+        results = self.crud.delete_many(['/d/one', '/d/missing', '/d/two'])
+        self.assertEqual([(r['path'], r['ok'], r['result']) for r in results],
+                         [('/d/one', True, True), ('/d/missing', True, False), ('/d/two', True, True)])
+        self.assertEqual(self.fs.files, {})
+        self.assertEqual(self.fs.calls['DELETE'], 3)
+
+    def test_status_and_exists_many(self):
+        self.fs.files['/f'] = b'abc'
+        self.fs.denied.add('/secret')
+        results = self.crud.status_many(['/f', '/missing', '/secret'])
+        self.assertEqual(results[0]['result']['length'], 3)
+        self.assertIsNone(results[1]['result'])
+        self.assertFalse(results[2]['ok'])
+        self.assertIn('Permission denied', results[2]['error'])
+        calls = self.fs.calls['GETFILESTATUS']
+        exists = self.crud.exists_many(['/f', '/missing', '/secret'])
+        self.assertEqual([(r['ok'], r['result']) for r in exists], [(True, True), (True, False), (False, None)])
+        # the two successful answers, including the missing path, came from the metadata cache
+        self.assertEqual(self.fs.calls['GETFILESTATUS'], calls + 1)
+
+    def _tree(self):
+        for path in ('/t/a.txt', '/t/b.txt', '/t/c.txt', '/t/sub/d.txt', '/t/sub/deep/e.txt'):
+            self.fs.files[path] = path.encode()
+            self.fs.mkdirs(os.path.dirname(path))
+
+    def test_listing_pages_and_is_cached(self):
+        self._tree()
+        with redirect_stdout(io.StringIO()):
+            names = self.crud.list_files('/t')
+            self.assertEqual(self.crud.list_files('/t'), names)
+        self.assertEqual(names, ['a.txt', 'b.txt', 'c.txt', 'sub'])
+        # the fake server pages two entries at a time; the second listing is cached
+        self.assertEqual(self.fs.calls['LISTSTATUS_BATCH'], 2)
+        self.assertEqual(self.fs.calls['LISTSTATUS'], 0)
+        self.assertEqual(self.crud._status('/t/a.txt')['length'], 8)
+        self.assertEqual(self.fs.calls['GETFILESTATUS'], 0)
+
+    def test_listing_falls_back_to_liststatus(self):
+        self._tree()
+        self.fs.batch_listing = False
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(self.crud.list_files('/t'), ['a.txt', 'b.txt', 'c.txt', 'sub'])
+        self.assertEqual(self.fs.calls['LISTSTATUS'], 1)
+        self.crud.list_status('/t/sub')
+        # the unsupported operation is not tried again
+        self.assertEqual(self.fs.calls['LISTSTATUS_BATCH'], 1)
+        self.assertEqual(self.fs.calls['LISTSTATUS'], 2)
+
+    def test_walk_and_recursive_list_status(self):
+        self._tree()
+        walked = [(root, [n for n, _ in dirs], [n for n, _ in files]) for root, dirs, files in self.crud.walk('/t')]
+        self.assertEqual(walked, [('/t', ['sub'], ['a.txt', 'b.txt', 'c.txt']),
+                                  ('/t/sub', ['deep'], ['d.txt']),
+                                  ('/t/sub/deep', [], ['e.txt'])])
+        paths = [path for path, _ in self.crud.list_status('/t', recursive=True)]
+        self.assertEqual(sorted(paths), ['/t/a.txt', '/t/b.txt', '/t/c.txt', '/t/sub', '/t/sub/d.txt',
+                                         '/t/sub/deep', '/t/sub/deep/e.txt'])
+
+    def test_download_sees_files_written_after_a_cached_listing(self):
+        self._tree()
+        with redirect_stdout(io.StringIO()):
+            self.crud.list_files('/t')
+            # another client adds a file while the listing is still cached
+            self.fs.files['/t/new.txt'] = b'late'
+            self.crud.download('/t', os.path.join(self.tmpdir, 'out'))
+        with open(os.path.join(self.tmpdir, 'out', 'new.txt'), 'rb') as f:
+            self.assertEqual(f.read(), b'late')
+        with open(os.path.join(self.tmpdir, 'out', 'sub', 'deep', 'e.txt'), 'rb') as f:
+            self.assertEqual(f.read(), b'/t/sub/deep/e.txt')
+
+    def test_iter_chunks_splits_at_chunk_size(self):
+        self.fs.files['/n.txt'] = b'0123456789'
+        self.assertEqual(list(self.crud.iter_chunks('/n.txt')), [b'0123', b'4567', b'89'])
+        self.assertEqual(list(self.crud.iter_chunks('/n.txt', chunk_size=5)), [b'01234', b'56789'])
+        self.assertEqual(b''.join(self.crud.iter_chunks('/n.txt', offset=2, length=5)), b'23456')
+        self.assertEqual(list(self.crud.iter_chunks('/n.txt', offset=10)), [])
+
+    def test_iter_lines_joins_lines_across_chunks(self):
+        self.fs.files['/l.txt'] = 'alpha\nbeta gamma\n\nhé wörld\nlast'.encode()
+        self.assertEqual(list(self.crud.iter_lines('/l.txt', chunk_size=3)),
+                         ['alpha', 'beta gamma', '', 'hé wörld', 'last'])
+        self.fs.files['/t.txt'] = b'one\ntwo\n'
+        self.assertEqual(list(self.crud.iter_lines('/t.txt')), ['one', 'two'])
+
+    def test_read_range_and_tail(self):
+        self.fs.files['/r.txt'] = b'0123456789'
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(self.crud.read_range('/r.txt', 3, 4), b'3456')
+            self.assertEqual(self.crud.read_range('/r.txt', 8, 10), b'89')
+            self.assertEqual(self.crud.read_range('/r.txt', 20), b'')
+            self.assertEqual(self.crud.read_range('/r.txt', -3), b'789')
+            self.assertEqual(self.crud.tail('/r.txt', 4), '6789')
+            # shorter than the requested size: the whole file
+            self.assertEqual(self.crud.tail('/r.txt', 100), '0123456789')
+            self.assertIsNone(self.crud.tail('/missing.txt'))
+
+
+if __name__ == '__main__':
+    unittest.main()
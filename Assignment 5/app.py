@@ -1,8 +1,19 @@
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pandas.api.types import union_categoricals
 import os
 import json
+import argparse
+import atexit
+import functools
+import itertools
 import logging
-import tempfile
+import shutil
+import threading
+import time
 
 try:
     # hdfs client for WebHDFS (optional)
@@ -24,141 +35,1261 @@ HDFS_DIR = os.environ.get('HDFS_DIR', f"/user/{HDFS_USER}")
 HDFS_DATA_PATH = os.path.join(HDFS_DIR, 'paraquat_data.parquet').replace('\\', '/')
 HDFS_LOG_PATH = os.path.join(HDFS_DIR, 'creations.log').replace('\\', '/')
 
+HDFS_SEGMENT_DIR = os.path.join(HDFS_DIR, 'segments').replace('\\', '/')
+HDFS_TIMEOUT = float(os.environ.get('HDFS_TIMEOUT', '5'))
+HDFS_HEALTH_TTL = float(os.environ.get('HDFS_HEALTH_TTL', '30'))
+
+# 'async' uploads in a background worker that coalesces bursts; 'sync' uploads
+# before save_data returns.
+SYNC_MODE = os.environ.get('PARAQUAT_SYNC_MODE', 'async')
+SYNC_MAX_RETRIES = int(os.environ.get('PARAQUAT_SYNC_MAX_RETRIES', '5'))
+
+# Storage mode: 'single' rewrites DATA_FILE on every change, 'segmented' writes
+# small delta segments (new/changed rows plus tombstones) next to DATA_FILE and
+# folds them back into it on compaction.
+STORAGE_MODE = os.environ.get('PARAQUAT_STORAGE_MODE', 'single')
+SEGMENT_DIR = 'paraquat_segments'
+COMPACT_THRESHOLD = int(os.environ.get('PARAQUAT_COMPACT_THRESHOLD', '32'))
+TOMBSTONE_COLUMN = '_deleted'
+
+# Parquet layout for DATA_FILE: rows are clustered by SORT_COLUMNS and written
+# in row groups of ROW_GROUP_SIZE with min/max statistics for filter pushdown.
+ROW_GROUP_SIZE = int(os.environ.get('PARAQUAT_ROW_GROUP_SIZE', '100000'))
+SORT_COLUMNS = ('location', 'date')
+
+# Rows per batch for bulk ingestion (one write + one log flush per batch).
+BATCH_SIZE = int(os.environ.get('PARAQUAT_BATCH_SIZE', '50000'))
+
+# Creation log durability: 'sync' flushes every line, 'batched' buffers lines
+# and flushes every LOG_FLUSH_COUNT lines or LOG_FLUSH_INTERVAL seconds.
+LOG_DURABILITY = os.environ.get('PARAQUAT_LOG_DURABILITY', 'sync')
+LOG_FLUSH_COUNT = int(os.environ.get('PARAQUAT_LOG_FLUSH_COUNT', '100'))
+LOG_FLUSH_INTERVAL = float(os.environ.get('PARAQUAT_LOG_FLUSH_INTERVAL', '5'))
+
 # Fallback directory when HDFS is not available or not configured
 LOCAL_HDFS_FALLBACK_DIR = os.path.join(os.getcwd(), 'hdfs_fallback')
 os.makedirs(LOCAL_HDFS_FALLBACK_DIR, exist_ok=True)
 
+# Explicit Arrow schema for the data file. Names, units and locations repeat a
+# handful of values, so they are dictionary-encoded (category dtype in pandas).
+# location is the leading sort key and is stored as plain string: pyarrow does
+# not prune row groups on dictionary columns, and Parquet dictionary-encodes
+# the pages anyway. It is still read back as a categorical.
+_DICT_STRING = pa.dictionary(pa.int32(), pa.string())
+SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('chemical_name', _DICT_STRING),
+    ('concentration', pa.float64()),
+    ('concentration_unit', _DICT_STRING),
+    ('location', pa.string()),
+    ('date', pa.date32()),
+    # JSON {field: original text} for legacy values that could not be parsed
+    # (stored as null in their typed column); null for every other row.
+    ('unparsed', pa.string()),
+])
+SEGMENT_SCHEMA = SCHEMA.append(pa.field(TOMBSTONE_COLUMN, pa.bool_()))
+COLUMNS = SCHEMA.names
+# Fields a new entry must provide; concentration_unit is parsed from
+# concentration (e.g. "5%" or "2.5 mg/L") when not given.
+INPUT_COLUMNS = ["chemical_name", "concentration", "location", "date"]
+CATEGORY_COLUMNS = ('chemical_name', 'concentration_unit', 'location')
+UNPARSED_COLUMN = 'unparsed'
+COMPRESSION = os.environ.get('PARAQUAT_COMPRESSION', 'zstd')
+_CONCENTRATION_PATTERN = r'^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*(.*?)\s*$'
+
+# Serializes segment writes against compaction.
+_STORE_LOCK = threading.RLock()
+_compaction_thread = None
+
+TIMING_HOOKS = []
+
+
+def add_timing_hook(hook):
+    TIMING_HOOKS.append(hook)
+    return hook
+
+
+def remove_timing_hook(hook):
+    if hook in TIMING_HOOKS:
+        TIMING_HOOKS.remove(hook)
+
+
+def timed(operation):
+    """Report each call to TIMING_HOOKS; a failing hook is logged, never raised."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not TIMING_HOOKS:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                elapsed = time.perf_counter() - start
+                for hook in list(TIMING_HOOKS):
+                    try:
+                        hook(operation, elapsed, ok)
+                    except Exception as e:
+                        logging.warning(f'Timing hook failed: {e}')
+        return wrapper
+    return decorate
+
+
+if os.environ.get('PARAQUAT_TIMING_LOG', 'false').lower() == 'true':
+    add_timing_hook(lambda operation, seconds, ok:
+                    logging.info(f'{operation} took {seconds * 1000:.2f} ms{"" if ok else " (failed)"}'))
+
+
 def ensure_local_db():
     if not os.path.exists(DATA_FILE):
-        df = pd.DataFrame(columns=["id", "chemical_name", "concentration", "location", "date"])
-        df.to_parquet(DATA_FILE, index=False)
+        df = pd.DataFrame(columns=COLUMNS)
+        _write_parquet_atomic(df, DATA_FILE)
+
+
+def _unparsed_json(unparsed, index):
+    """One JSON object (or None) per row from {field: Series of original text}."""
+    frame = pd.DataFrame(unparsed, index=index)
+    out = pd.Series(None, index=index, dtype='object')
+    rows = frame.notna().any(axis=1)
+    out[rows] = [json.dumps({k: str(v) for k, v in row.items() if pd.notna(v)})
+                 for row in frame[rows].to_dict('records')]
+    return out
+
+
+def coerce_frame(df, strict=True):
+    """Convert a frame to the pandas dtypes of SCHEMA.
+
+    String concentrations are split into a float and a unit, dates are parsed
+    and text columns become categoricals. Raises ValueError on bad values, or
+    with strict=False (legacy data) stores them as null and keeps the original
+    text in UNPARSED_COLUMN; blank values simply become null.
+    """
+    df = df.copy()
+    unparsed = {}
+    if 'concentration' in df.columns and not pd.api.types.is_numeric_dtype(df['concentration']):
+        raw = df['concentration']
+        parts = raw.astype('str').str.extract(_CONCENTRATION_PATTERN)
+        bad = parts[0].isna() & raw.notna()
+        if bad.any():
+            if strict:
+                raise ValueError(f"Invalid concentration: {raw[bad].iloc[0]!r}")
+            unparsed['concentration'] = raw.where(bad & (raw.astype('str').str.strip() != ''))
+        df['concentration'] = parts[0].astype('float64')
+        unit = parts[1].where(parts[1] != '')
+        if 'concentration_unit' in df.columns:
+            unit = df['concentration_unit'].astype('object').where(df['concentration_unit'].notna(), unit)
+        df['concentration_unit'] = unit
+    if 'date' in df.columns and not pd.api.types.is_datetime64_dtype(df['date']):
+        if strict:
+            try:
+                df['date'] = pd.to_datetime(df['date'], format='ISO8601')
+            except (ValueError, TypeError) as e:
+                raise ValueError(f"Invalid date: {e}") from None
+        else:
+            raw = df['date']
+            df['date'] = pd.to_datetime(raw, format='ISO8601', errors='coerce')
+            bad = df['date'].isna() & raw.notna() & (raw.astype('str').str.strip() != '')
+            if bad.any():
+                unparsed['date'] = raw.where(bad)
+    if unparsed:
+        found = _unparsed_json(unparsed, df.index)
+        df[UNPARSED_COLUMN] = found.where(found.notna(), df.get(UNPARSED_COLUMN))
+    if 'date' in df.columns:
+        df['date'] = df['date'].dt.normalize().astype('datetime64[ms]')
+    if 'id' in df.columns and df['id'].notna().all():
+        df['id'] = df['id'].astype('int64')
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
+
+def coerce_changes(changes):
+    """Validate and convert a {field: value} update to SCHEMA types."""
+    unknown = [k for k in changes if k not in COLUMNS or k in ('id', UNPARSED_COLUMN)]
+    if unknown:
+        raise ValueError(f"Unknown or read-only fields: {', '.join(map(str, unknown))}")
+    row = coerce_frame(pd.DataFrame([changes]))
+    return {key: row[key].iloc[0] for key in row.columns}
+
+
+def _concat_frames(frames):
+    """pd.concat that keeps category columns categorical across frames."""
+    frames = [f for f in frames if len(f)] or frames[:1]
+    out = pd.concat(frames, ignore_index=True)
+    for col in CATEGORY_COLUMNS:
+        if col not in out.columns or isinstance(out[col].dtype, pd.CategoricalDtype):
+            continue
+        parts = [f[col] for f in frames if col in f.columns]
+        if len(parts) == len(frames) and all(isinstance(p.dtype, pd.CategoricalDtype) for p in parts):
+            # categories may come back from Arrow as object or str; align them
+            parts = [p.cat.set_categories(p.cat.categories.astype('str')) for p in parts]
+            out[col] = union_categoricals(parts, ignore_order=True)
+        else:
+            out[col] = out[col].astype('category')
+    return out
+
+
+def _add_categories(df, changes):
+    """Register new category values so they can be assigned in place."""
+    for key, value in changes.items():
+        column = df[key]
+        if isinstance(column.dtype, pd.CategoricalDtype) and pd.notna(value) \
+                and value not in column.cat.categories:
+            df[key] = column.cat.add_categories([value])
+
+
+def _to_arrow(df, schema=SCHEMA):
+    """Build an Arrow table with exactly the given schema from a typed frame."""
+    arrays = []
+    for field in schema:
+        if field.name not in df.columns or df[field.name].isna().all():
+            arrays.append(pa.nulls(len(df), type=field.type))
+        else:
+            arrays.append(pa.Array.from_pandas(df[field.name], type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _to_pandas(table):
+    """Arrow table/batch -> pandas with every CATEGORY_COLUMNS column categorical."""
+    df = table.to_pandas(date_as_object=False)
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
+
+def _read_parquet(path, columns=None):
+    """Read a data or segment file into SCHEMA dtypes (legacy files are converted)."""
+    df = _to_pandas(pq.read_table(path, columns=columns))
+    if 'concentration_unit' not in df.columns or not pd.api.types.is_numeric_dtype(df['concentration']):
+        df = coerce_frame(df, strict=False)
+        if UNPARSED_COLUMN in df.columns and df[UNPARSED_COLUMN].notna().any():
+            logging.warning(f'{path}: {int(df[UNPARSED_COLUMN].notna().sum())} legacy row(s) have values '
+                            f'that could not be parsed; run "app.py migrate" to convert the file.')
+    return df
+
+
+class HdfsClientManager:
+    """Shares one HDFS client (and its HTTP connection pool) across the module.
+
+    The result of the ``status('/')`` health probe is cached for ``health_ttl``
+    seconds. After a failed probe, or a failure reported by a caller, the
+    circuit opens and ``get()`` returns None without touching the network until
+    an exponential backoff (``backoff_base`` doubling up to ``backoff_max``)
+    has elapsed; the next call after that probes again.
+    """
+
+    def __init__(self, url, user, health_ttl=30.0, timeout=5.0, backoff_base=1.0,
+                 backoff_max=300.0, pool_size=10, client_factory=None):
+        self.url = url
+        self.user = user
+        self.health_ttl = health_ttl
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_size = pool_size
+        self.client_factory = client_factory
+        self.failures = 0
+        self._client = None
+        self._checked_at = None
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    def _make_client(self):
+        import requests
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return InsecureClient(self.url, user=self.user, timeout=self.timeout, session=session)
+
+    def get(self):
+        if not self.url or (self.client_factory is None and not HDFS_AVAILABLE):
+            return None
+        with self._lock:
+            now = time.monotonic()
+            if now < self._open_until:
+                return None
+            if self._checked_at is not None and now - self._checked_at < self.health_ttl:
+                return self._client
+            try:
+                if self._client is None:
+                    self._client = (self.client_factory or self._make_client)()
+                self._client.status('/', strict=False)
+            except Exception as e:
+                self._trip(e)
+                return None
+            if self._checked_at is None or self.failures:
+                logging.info('HDFS client initialized.')
+            self.failures = 0
+            self._checked_at = now
+            return self._client
+
+    def _trip(self, error):
+        self.failures += 1
+        self._checked_at = None
+        backoff = min(self.backoff_max, self.backoff_base * 2 ** (self.failures - 1))
+        self._open_until = time.monotonic() + backoff
+        logging.warning(f"HDFS unavailable ({error}); retrying in {backoff:.0f}s.")
+
+    def report_failure(self, error):
+        """Open the circuit after an HDFS operation failed."""
+        with self._lock:
+            self._trip(error)
+
+    def state(self):
+        with self._lock:
+            return {
+                'healthy': self._checked_at is not None,
+                'failures': self.failures,
+                'retry_in': max(0.0, self._open_until - time.monotonic()),
+            }
+
+
+HDFS_CLIENTS = HdfsClientManager(HDFS_URL, HDFS_USER, health_ttl=HDFS_HEALTH_TTL, timeout=HDFS_TIMEOUT)
 
 
 def init_hdfs_client():
-    """Initialize and return an HDFS client (or None).
+    """Return the shared HDFS client (or None).
 
-    Client returned only if HDFS is configured and the hdfs package is installed.
+    Client returned only if HDFS is configured, the hdfs package is installed
+    and the cluster is currently considered healthy.
     """
-    if not HDFS_URL or not HDFS_AVAILABLE:
-        return None
-    try:
-        client = InsecureClient(HDFS_URL, user=HDFS_USER)
-        # quick check
-        client.status('/', strict=False)
-        logging.info('HDFS client initialized.')
-        return client
-    except Exception as e:
-        logging.warning(f"HDFS client init failed: {e}")
-        return None
+    return HDFS_CLIENTS.get()
+
+
+def _fallback_path(hdfs_path):
+    """Map an HDFS path below HDFS_DIR to its mirror in the local fallback dir."""
+    rel = os.path.relpath(hdfs_path, HDFS_DIR) if hdfs_path.startswith(HDFS_DIR) else os.path.basename(hdfs_path)
+    return os.path.join(LOCAL_HDFS_FALLBACK_DIR, rel)
 
 
-def sync_to_hdfs(local_path, hdfs_path, client=None):
-    """Upload a local file to HDFS (overwrite). If no HDFS, copy to fallback dir."""
+def sync_to_hdfs(local_path, hdfs_path, client=None, fallback=True):
+    """Upload a local file to HDFS (overwrite). If no HDFS, copy to fallback dir.
+
+    Returns True only if the file reached HDFS.
+    """
     if client is None:
         # copy to fallback directory
-        dest = os.path.join(LOCAL_HDFS_FALLBACK_DIR, os.path.basename(hdfs_path))
+        dest = _fallback_path(hdfs_path)
         try:
-            import shutil
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
             shutil.copy2(local_path, dest)
             logging.info(f'Wrote to local fallback: {dest}')
         except Exception as e:
             logging.error(f'Failed to write fallback file: {e}')
-        return
+        return False
 
     try:
         # InsecureClient.upload wants the hdfs destination folder or file
         client.upload(hdfs_path, local_path, overwrite=True)
         logging.info(f'Uploaded {local_path} to HDFS:{hdfs_path}')
+        return True
     except Exception as e:
+        HDFS_CLIENTS.report_failure(e)
+        if not fallback:
+            logging.warning(f'Failed to upload to HDFS: {e}.')
+            return False
         logging.warning(f'Failed to upload to HDFS: {e}. Writing to fallback.')
-        sync_to_hdfs(local_path, hdfs_path, client=None)
+        return sync_to_hdfs(local_path, hdfs_path, client=None)
 
 
-def append_creation_log(entry: dict, client=None):
-    """Append a JSON line for each creation to HDFS log file, or fallback locally."""
-    line = json.dumps(entry, default=str) + "\n"
-    if client is None:
-        # append to local fallback log
+def remove_from_hdfs(hdfs_paths, client=None):
+    """Delete files from HDFS (or from the local fallback dir).
+
+    Returns False if any deletion raised.
+    """
+    ok = True
+    for hdfs_path in hdfs_paths:
         try:
-            with open(os.path.join(LOCAL_HDFS_FALLBACK_DIR, os.path.basename(HDFS_LOG_PATH)), 'a', encoding='utf-8') as f:
-                f.write(line)
-            logging.info('Appended creation log to local fallback.')
+            if client is None:
+                dest = _fallback_path(hdfs_path)
+                if os.path.exists(dest):
+                    os.remove(dest)
+            else:
+                client.delete(hdfs_path)
         except Exception as e:
-            logging.error(f'Failed to append fallback log: {e}')
-        return
+            logging.warning(f'Failed to remove {hdfs_path}: {e}')
+            ok = False
+    return ok
 
-    try:
-        # If log exists, read and append locally then overwrite via upload (safer for environments without append support)
-        existing = b''
+
+# RemoteException classes WebHDFS answers an APPEND with when the cluster or
+# file system cannot append; any other error is a real write failure.
+APPEND_UNSUPPORTED_EXCEPTIONS = ('UnsupportedOperationException',)
+
+
+class CreationLogWriter:
+    """Buffered JSON-lines writer for the creation audit log.
+
+    Lines are buffered in memory and flushed every ``flush_count`` lines or
+    ``flush_interval`` seconds (``durability='batched'``), or on every write
+    (``durability='sync'``). A flush is a single WebHDFS append; if the cluster
+    does not support append, each flush is written to a new rolled segment
+    ``creations.log.<timestamp>-<n>`` instead. Without HDFS the batch is appended
+    to the local fallback log with one write.
+    """
+
+    def __init__(self, hdfs_path, fallback_path, durability='sync', flush_count=100,
+                 flush_interval=5.0, client_factory=None):
+        self.hdfs_path = hdfs_path
+        self.fallback_path = fallback_path
+        self.durability = durability
+        self.flush_count = flush_count
+        self.flush_interval = flush_interval
+        self.client_factory = client_factory or (lambda: init_hdfs_client())
+        self.append_supported = True
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._roll_seq = 0
+        self._log_exists = False
+        self._closed = threading.Event()
+        self._timer = None
+        if durability == 'batched' and flush_interval:
+            self._timer = threading.Thread(target=self._flush_periodically, name='creation-log-flush', daemon=True)
+            self._timer.start()
+
+    def write(self, entry):
+        self.write_many([entry])
+
+    def write_many(self, entries):
+        lines = [json.dumps(entry, default=str) + "\n" for entry in entries]
+        with self._lock:
+            self._buffer.extend(lines)
+            pending = len(self._buffer)
+        if self.durability == 'sync' or pending >= self.flush_count:
+            self.flush()
+
+    def pending(self):
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self):
+        """Write all buffered lines. Returns the number of lines flushed."""
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+            if not lines:
+                return 0
+            data = ''.join(lines)
+            client = self.client_factory()
+            if client is not None:
+                try:
+                    self._write_hdfs(client, data)
+                    logging.info(f'Appended {len(lines)} creation log line(s) to HDFS.')
+                    return len(lines)
+                except Exception as e:
+                    logging.warning(f'Failed to append log to HDFS: {e}. Writing to fallback.')
+                    HDFS_CLIENTS.report_failure(e)
+            self._write_local(data, len(lines))
+            return len(lines)
+
+    def _write_hdfs(self, client, data):
+        if not self.append_supported:
+            self._write_rolled(client, data)
+            return
+        if not self._log_exists:
+            self._log_exists = client.status(self.hdfs_path, strict=False) is not None
+        if not self._log_exists:
+            client.write(self.hdfs_path, data=data, encoding='utf-8')
+            self._log_exists = True
+            return
         try:
-            existing = client.read(HDFS_LOG_PATH)
-        except Exception:
-            existing = b''
-
-        new_content = existing.decode('utf-8') + line if existing else line
-        # write via a temp file then upload
-        with tempfile.NamedTemporaryFile('w', delete=False, encoding='utf-8') as tmp:
-            tmp.write(new_content)
-            tmp_path = tmp.name
-        client.upload(HDFS_LOG_PATH, tmp_path, overwrite=True)
-        os.remove(tmp_path)
-        logging.info('Appended creation log to HDFS.')
-    except Exception as e:
-        logging.warning(f'Failed to append log to HDFS: {e}. Writing to fallback.')
-        append_creation_log(entry, client=None)
+            client.write(self.hdfs_path, data=data, encoding='utf-8', append=True)
+        except Exception as e:
+            # HdfsError.exception is the RemoteException class name
+            if getattr(e, 'exception', None) not in APPEND_UNSUPPORTED_EXCEPTIONS:
+                raise
+            logging.warning(f'HDFS append unsupported ({e}); rolling creation log segments.')
+            self.append_supported = False
+            self._write_rolled(client, data)
+
+    def _write_rolled(self, client, data):
+        self._roll_seq += 1
+        path = f"{self.hdfs_path}.{int(time.time() * 1000)}-{self._roll_seq}"
+        client.write(path, data=data, encoding='utf-8')
+
+    def _write_local(self, data, count):
+        try:
+            with open(self.fallback_path, 'a', encoding='utf-8') as f:
+                f.write(data)
+            logging.info(f'Appended {count} creation log line(s) to local fallback.')
+        except Exception as e:
+            logging.error(f'Failed to append fallback log: {e}')
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval):
+            if self.pending():
+                self.flush()
+
+    def close(self):
+        self._closed.set()
+        self.flush()
+
+
+CREATION_LOG = CreationLogWriter(
+    HDFS_LOG_PATH,
+    _fallback_path(HDFS_LOG_PATH),
+    durability=LOG_DURABILITY,
+    flush_count=LOG_FLUSH_COUNT,
+    flush_interval=LOG_FLUSH_INTERVAL,
+)
+atexit.register(CREATION_LOG.close)
+
+
+def append_creation_log(entry: dict):
+    """Queue a JSON line for the creation log (HDFS, or the local fallback)."""
+    CREATION_LOG.write(entry)
+
+
+def _log_records(rows):
+    """Creation-log dicts for stored rows: one format for single and bulk creates.
+
+    Values are plain Python types, dates ISO strings and missing values None
+    (JSON null).
+    """
+    # new rows never have unparsed values, so that column is not logged
+    rows = rows.drop(columns=[UNPARSED_COLUMN], errors='ignore')
+    records = rows.astype({c: 'object' for c in CATEGORY_COLUMNS if c in rows.columns})
+    records['date'] = records['date'].dt.strftime('%Y-%m-%d')
+    records = records.astype('object')
+    return records.where(records.notna(), None).to_dict('records')
+
+
+class HdfsSyncWorker:
+    """Background thread that mirrors local files to HDFS.
+
+    Requests are keyed by HDFS path, so a burst of saves of the same file
+    collapses into one upload of whatever version is on disk when the worker
+    gets to it. A request with ``local_path=None`` deletes the remote file.
+    Failed uploads are retried with exponential backoff; after ``max_retries``
+    (or when HDFS is unavailable) the file is written to the local fallback.
+    """
+
+    def __init__(self, client_factory=None, max_retries=5, backoff_base=0.5, backoff_max=30.0):
+        self.client_factory = client_factory or (lambda: init_hdfs_client())
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.counters = {'requested': 0, 'coalesced': 0, 'synced': 0, 'fallback': 0, 'retries': 0}
+        self.last_synced_at = None
+        self._pending = {}  # hdfs_path -> (local_path, first requested at)
+        self._in_flight = None
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def submit(self, local_path, hdfs_path):
+        with self._cond:
+            self.counters['requested'] += 1
+            requested_at = time.time()
+            if hdfs_path in self._pending:
+                self.counters['coalesced'] += 1
+                requested_at = self._pending[hdfs_path][1]
+            self._pending[hdfs_path] = (local_path, requested_at)
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='hdfs-sync', daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stop.is_set():
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                hdfs_path = next(iter(self._pending))
+                local_path, requested_at = self._pending.pop(hdfs_path)
+                self._in_flight = (hdfs_path, requested_at)
+            try:
+                self._sync(local_path, hdfs_path)
+            except Exception as e:
+                logging.error(f'HDFS sync of {hdfs_path} failed: {e}')
+            finally:
+                with self._cond:
+                    self._in_flight = None
+                    self.last_synced_at = time.time()
+                    self._cond.notify_all()
+
+    def _sync(self, local_path, hdfs_path):
+        for attempt in range(self.max_retries + 1):
+            if local_path is not None and not os.path.exists(local_path):
+                return  # superseded, e.g. a segment that was already compacted
+            client = self.client_factory()
+            final = client is None or attempt == self.max_retries
+            if local_path is None:
+                ok = remove_from_hdfs([hdfs_path], client=client)
+            else:
+                ok = sync_to_hdfs(local_path, hdfs_path, client=client, fallback=final)
+            if ok or final:
+                self.counters['synced' if ok and client is not None else 'fallback'] += 1
+                return
+            self.counters['retries'] += 1
+            self._stop.wait(min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _idle(self, hdfs_path=None):
+        if hdfs_path is None:
+            return not self._pending and self._in_flight is None
+        in_flight = self._in_flight is not None and self._in_flight[0] == hdfs_path
+        return hdfs_path not in self._pending and not in_flight
+
+    def wait_synced(self, hdfs_path=None, timeout=None):
+        """Block until hdfs_path (or everything) is synced. False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._idle(hdfs_path), timeout)
+
+    def flush(self, timeout=None):
+        return self.wait_synced(timeout=timeout)
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._pending) + (self._in_flight is not None)
+
+    def lag(self):
+        """Seconds since the oldest request that has not been synced yet."""
+        with self._cond:
+            times = [t for _, t in self._pending.values()]
+            if self._in_flight is not None:
+                times.append(self._in_flight[1])
+            return time.time() - min(times) if times else 0.0
+
+    def stats(self):
+        with self._cond:
+            counters = dict(self.counters)
+        return dict(counters, queue_depth=self.queue_depth(), lag_seconds=self.lag(),
+                    last_synced_at=self.last_synced_at)
+
+    def close(self, timeout=None):
+        self.flush(timeout)
+        with self._cond:
+            self._stop.set()
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+SYNC_WORKER = HdfsSyncWorker(max_retries=SYNC_MAX_RETRIES)
+atexit.register(SYNC_WORKER.close)
+
+
+def request_sync(local_path, hdfs_path):
+    """Mirror local_path to HDFS, in the background unless SYNC_MODE is 'sync'."""
+    if SYNC_MODE == 'sync':
+        sync_to_hdfs(local_path, hdfs_path, client=init_hdfs_client())
+    else:
+        SYNC_WORKER.submit(local_path, hdfs_path)
+
+
+def request_removal(hdfs_paths):
+    if SYNC_MODE == 'sync':
+        remove_from_hdfs(hdfs_paths, client=init_hdfs_client())
+    else:
+        for hdfs_path in hdfs_paths:
+            SYNC_WORKER.submit(None, hdfs_path)
+
+
+def _write_parquet_atomic(df, path, cluster=False, schema=SCHEMA):
+    """Write via a temp file and rename so readers never see a partial file.
+
+    With cluster=True rows are sorted by SORT_COLUMNS first, so each row group
+    covers a narrow location/date range and its min/max statistics let query
+    filters skip most of the file.
+    """
+    sort_by = [c for c in SORT_COLUMNS if c in df.columns]
+    if cluster and sort_by and len(df) > 1:
+        # sort categoricals by value, not category order, so stats stay tight
+        df = df.sort_values(sort_by, kind='stable', key=lambda col: col.astype('str')
+                            if isinstance(col.dtype, pd.CategoricalDtype) else col)
+    tmp_path = f"{path}.tmp"
+    pq.write_table(_to_arrow(df, schema), tmp_path, row_group_size=ROW_GROUP_SIZE,
+                   compression=COMPRESSION, write_statistics=True)
+    os.replace(tmp_path, path)
 
 
 ensure_local_db()
 
 
+def segment_paths():
+    """Return the local delta segments, oldest first."""
+    if not os.path.isdir(SEGMENT_DIR):
+        return []
+    names = sorted(n for n in os.listdir(SEGMENT_DIR) if n.startswith('delta-') and n.endswith('.parquet'))
+    return [os.path.join(SEGMENT_DIR, n) for n in names]
+
+
+def _next_segment_path():
+    last = segment_paths()
+    seq = int(os.path.basename(last[-1])[len('delta-'):-len('.parquet')]) + 1 if last else 1
+    return os.path.join(SEGMENT_DIR, f"delta-{seq:012d}.parquet")
+
+
+def _hdfs_segment_path(local_path):
+    return f"{HDFS_SEGMENT_DIR}/{os.path.basename(local_path)}"
+
+
+def _read_deltas(paths):
+    """Latest version of every id touched by the segments (tombstones included)."""
+    merged = _concat_frames([_read_parquet(p) for p in paths])
+    return merged.drop_duplicates('id', keep='last')
+
+
+def _merge_segments(base, paths):
+    """Apply delta segments to the base frame; the last version of an id wins."""
+    if not paths:
+        return base
+    frames = [base.assign(**{TOMBSTONE_COLUMN: False}), _read_deltas(paths)]
+    merged = _concat_frames(frames)
+    merged = merged.drop_duplicates('id', keep='last')
+    merged = merged[~merged[TOMBSTONE_COLUMN].astype(bool)]
+    return merged.drop(columns=[TOMBSTONE_COLUMN]).reset_index(drop=True)
+
+
+def write_segment(rows=None, deleted_ids=(), sync_hdfs=True):
+    """Persist new/changed rows and tombstones as one small delta segment."""
+    frames = []
+    if rows is not None and not rows.empty:
+        frames.append(rows.assign(**{TOMBSTONE_COLUMN: False}))
+    if deleted_ids:
+        frames.append(pd.DataFrame({'id': list(deleted_ids), TOMBSTONE_COLUMN: True}))
+    if not frames:
+        return None
+    delta = _concat_frames(frames)
+    with _STORE_LOCK:
+        os.makedirs(SEGMENT_DIR, exist_ok=True)
+        path = _next_segment_path()
+        _write_parquet_atomic(delta, path, schema=SEGMENT_SCHEMA)
+    if sync_hdfs:
+        request_sync(path, _hdfs_segment_path(path))
+    maybe_compact()
+    return path
+
+
+@timed('compact_segments')
+def compact_segments(sync_hdfs=True):
+    """Fold all delta segments into DATA_FILE. Returns the number folded."""
+    with _STORE_LOCK:
+        paths = segment_paths()
+        if not paths:
+            return 0
+        before = store_stamp()
+        df = _merge_segments(_read_parquet(DATA_FILE), paths)
+        _write_parquet_atomic(df, DATA_FILE, cluster=True)
+        for p in paths:
+            os.remove(p)
+        after = store_stamp()
+    # same logical content, so the resident table does not need a reload.
+    # Outside _STORE_LOCK: writers take TABLE.lock before _STORE_LOCK.
+    TABLE.adopt_stamp(before, after)
+    logging.info(f'Compacted {len(paths)} segment(s) into {DATA_FILE}.')
+    if sync_hdfs:
+        request_sync(DATA_FILE, HDFS_DATA_PATH)
+        request_removal([_hdfs_segment_path(p) for p in paths])
+    return len(paths)
+
+
+def maybe_compact(threshold=None):
+    """Start a background compaction once enough segments have piled up."""
+    global _compaction_thread
+    threshold = COMPACT_THRESHOLD if threshold is None else threshold
+    if len(segment_paths()) < threshold:
+        return False
+    with _STORE_LOCK:
+        if _compaction_thread is not None and _compaction_thread.is_alive():
+            return False
+        _compaction_thread = threading.Thread(target=compact_segments, name='paraquat-compaction', daemon=True)
+        _compaction_thread.start()
+    return True
+
+
+def _read_store():
+    """Read the full table from disk, merging delta segments in segmented mode."""
+    if STORAGE_MODE == 'segmented':
+        with _STORE_LOCK:
+            return _merge_segments(_read_parquet(DATA_FILE), segment_paths())
+    return _read_parquet(DATA_FILE)
+
+
+def store_stamp():
+    """Cheap version stamp of the on-disk store; no data is read."""
+    with _STORE_LOCK:
+        st = os.stat(DATA_FILE)
+        segments = tuple(os.path.basename(p) for p in segment_paths()) if STORAGE_MODE == 'segmented' else ()
+        return (STORAGE_MODE, st.st_mtime_ns, st.st_size, segments)
+
+
+class ParaquatTable:
+    """Process-resident copy of the store with an id -> row position index.
+
+    The frame is read once and only re-read when the on-disk stamp changes
+    (e.g. another process rewrote the file). Changes made through this module
+    are applied to the frame and index in place, so existence checks, point
+    lookups and id allocation never touch the Parquet file. Inserted rows are
+    buffered and concatenated in one go by the next read of the frame, so a
+    run of inserts does not copy the whole table once per row.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.version = 0
+        self._df = None
+        self._pending = []
+        self._rows = 0
+        self._stamp = None
+        self._index = {}
+        self._next_id = 1
+
+    def _set_frame(self, df):
+        self._df = df.reset_index(drop=True)
+        self._pending = []
+        self._rows = len(self._df)
+        self._index = {int(i): pos for pos, i in enumerate(self._df['id'].tolist())}
+        # ids are never reused within a process, even after deleting the max id
+        self._next_id = max(self._next_id, max(self._index, default=0) + 1)
+        self.version += 1
+
+    def reset(self, df):
+        """Replace the resident frame with df (already written to disk)."""
+        with self.lock:
+            self._set_frame(df)
+            self._stamp = store_stamp()
+
+    def _load(self):
+        """Re-read the store if it changed on disk; caller holds the lock."""
+        stamp = store_stamp()
+        if self._df is None or self._stamp != stamp:
+            self._stamp = stamp
+            self._set_frame(_read_store())
+
+    def frame(self):
+        with self.lock:
+            self._load()
+            if self._pending:
+                self._df = _concat_frames([self._df, *self._pending])
+                self._pending = []
+            return self._df
+
+    def invalidate(self):
+        with self.lock:
+            self._df = None
+
+    def mark_clean(self):
+        """Record that the on-disk store now matches the resident frame."""
+        with self.lock:
+            self._stamp = store_stamp()
+
+    def adopt_stamp(self, old, new):
+        """Accept a rewrite that did not change content (e.g. compaction)."""
+        with self.lock:
+            if self._df is not None and self._stamp == old:
+                self._stamp = new
+
+    def __contains__(self, entry_id):
+        with self.lock:
+            self._load()
+            return entry_id in self._index
+
+    def __len__(self):
+        with self.lock:
+            self._load()
+            return self._rows
+
+    def get(self, entry_id):
+        with self.lock:
+            df = self.frame()
+            pos = self._index.get(entry_id)
+            return None if pos is None else df.iloc[pos].to_dict()
+
+    def allocate_id(self):
+        return int(self.allocate_ids(1)[0])
+
+    def allocate_ids(self, count):
+        """Reserve count consecutive ids and return them as an int64 array."""
+        with self.lock:
+            self._load()
+            start = self._next_id
+            self._next_id += count
+            return np.arange(start, start + count, dtype='int64')
+
+    def insert(self, rows):
+        with self.lock:
+            self._load()
+            start = self._rows
+            ids = [int(i) for i in rows['id'].tolist()]
+            self._pending.append(rows)
+            self._rows += len(rows)
+            self._index.update(zip(ids, range(start, start + len(ids))))
+            if ids:
+                self._next_id = max(self._next_id, max(ids) + 1)
+            self.version += 1
+
+    def update(self, entry_id, changes):
+        """Apply changes to one row and return it as a one-row frame."""
+        with self.lock:
+            df = self.frame()
+            pos = self._index[entry_id]
+            _add_categories(df, changes)
+            for key, value in changes.items():
+                df.at[pos, key] = value
+            self.version += 1
+            return df.iloc[[pos]]
+
+    def update_rows(self, mask, changes):
+        """Apply changes to every row selected by mask; return the changed rows."""
+        with self.lock:
+            df = self.frame()
+            _add_categories(df, changes)
+            df.loc[mask, list(changes)] = list(changes.values())
+            self.version += 1
+            return df[mask]
+
+    def delete(self, entry_ids):
+        with self.lock:
+            df = self.frame()
+            self._set_frame(df[~df['id'].isin(list(entry_ids))])
+
+    def delete_rows(self, mask):
+        """Drop the rows selected by mask; return their ids."""
+        with self.lock:
+            df = self.frame()
+            ids = df.loc[mask, 'id'].tolist()
+            self._set_frame(df[~mask])
+            return ids
+
+
+TABLE = ParaquatTable()
+
+
 def load_data():
-    return pd.read_parquet(DATA_FILE)
+    return TABLE.frame().copy()
 
 
-def save_data(df, sync_hdfs=True):
-    df.to_parquet(DATA_FILE, index=False)
+def _write_base(df, sync_hdfs=True):
+    with _STORE_LOCK:
+        _write_parquet_atomic(df, DATA_FILE, cluster=True)
+        # df is the full table, so any pending deltas are now obsolete
+        stale = segment_paths()
+        for p in stale:
+            os.remove(p)
     # attempt to sync to HDFS (or fallback)
-    client = init_hdfs_client()
     if sync_hdfs:
-        sync_to_hdfs(DATA_FILE, HDFS_DATA_PATH, client=client)
+        request_sync(DATA_FILE, HDFS_DATA_PATH)
+        if stale:
+            request_removal([_hdfs_segment_path(p) for p in stale])
+
+
+def save_data(df, sync_hdfs=True):
+    with TABLE.lock:
+        _write_base(df, sync_hdfs=sync_hdfs)
+        TABLE.reset(df)
+
+
+def _persist_change(rows=None, deleted_ids=(), sync_hdfs=True):
+    """Persist a change already applied to TABLE (delta segment or full rewrite)."""
+    try:
+        if STORAGE_MODE == 'segmented':
+            write_segment(rows, deleted_ids, sync_hdfs=sync_hdfs)
+        else:
+            _write_base(TABLE.frame(), sync_hdfs=sync_hdfs)
+    except Exception:
+        # the resident copy may now be ahead of disk; re-read it next time
+        TABLE.invalidate()
+        raise
+    TABLE.mark_clean()
+
 
+def get_entry(entry_id):
+    """Return the entry with this id as a dict, or None."""
+    return TABLE.get(entry_id)
 
+
+@timed('create_entry')
 def create_entry(entry):
-    df = load_data()
-    entry['id'] = int(df['id'].max() + 1) if not df.empty else 1
-    df = pd.concat([df, pd.DataFrame([entry])], ignore_index=True)
-    # save locally and attempt a sync
-    save_data(df, sync_hdfs=True)
+    with TABLE.lock:
+        row = coerce_frame(pd.DataFrame([entry]).reindex(columns=COLUMNS[1:]))
+        entry['id'] = TABLE.allocate_id()
+        row.insert(0, 'id', np.array([entry['id']], dtype='int64'))
+        TABLE.insert(row)
+        # save locally and attempt a sync
+        _persist_change(rows=row)
     # append a creation log (keeps a simple audit trail)
-    client = init_hdfs_client()
-    append_creation_log(entry, client=client)
+    append_creation_log(_log_records(row)[0])
     print("✅ Entry added successfully.")
 
 
+def _iter_input_batches(source, batch_size, fmt=None):
+    """Yield DataFrames of at most batch_size rows from a file path or iterable."""
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), batch_size):
+            yield source.iloc[start:start + batch_size]
+        return
+    if not isinstance(source, (str, os.PathLike)):
+        it = iter(source)
+        while True:
+            chunk = list(itertools.islice(it, batch_size))
+            if not chunk:
+                return
+            yield pd.DataFrame(chunk)
+    path = os.fspath(source)
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt == 'csv':
+        yield from pd.read_csv(path, chunksize=batch_size, dtype=str, keep_default_na=False, na_values=[''])
+    elif fmt in ('jsonl', 'json', 'ndjson'):
+        yield from pd.read_json(path, lines=True, chunksize=batch_size, dtype=False, convert_dates=False)
+    elif fmt == 'parquet':
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Unsupported input format: {fmt!r}")
+
+
+def _validate_batch(batch):
+    """Check a batch against SCHEMA and return it typed, in COLUMNS order (no id)."""
+    missing = [c for c in INPUT_COLUMNS if c not in batch.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    unknown = [c for c in batch.columns if c not in COLUMNS or c == UNPARSED_COLUMN]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(map(str, unknown))}")
+    empty = [c for c in INPUT_COLUMNS if batch[c].isna().any()]
+    if empty:
+        raise ValueError(f"Empty values in columns: {', '.join(empty)}")
+    batch = batch.reindex(columns=COLUMNS[1:]).reset_index(drop=True)
+    return coerce_frame(batch)
+
+
+@timed('create_entries')
+def create_entries(source, batch_size=None, fmt=None):
+    """Bulk-insert rows from an iterable of dicts, a DataFrame or a CSV/JSONL/Parquet path.
+
+    Each batch is validated, given a contiguous id range, persisted with one
+    write and logged with one creation-log write. Returns the rows inserted.
+    """
+    batch_size = batch_size or BATCH_SIZE
+    total = 0
+    for number, batch in enumerate(_iter_input_batches(source, batch_size, fmt), start=1):
+        if batch.empty:
+            continue
+        try:
+            batch = _validate_batch(batch)
+        except ValueError as e:
+            raise ValueError(f"Batch {number}: {e}") from None
+        with TABLE.lock:
+            batch.insert(0, 'id', TABLE.allocate_ids(len(batch)))
+            TABLE.insert(batch)
+            _persist_change(rows=batch)
+        CREATION_LOG.write_many(_log_records(batch))
+        total += len(batch)
+        logging.info(f'Ingested batch {number} ({len(batch)} rows, {total} total).')
+    return total
+
+
+_FILTER_OPS = {
+    '==': lambda f, v: f == v,
+    '!=': lambda f, v: f != v,
+    '<': lambda f, v: f < v,
+    '<=': lambda f, v: f <= v,
+    '>': lambda f, v: f > v,
+    '>=': lambda f, v: f >= v,
+    'in': lambda f, v: f.isin(list(v)),
+    'not in': lambda f, v: ~f.isin(list(v)),
+    'between': lambda f, v: (f >= v[0]) & (f <= v[1]),
+}
+
+
+def _filter_value(column, value, arrow):
+    """Convert date filter values to what Arrow (date) or pandas (Timestamp) compares."""
+    if column != 'date':
+        return value
+    convert = (lambda v: pd.Timestamp(v).date()) if arrow else pd.Timestamp
+    if isinstance(value, (list, tuple, set)):
+        return [convert(v) for v in value]
+    return convert(value)
+
+
+def filter_expression(filters):
+    """Build a pyarrow expression from (column, op, value) tuples, AND-ed together.
+
+    Supported ops: ==, !=, <, <=, >, >=, in, not in and between (value is an
+    inclusive (low, high) pair). Dates may be given as ISO strings.
+    """
+    expr = None
+    for column, op, value in filters or ():
+        if op not in _FILTER_OPS:
+            raise ValueError(f"Unsupported filter operator: {op!r}")
+        term = _FILTER_OPS[op](ds.field(column), _filter_value(column, value, arrow=True))
+        expr = term if expr is None else expr & term
+    return expr
+
+
+def iter_query(columns=None, filters=None, batch_size=None):
+    """Stream matching rows as DataFrames of at most batch_size rows.
+
+    Filters and the column projection are pushed down to the Parquet scan, so
+    row groups whose statistics rule them out and unselected columns are never
+    read. In segmented mode the ids touched by delta segments are excluded from
+    the base scan and their latest versions are filtered in memory instead.
+    """
+    expr = filter_expression(filters)
+    batch_size = batch_size or BATCH_SIZE
+    with _STORE_LOCK:
+        paths = segment_paths() if STORAGE_MODE == 'segmented' else []
+        deltas = _read_deltas(paths) if paths else None
+        dataset = ds.dataset(DATA_FILE, format='parquet')
+    base_expr = expr
+    if deltas is not None:
+        touched = ~ds.field('id').isin(deltas['id'].tolist())
+        base_expr = touched if expr is None else expr & touched
+    scanner = dataset.scanner(columns=columns, filter=base_expr, batch_size=batch_size)
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            yield _to_pandas(batch)
+    if deltas is None:
+        return
+    live = deltas[~deltas[TOMBSTONE_COLUMN].astype(bool)].drop(columns=[TOMBSTONE_COLUMN])
+    table = _to_arrow(live)
+    if expr is not None:
+        table = table.filter(expr)
+    if columns:
+        table = table.select(columns)
+    for batch in table.to_batches(max_chunksize=batch_size):
+        if batch.num_rows:
+            yield _to_pandas(batch)
+
+
+def filter_mask(df, filters):
+    """Evaluate (column, op, value) filters (see filter_expression) on a DataFrame."""
+    mask = np.ones(len(df), dtype=bool)
+    for column, op, value in filters or ():
+        if op not in _FILTER_OPS:
+            raise ValueError(f"Unsupported filter operator: {op!r}")
+        mask &= np.asarray(_FILTER_OPS[op](df[column], _filter_value(column, value, arrow=False)), dtype=bool)
+    return mask
+
+
+@timed('query_entries')
+def query_entries(columns=None, filters=None):
+    """Return the rows matching filters (see iter_query) as one DataFrame."""
+    frames = list(iter_query(columns, filters))
+    if not frames:
+        # same columns and dtypes as a non-empty result
+        empty = SCHEMA.empty_table()
+        return _to_pandas(empty.select(columns) if columns else empty)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _predicate_mask(df, predicate):
+    """A predicate is a callable df -> boolean mask, or a list of filter tuples."""
+    mask = predicate(df) if callable(predicate) else filter_mask(df, predicate)
+    return np.asarray(mask, dtype=bool)
+
+
+@timed('update_where')
+def update_where(predicate, changes):
+    """Apply changes to all rows matching predicate with one write. Returns the row count."""
+    with TABLE.lock:
+        mask = _predicate_mask(TABLE.frame(), predicate)
+        count = int(mask.sum())
+        if count and changes:
+            rows = TABLE.update_rows(mask, coerce_changes(changes))
+            _persist_change(rows=rows)
+    logging.info(f'Updated {count} entries.')
+    return count
+
+
+@timed('delete_where')
+def delete_where(predicate):
+    """Delete all rows matching predicate with one write. Returns the row count."""
+    with TABLE.lock:
+        mask = _predicate_mask(TABLE.frame(), predicate)
+        ids = TABLE.delete_rows(mask) if mask.any() else []
+        if ids:
+            _persist_change(deleted_ids=ids)
+    logging.info(f'Deleted {len(ids)} entries.')
+    return len(ids)
+
+
+def update_ids(entry_ids, changes):
+    ids = list(entry_ids)
+    return update_where(lambda df: df['id'].isin(ids), changes)
+
+
+def delete_ids(entry_ids):
+    ids = list(entry_ids)
+    return delete_where(lambda df: df['id'].isin(ids))
+
+
+def migrate_data_file(path=DATA_FILE):
+    """One-shot rewrite of a legacy (untyped) data file with SCHEMA and COMPRESSION.
+
+    Pending segments are compacted first. Values that cannot be parsed become
+    null and their original text is kept in UNPARSED_COLUMN. Returns a report
+    with the file size and in-memory size before and after, and the number of
+    rows with unparsed values.
+    """
+    compact_segments(sync_hdfs=False)
+    with TABLE.lock, _STORE_LOCK:
+        size_before = os.path.getsize(path)
+        legacy = pd.read_parquet(path)
+        memory_before = int(legacy.memory_usage(deep=True).sum())
+        typed = coerce_frame(legacy, strict=False).reindex(columns=COLUMNS)
+        unparsed_rows = int(typed[UNPARSED_COLUMN].notna().sum())
+        _write_parquet_atomic(typed, path, cluster=True)
+        typed = _read_parquet(path)
+        TABLE.invalidate()
+    report = {
+        'rows': len(typed),
+        'file_bytes_before': size_before,
+        'file_bytes_after': os.path.getsize(path),
+        'memory_bytes_before': memory_before,
+        'memory_bytes_after': int(typed.memory_usage(deep=True).sum()),
+        'unparsed_rows': unparsed_rows,
+    }
+    logging.info(f"Migrated {path}: file {report['file_bytes_before']} -> {report['file_bytes_after']} bytes, "
+                 f"memory {report['memory_bytes_before']} -> {report['memory_bytes_after']} bytes.")
+    if unparsed_rows:
+        logging.warning(f"{unparsed_rows} row(s) had values that could not be parsed; "
+                        f"they are null and the original text is in the '{UNPARSED_COLUMN}' column.")
+    if path == DATA_FILE:
+        request_sync(DATA_FILE, HDFS_DATA_PATH)
+    return report
+
+
+@timed('read_entries')
 def read_entries():
     df = load_data()
     print(df)
 
 
+@timed('update_entry')
 def update_entry(entry_id, updated_data):
-    df = load_data()
-    if entry_id in df['id'].values:
-        for key, value in updated_data.items():
-            df.loc[df['id'] == entry_id, key] = value
-        save_data(df)
-        print("✅ Entry updated.")
-    else:
-        print("❌ Entry not found.")
+    try:
+        changes = coerce_changes(updated_data)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    with TABLE.lock:
+        if entry_id in TABLE:
+            row = TABLE.update(entry_id, changes)
+            _persist_change(rows=row)
+            print("✅ Entry updated.")
+        else:
+            print("❌ Entry not found.")
 
 
+@timed('delete_entry')
 def delete_entry(entry_id):
-    df = load_data()
-    if entry_id in df['id'].values:
-        df = df[df['id'] != entry_id]
-        save_data(df)
-        print("✅ Entry deleted.")
-    else:
-        print("❌ Entry not found.")
+    with TABLE.lock:
+        if entry_id in TABLE:
+            TABLE.delete([entry_id])
+            _persist_change(deleted_ids=[entry_id])
+            print("✅ Entry deleted.")
+        else:
+            print("❌ Entry not found.")
 
 
 def menu():
@@ -168,7 +1299,9 @@ def menu():
         print("2. Read Entries")
         print("3. Update Entry")
         print("4. Delete Entry")
-        print("5. Exit")
+        print("5. Query Entries")
+        print("6. Compact Segments")
+        print("7. Exit")
 
         choice = input("Choose an option: ")
         
@@ -183,7 +1316,10 @@ def menu():
                 "location": location,
                 "date": date
             }
-            create_entry(entry)
+            try:
+                create_entry(entry)
+            except ValueError as e:
+                print(f"❌ {e}")
 
         elif choice == "2":
             read_entries()
@@ -205,11 +1341,65 @@ def menu():
                 print("❌ Invalid ID.")
 
         elif choice == "5":
+            columns = [c.strip() for c in input("Columns (comma separated, blank for all): ").split(",") if c.strip()]
+            filters = []
+            location = input("Location (blank for any): ").strip()
+            if location:
+                filters.append(("location", "==", location))
+            date_from = input("Date from (YYYY-MM-DD, blank for any): ").strip()
+            date_to = input("Date to (YYYY-MM-DD, blank for any): ").strip()
+            if date_from:
+                filters.append(("date", ">=", date_from))
+            if date_to:
+                filters.append(("date", "<=", date_to))
+            min_concentration = input("Min concentration (blank for any): ").strip()
+            try:
+                if min_concentration:
+                    filters.append(("concentration", ">=", float(min_concentration)))
+                for batch in iter_query(columns or None, filters):
+                    print(batch)
+            except (ValueError, KeyError, pa.ArrowInvalid) as e:
+                print(f"❌ Invalid query: {e}")
+
+        elif choice == "6":
+            folded = compact_segments()
+            print(f"✅ Compacted {folded} segment(s).")
+
+        elif choice == "7":
             print("👋 Exiting.")
             break
         else:
             print("❌ Invalid choice.")
 
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Paraquat CRUD with optional HDFS persistence")
+    commands = parser.add_subparsers(dest='command')
+    commands.add_parser('menu', help="interactive menu (default)")
+    ingest = commands.add_parser('ingest', help="bulk-load records from a CSV/JSONL/Parquet file")
+    ingest.add_argument('path')
+    ingest.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    ingest.add_argument('--format', choices=['csv', 'jsonl', 'parquet'])
+    commands.add_parser('compact', help="fold delta segments into the data file")
+    migrate = commands.add_parser('migrate', help="rewrite a legacy data file with the typed schema")
+    migrate.add_argument('path', nargs='?', default=DATA_FILE)
+    args = parser.parse_args(argv)
+
+    if args.command == 'ingest':
+        total = create_entries(args.path, batch_size=args.batch_size, fmt=args.format)
+        print(f"✅ Ingested {total} entries.")
+    elif args.command == 'compact':
+        print(f"✅ Compacted {compact_segments()} segment(s).")
+    elif args.command == 'migrate':
+        report = migrate_data_file(args.path)
+        print(f"✅ Migrated {report['rows']} rows: "
+              f"file {report['file_bytes_before']:,} -> {report['file_bytes_after']:,} bytes, "
+              f"memory {report['memory_bytes_before']:,} -> {report['memory_bytes_after']:,} bytes.")
+        if report['unparsed_rows']:
+            print(f"⚠️ {report['unparsed_rows']} row(s) kept unparsable values in '{UNPARSED_COLUMN}'.")
+    else:
+        menu()
+
+
 if __name__ == "__main__":
-    menu()
+    main()
@@ -28,6 +28,8 @@ class TestAppPersistence(unittest.TestCase):
         self.app = app
 
     def tearDown(self):
+        # let background uploads finish before the directory goes away
+        self.app.SYNC_WORKER.close(timeout=5)
         # cleanup
         os.chdir(self.orig_cwd)
         sys.path = [p for p in sys.path if p != self.tmpdir]
@@ -55,5 +57,465 @@ class TestAppPersistence(unittest.TestCase):
         found = any('ParaquatTest' in line for line in lines)
         self.assertTrue(found)
 
+    def test_segmented_mode_merges_and_compacts(self):
+        self.app.STORAGE_MODE = 'segmented'
+        for name in ('A', 'B', 'C'):
+            self.app.create_entry({'chemical_name': name, 'concentration': '1%',
+                                   'location': 'Lab A', 'date': '2025-10-15'})
+        self.app.update_entry(2, {'location': 'Lab B'})
+        self.app.delete_entry(3)
+        # every write produced a small delta; the base file is still empty
+        self.assertEqual(len(self.app.segment_paths()), 5)
+        import pandas as pd
+        self.assertTrue(pd.read_parquet('paraquat_data.parquet').empty)
+        df = self.app.load_data()
+        self.assertEqual(sorted(df['id'].tolist()), [1, 2])
+        self.assertEqual(df.loc[df['id'] == 2, 'location'].iloc[0], 'Lab B')
+        # segments were mirrored individually to the fallback dir
+        self.assertTrue(self.app.SYNC_WORKER.flush(timeout=5))
+        self.assertEqual(len(os.listdir(os.path.join('hdfs_fallback', 'segments'))), 5)
+
+        self.assertEqual(self.app.compact_segments(), 5)
+        self.assertEqual(self.app.segment_paths(), [])
+        self.assertTrue(self.app.SYNC_WORKER.flush(timeout=5))
+        self.assertEqual(os.listdir(os.path.join('hdfs_fallback', 'segments')), [])
+        compacted = pd.read_parquet('paraquat_data.parquet')
+        self.assertEqual(sorted(compacted['id'].tolist()), [1, 2])
+
+    def test_compaction_runs_alongside_concurrent_inserts(self):
+        import threading
+        self.app.STORAGE_MODE = 'segmented'
+        self.app.COMPACT_THRESHOLD = 3
+        errors = []
+
+        def insert():
+            try:
+                for i in range(60):
+                    self.app.create_entry({'chemical_name': f'C{i}', 'concentration': '1%',
+                                           'location': 'Lab A', 'date': '2025-10-15'})
+            except Exception as e:
+                errors.append(e)
+
+        def compact():
+            while writer.is_alive():
+                self.app.compact_segments()
+
+        # compaction runs here and in the background threads started by maybe_compact
+        writer = threading.Thread(target=insert, daemon=True)
+        compactor = threading.Thread(target=compact, daemon=True)
+        writer.start()
+        compactor.start()
+        writer.join(timeout=60)
+        compactor.join(timeout=10)
+        self.assertFalse(writer.is_alive() or compactor.is_alive(), 'inserts deadlocked against compaction')
+        self.assertEqual(errors, [])
+        if self.app._compaction_thread is not None:
+            self.app._compaction_thread.join(timeout=30)
+        self.app.compact_segments()
+        self.assertEqual(len(self.app.load_data()), 60)
+
+    def test_resident_table_avoids_reloads(self):
+        reads = []
+        original = self.app._read_store
+
+        def counting_read():
+            reads.append(1)
+            return original()
+
+        self.app._read_store = counting_read
+        for name in ('A', 'B', 'C'):
+            self.app.create_entry({'chemical_name': name, 'concentration': '1%',
+                                   'location': 'Lab A', 'date': '2025-10-15'})
+        self.app.update_entry(2, {'location': 'Lab B'})
+        self.app.delete_entry(3)
+        self.assertEqual(len(reads), 1)
+        self.assertIn(1, self.app.TABLE)
+        self.assertNotIn(3, self.app.TABLE)
+        self.assertEqual(self.app.get_entry(2)['location'], 'Lab B')
+        # ids are not reused after deleting the highest one
+        self.assertEqual(self.app.TABLE.allocate_id(), 4)
+
+        # a rewrite by another process is picked up via the file stamp
+        import pandas as pd
+        external = pd.DataFrame([{'id': 10, 'chemical_name': 'X', 'concentration': '2%',
+                                  'location': 'Lab C', 'date': '2025-10-16'}])
+        external.to_parquet('paraquat_data.parquet', index=False)
+        self.assertIsNone(self.app.get_entry(1))
+        self.assertEqual(self.app.get_entry(10)['chemical_name'], 'X')
+        self.assertEqual(len(reads), 2)
+
+    def test_inserts_are_concatenated_lazily(self):
+        self.app.STORAGE_MODE = 'segmented'
+        concats = []
+        original = self.app._concat_frames
+
+        def counting_concat(frames):
+            # single-frame calls only build a delta segment from the new row
+            if len(frames) > 1:
+                concats.append(len(frames))
+            return original(frames)
+
+        self.app._concat_frames = counting_concat
+        self.app.load_data()
+        for i in range(20):
+            self.app.create_entry({'chemical_name': f'C{i % 3}', 'concentration': '1%',
+                                   'location': 'Lab A', 'date': '2025-10-15'})
+        # inserts only buffer rows; existence checks do not need the frame
+        self.assertEqual(concats, [])
+        self.assertIn(20, self.app.TABLE)
+        self.assertEqual(len(self.app.TABLE), 20)
+        self.assertEqual(self.app.get_entry(20)['chemical_name'], 'C1')
+        # the first read concatenates everything buffered at once
+        self.assertEqual(concats, [21])
+        df = self.app.load_data()
+        self.assertEqual(df['id'].tolist(), list(range(1, 21)))
+        self.assertEqual(str(df['chemical_name'].dtype), 'category')
+        self.assertEqual(len(concats), 1)
+
+    def test_batched_creation_log_flushes_by_count_and_on_close(self):
+        log_path = os.path.join('hdfs_fallback', 'batched.log')
+        writer = self.app.CreationLogWriter('/logs/batched.log', log_path, durability='batched',
+                                            flush_count=3, flush_interval=0,
+                                            client_factory=lambda: None)
+        writer.write({'id': 1})
+        writer.write({'id': 2})
+        self.assertFalse(os.path.exists(log_path))
+        writer.write({'id': 3})
+        writer.write({'id': 4})
+        with open(log_path, encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 3)
+        writer.close()
+        with open(log_path, encoding='utf-8') as f:
+            self.assertEqual([json.loads(line)['id'] for line in f], [1, 2, 3, 4])
+
+    def test_creation_log_uses_native_append_then_rolls(self):
+        from hdfs import HdfsError
+
+        class FakeClient:
+            def __init__(self):
+                self.files = {}
+                self.append_error = None
+
+            def status(self, path, strict=True):
+                return {} if path in self.files else None
+
+            def write(self, path, data, encoding=None, append=False, overwrite=False):
+                if append:
+                    if self.append_error:
+                        raise self.append_error
+                    self.files[path] += data
+                else:
+                    self.files[path] = data
+
+        client = FakeClient()
+        writer = self.app.CreationLogWriter('/logs/creations.log', 'unused.log',
+                                            client_factory=lambda: client)
+        writer.write({'id': 1})
+        writer.write_many([{'id': 2}, {'id': 3}])
+        self.assertEqual(client.files['/logs/creations.log'].count('\n'), 3)
+
+        # an ordinary failure does not switch modes; the batch goes to the fallback
+        client.append_error = HdfsError('Append is not supported right now', exception='IOException')
+        writer.write({'id': 4})
+        self.assertTrue(writer.append_supported)
+        with open('unused.log', encoding='utf-8') as f:
+            self.assertEqual([json.loads(line)['id'] for line in f], [4])
+
+        client.append_error = HdfsError('Append failed', exception='UnsupportedOperationException')
+        writer.write({'id': 5})
+        writer.write_many([{'id': 6}, {'id': 7}])
+        self.assertFalse(writer.append_supported)
+        rolled = sorted((p for p in client.files if p != '/logs/creations.log'),
+                        key=lambda p: int(p.rsplit('-', 1)[1]))
+        self.assertEqual(len(rolled), 2)
+        for n, path in enumerate(rolled, 1):
+            self.assertRegex(path, rf'^/logs/creations\.log\.\d{{13}}-{n}$')
+        self.assertEqual([[json.loads(line)['id'] for line in client.files[p].splitlines()] for p in rolled],
+                         [[5], [6, 7]])
+        self.assertEqual(client.files['/logs/creations.log'].count('\n'), 3)
+
+    def test_hdfs_client_is_shared_and_circuit_breaks(self):
+        probes = []
+        built = []
+
+        class FakeClient:
+            down = False
+
+            def status(self, path, strict=True):
+                probes.append(path)
+                if FakeClient.down:
+                    raise ConnectionError('namenode unreachable')
+                return {}
+
+        def factory():
+            built.append(1)
+            return FakeClient()
+
+        manager = self.app.HdfsClientManager('http://fake:9870', 'hdfs', health_ttl=60,
+                                             backoff_base=60, client_factory=factory)
+        first = manager.get()
+        self.assertIsNotNone(first)
+        self.assertIs(manager.get(), first)
+        self.assertEqual((len(built), len(probes)), (1, 1))
+
+        # an operation failure opens the circuit: no further network calls
+        manager.report_failure(ConnectionError('upload failed'))
+        FakeClient.down = True
+        for _ in range(5):
+            self.assertIsNone(manager.get())
+        self.assertEqual(len(probes), 1)
+        self.assertEqual(manager.state()['failures'], 1)
+
+        # once the backoff elapses a single probe decides
+        manager._open_until = 0
+        self.assertIsNone(manager.get())
+        self.assertEqual(len(probes), 2)
+        self.assertEqual(manager.state()['failures'], 2)
+
+    def test_sync_worker_coalesces_bursts_and_retries(self):
+        uploads = []
+        release = __import__('threading').Event()
+
+        class FakeClient:
+            failures = 1
+
+            def upload(self, hdfs_path, local_path, overwrite=False):
+                release.wait(5)
+                if FakeClient.failures:
+                    FakeClient.failures -= 1
+                    raise IOError('datanode went away')
+                with open(local_path, encoding='utf-8') as f:
+                    uploads.append((hdfs_path, f.read()))
+
+        client = FakeClient()
+        worker = self.app.HdfsSyncWorker(client_factory=lambda: client, backoff_base=0.01)
+        with open('data.txt', 'w', encoding='utf-8') as f:
+            f.write('v0')
+        worker.submit('data.txt', '/remote/data.txt')
+        # the first upload is now blocked; the next ten saves coalesce
+        for version in range(1, 11):
+            with open('data.txt', 'w', encoding='utf-8') as f:
+                f.write(f'v{version}')
+            worker.submit('data.txt', '/remote/data.txt')
+        self.assertEqual(worker.queue_depth(), 2)
+        self.assertGreater(worker.lag(), 0)
+        release.set()
+        self.assertTrue(worker.wait_synced('/remote/data.txt', timeout=5))
+        self.assertEqual(uploads, [('/remote/data.txt', 'v10'), ('/remote/data.txt', 'v10')])
+        stats = worker.stats()
+        self.assertEqual((stats['coalesced'], stats['retries'], stats['queue_depth']), (9, 1, 0))
+        worker.close()
+
+    def test_bulk_ingest_from_csv_batches_writes(self):
+        self.app.STORAGE_MODE = 'segmented'
+        with open('samples.csv', 'w', encoding='utf-8') as f:
+            f.write('chemical_name,concentration,location,date\n')
+            for i in range(5):
+                f.write(f'Paraquat{i},{i}%,Field {i % 2},2025-10-1{i}\n')
+        self.app.main(['ingest', 'samples.csv', '--batch-size', '2'])
+        # one segment per batch, ids assigned contiguously
+        self.assertEqual(len(self.app.segment_paths()), 3)
+        df = self.app.load_data()
+        self.assertEqual(df['id'].tolist(), [1, 2, 3, 4, 5])
+        self.assertEqual(df.loc[df['id'] == 5, 'chemical_name'].iloc[0], 'Paraquat4')
+        with open(os.path.join('hdfs_fallback', 'creations.log'), encoding='utf-8') as f:
+            self.assertEqual([json.loads(line)['id'] for line in f], [1, 2, 3, 4, 5])
+
+    def test_single_and_bulk_creates_log_the_same_format(self):
+        self.app.create_entry({'chemical_name': 'One', 'concentration': '5',
+                               'location': 'Lab A', 'date': '2025-10-15'})
+        self.app.create_entries([{'chemical_name': 'Two', 'concentration': '7',
+                                  'location': 'Lab B', 'date': '2025-10-16'}])
+
+        def reject(constant):
+            raise ValueError(f'not valid JSON: {constant}')
+
+        with open(os.path.join('hdfs_fallback', 'creations.log'), encoding='utf-8') as f:
+            single, bulk = [json.loads(line, parse_constant=reject) for line in f]
+        self.assertEqual(single, {'id': 1, 'chemical_name': 'One', 'concentration': 5.0,
+                                  'concentration_unit': None, 'location': 'Lab A', 'date': '2025-10-15'})
+        self.assertEqual(bulk, {'id': 2, 'chemical_name': 'Two', 'concentration': 7.0,
+                                'concentration_unit': None, 'location': 'Lab B', 'date': '2025-10-16'})
+
+    def test_bulk_ingest_rejects_bad_batches(self):
+        rows = [{'chemical_name': 'A', 'concentration': '1%', 'location': 'L', 'date': '2025-01-01'},
+                {'chemical_name': 'B', 'location': 'L', 'date': '2025-01-02'}]
+        with self.assertRaisesRegex(ValueError, 'Batch 1: Empty values in columns: concentration'):
+            self.app.create_entries(rows)
+        with self.assertRaisesRegex(ValueError, 'Unknown columns: colour'):
+            self.app.create_entries([dict(rows[0], colour='red')])
+        self.assertEqual(len(self.app.load_data()), 0)
+
+    def _ingest_fields(self, count):
+        rows = [{'chemical_name': f'P{i}', 'concentration': f'{i}%', 'location': f'Field {i % 3}',
+                 'date': f'2025-01-{i + 1:02d}'} for i in range(count)]
+        self.app.create_entries(rows)
+
+    def test_query_pushes_filters_and_projection(self):
+        self.app.ROW_GROUP_SIZE = 2
+        self._ingest_fields(9)
+        # the data file is clustered by location, so row group stats are selective
+        import pyarrow.parquet as pq
+        meta = pq.ParquetFile('paraquat_data.parquet').metadata
+        self.assertEqual(meta.num_row_groups, 5)
+        location_idx = meta.schema.to_arrow_schema().get_field_index('location')
+        stats = meta.row_group(0).column(location_idx).statistics
+        self.assertEqual((stats.min, stats.max), ('Field 0', 'Field 0'))
+        # and the scan actually skips the row groups they rule out
+        import pyarrow.dataset as ds
+        dataset = ds.dataset('paraquat_data.parquet', format='parquet')
+        expr = self.app.filter_expression([('location', '==', 'Field 1')])
+        scanned = sum(len(f.split_by_row_group(expr)) for f in dataset.get_fragments(filter=expr))
+        self.assertEqual(scanned, 2)
+
+        result = self.app.query_entries(
+            columns=['id', 'date'],
+            filters=[('location', '==', 'Field 1'), ('date', 'between', ('2025-01-02', '2025-01-05'))])
+        self.assertEqual(list(result.columns), ['id', 'date'])
+        self.assertEqual(result['id'].tolist(), [2, 5])
+        batches = list(self.app.iter_query(filters=[('location', 'in', ['Field 0', 'Field 2'])], batch_size=2))
+        self.assertTrue(all(len(b) <= 2 for b in batches))
+        self.assertEqual(sum(len(b) for b in batches), 6)
+
+    def test_query_sees_uncompacted_segments(self):
+        self._ingest_fields(6)
+        self.app.STORAGE_MODE = 'segmented'
+        self.app.update_entry(1, {'location': 'Field 0'})
+        self.app.delete_entry(4)
+        self.app.create_entry({'chemical_name': 'New', 'concentration': '1%',
+                               'location': 'Field 0', 'date': '2025-02-01'})
+        result = self.app.query_entries(filters=[('location', '==', 'Field 0')])
+        self.assertEqual(sorted(result['id'].tolist()), [1, 7])
+
+    def test_empty_query_keeps_schema_dtypes(self):
+        self._ingest_fields(3)
+        nothing = [('location', '==', 'Nowhere')]
+        full = self.app.query_entries(filters=[('location', '==', 'Field 0')])
+        empty = self.app.query_entries(filters=nothing)
+        self.assertEqual(len(empty), 0)
+        self.assertEqual(empty.dtypes.astype(str).to_dict(), full.dtypes.astype(str).to_dict())
+        projected = self.app.query_entries(columns=['id', 'date'], filters=nothing)
+        self.assertEqual(list(projected.columns), ['id', 'date'])
+        self.assertEqual(projected.dtypes.astype(str).to_dict(), full[['id', 'date']].dtypes.astype(str).to_dict())
+
+    def test_bulk_update_and_delete_by_predicate(self):
+        self._ingest_fields(9)
+        writes = []
+        original = self.app._write_base
+
+        def counting_write(df, sync_hdfs=True):
+            writes.append(len(df))
+            return original(df, sync_hdfs)
+
+        self.app._write_base = counting_write
+        changed = self.app.update_where([('location', '==', 'Field 1')],
+                                        {'location': 'Field 9', 'chemical_name': 'Cleaned'})
+        self.assertEqual(changed, 3)
+        self.assertEqual(self.app.update_ids([1, 2, 99], {'concentration': '0%'}), 2)
+        self.assertEqual(self.app.delete_where(lambda df: df['date'] > '2025-01-07'), 2)
+        self.assertEqual(self.app.delete_ids([1, 8]), 1)
+        self.assertEqual(self.app.delete_where([('location', '==', 'nowhere')]), 0)
+        self.assertEqual(writes, [9, 9, 7, 6])
+
+        import pandas as pd
+        df = pd.read_parquet('paraquat_data.parquet').sort_values('id')
+        self.assertEqual(df['id'].tolist(), [2, 3, 4, 5, 6, 7])
+        cleaned = df[df['location'] == 'Field 9']
+        self.assertEqual(cleaned['id'].tolist(), [2, 5])
+        self.assertTrue((cleaned['chemical_name'] == 'Cleaned').all())
+        self.assertEqual(df.loc[df['id'] == 2, 'concentration'].iloc[0], 0.0)
+        self.assertEqual(df.loc[df['id'] == 2, 'concentration_unit'].iloc[0], '%')
+
+    def test_data_file_uses_typed_dictionary_schema(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._ingest_fields(4)
+        self.app.update_entry(1, {'concentration': '2.5 mg/L', 'location': 'Greenhouse'})
+        schema = pq.read_schema('paraquat_data.parquet')
+        self.assertEqual(schema.field('id').type, pa.int64())
+        self.assertEqual(schema.field('concentration').type, pa.float64())
+        self.assertEqual(schema.field('date').type, pa.date32())
+        self.assertTrue(pa.types.is_dictionary(schema.field('chemical_name').type))
+        # the sort key stays a plain string so row-group statistics can prune it
+        self.assertEqual(schema.field('location').type, pa.string())
+        self.assertEqual(self.app.load_data()['location'].dtype, 'category')
+        self.assertEqual(pq.ParquetFile('paraquat_data.parquet').metadata.row_group(0).column(0).compression, 'ZSTD')
+        entry = self.app.get_entry(1)
+        self.assertEqual((entry['concentration'], entry['concentration_unit']), (2.5, 'mg/L'))
+        self.assertEqual(entry['location'], 'Greenhouse')
+
+        result = self.app.query_entries(columns=['id'], filters=[('concentration', '>', 1.5)])
+        self.assertEqual(sorted(result['id'].tolist()), [1, 3, 4])
+        with self.assertRaisesRegex(ValueError, 'Invalid date'):
+            self.app.create_entries([{'chemical_name': 'A', 'concentration': '1%',
+                                      'location': 'L', 'date': 'yesterday'}])
+
+    def test_migrate_legacy_file_reports_savings(self):
+        import pandas as pd
+        legacy = pd.DataFrame({
+            'id': range(1, 2001),
+            'chemical_name': ['Paraquat dichloride'] * 2000,
+            'concentration': [f'{i % 50}.5%' for i in range(2000)],
+            'location': [f'Field {i % 4}' for i in range(2000)],
+            'date': [f'2025-03-{i % 28 + 1:02d}' for i in range(2000)],
+        }).astype({'chemical_name': object, 'concentration': object, 'location': object, 'date': object})
+        legacy.to_parquet('paraquat_data.parquet', index=False)
+        report = self.app.migrate_data_file()
+        self.assertEqual(report['rows'], 2000)
+        self.assertLess(report['memory_bytes_after'], report['memory_bytes_before'])
+        self.assertLess(report['file_bytes_after'], report['file_bytes_before'])
+        migrated = self.app.get_entry(3)
+        self.assertEqual((migrated['concentration'], migrated['concentration_unit']), (2.5, '%'))
+        self.assertEqual(str(migrated['date'].date()), '2025-03-03')
+
+    def test_legacy_free_form_values_load_and_migrate(self):
+        import pandas as pd
+        # the original app accepted any text for concentration and date
+        legacy = pd.DataFrame({
+            'id': [1, 2, 3, 4],
+            'chemical_name': ['Paraquat'] * 4,
+            'concentration': ['5%', 'high', '', '2 mg/L'],
+            'location': ['Lab A'] * 4,
+            'date': ['2025-03-01', '2025-03-02', '', 'last week'],
+        })
+        legacy.to_parquet('paraquat_data.parquet', index=False)
+        df = self.app.load_data()
+        self.assertEqual(len(df), 4)
+        self.assertEqual(self.app.get_entry(1)['concentration'], 5.0)
+
+        report = self.app.migrate_data_file()
+        self.assertEqual((report['rows'], report['unparsed_rows']), (4, 2))
+        df = self.app.load_data().set_index('id')
+        self.assertTrue(pd.isna(df.loc[2, 'concentration']))
+        self.assertEqual(json.loads(df.loc[2, 'unparsed']), {'concentration': 'high'})
+        # blank values are simply missing
+        self.assertTrue(pd.isna(df.loc[3, 'concentration']) and pd.isna(df.loc[3, 'date']))
+        self.assertTrue(pd.isna(df.loc[3, 'unparsed']))
+        self.assertEqual(json.loads(df.loc[4, 'unparsed']), {'date': 'last week'})
+        self.assertEqual(df.loc[4, 'concentration_unit'], 'mg/L')
+        # new entries are still validated strictly
+        with self.assertRaisesRegex(ValueError, 'Invalid concentration'):
+            self.app.create_entries([{'chemical_name': 'A', 'concentration': 'high',
+                                      'location': 'L', 'date': '2025-01-01'}])
+
+    def test_timing_hooks_report_each_operation(self):
+        calls = []
+        hook = self.app.add_timing_hook(lambda op, seconds, ok: calls.append((op, seconds, ok)))
+        try:
+            self.app.create_entry({'chemical_name': 'Paraquat', 'concentration': '5%',
+                                   'location': 'Lab A', 'date': '2025-10-15'})
+            self.app.update_entry(1, {'location': 'Lab B'})
+            self.app.delete_entry(1)
+            with self.assertRaises(ValueError):
+                self.app.query_entries(filters=[('location', '~', 'x')])
+        finally:
+            self.app.remove_timing_hook(hook)
+        self.app.create_entry({'chemical_name': 'Paraquat', 'concentration': '1%',
+                               'location': 'Lab C', 'date': '2025-10-16'})
+        self.assertEqual([op for op, _, _ in calls],
+                         ['create_entry', 'update_entry', 'delete_entry', 'query_entries'])
+        self.assertTrue(all(seconds >= 0 for _, seconds, _ in calls))
+        self.assertEqual([ok for _, _, ok in calls], [True, True, True, False])
+
 if __name__ == '__main__':
     unittest.main()
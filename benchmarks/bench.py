@@ -0,0 +1,334 @@
+"""Benchmark the assignment modules on synthetic data and write a JSON report.
+
+Suites:
+  paraquat  Assignment 5: create_entries bulk load, then create/update/read/query/delete entries
+  heart     Assignment 1: chunked parallel analysis and cold vs warm columnar cache loads
+  hdfs      Assignment 4: HadoopCRUD against an in-process fake WebHDFS server
+  mongo     Assignment 3: CRUD, paging and search against mongomock (or --mongo-uri)
+
+Every suite runs in its own Python process, so peak RSS is per suite. The
+per-operation latencies come from the modules' own timing hooks (the same
+add_timing_hook() a production deployment would use to export metrics).
+
+    python benchmarks/bench.py --rows 1000000 --ops 500 --output report.json
+"""
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import generators  # noqa: E402
+
+SUITES = ("paraquat", "heart", "hdfs", "mongo")
+# read_entries and list/search calls scan everything; run fewer of them.
+SCAN_OPS = 20
+
+
+class Recorder:
+    """Timing hook that keeps every sample, grouped by operation name."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.failures = Counter()
+
+    def __call__(self, operation, seconds, ok):
+        self.samples[operation].append(seconds)
+        if not ok:
+            self.failures[operation] += 1
+
+    def report(self):
+        return {operation: summarize(samples, self.failures[operation])
+                for operation, samples in sorted(self.samples.items())}
+
+
+def summarize(samples, errors=0):
+    """count, errors, mean/p50/p95/p99 latency (ms) and sequential ops/sec of samples (seconds)."""
+    values = np.asarray(samples, dtype=np.float64) * 1000
+    total = values.sum() / 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]) if len(values) else (0.0, 0.0, 0.0)
+    return {"count": len(values), "errors": errors, "mean_ms": float(values.mean()) if len(values) else 0.0,
+            "p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99),
+            "ops_per_sec": len(values) / total if total else 0.0}
+
+
+def throughput(rows, seconds, **extra):
+    return {"rows": rows, "seconds": seconds, "rows_per_sec": rows / seconds if seconds else 0.0, **extra}
+
+
+def peak_rss_mb(who=None):
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF if who is None else who).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
+
+
+def load_module(name, path):
+    """Import path as name; its directory goes on sys.path for sibling imports."""
+    sys.path.insert(0, os.path.dirname(path))
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@contextlib.contextmanager
+def quiet():
+    """Discard what the modules print while they are being timed."""
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def timed_call(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def bench_paraquat(args, workdir):
+    os.chdir(workdir)
+    app = load_module("paraquat_app", os.path.join(ROOT, "Assignment 5", "app.py"))
+    recorder = app.add_timing_hook(Recorder())
+    bulk = {}
+    with quiet():
+        start = time.perf_counter()
+        loaded = 0
+        for frame in generators.paraquat_frames(args.rows, args.seed, app.BATCH_SIZE):
+            loaded += app.create_entries(frame)
+        bulk["create_entries"] = throughput(loaded, time.perf_counter() - start)
+
+        ids = []
+        for entry in generators.paraquat_entries(args.ops, args.seed + 1):
+            app.create_entry(entry)
+            ids.append(entry["id"])
+        for entry_id in ids:
+            app.update_entry(entry_id, {"concentration": "1.5 mg/L", "location": "Lab B"})
+        for _ in range(min(args.ops, SCAN_OPS)):
+            app.read_entries()
+            app.query_entries(filters=[("location", "==", "Lab B")])
+        for entry_id in ids:
+            app.delete_entry(entry_id)
+        app.SYNC_WORKER.close(timeout=60)
+    bulk["data_file_bytes"] = os.path.getsize(app.DATA_FILE)
+    return {"operations": recorder.report(), "bulk": bulk}
+
+
+def bench_heart(args, workdir):
+    analytics = load_module("analytics", os.path.join(ROOT, "Assignment 1", "analytics.py"))
+    csv_cache = load_module("csv_cache", os.path.join(ROOT, "Assignment 1", "csv_cache.py"))
+    path = os.path.join(workdir, "heart.csv")
+    bulk = {}
+    _, seconds = timed_call(generators.write_heart_csv, path, args.rows, args.seed)
+    bulk["generate_csv"] = throughput(args.rows, seconds, bytes=os.path.getsize(path))
+    stats, seconds = timed_call(analytics.analyze, path)
+    bulk["analyze_parallel"] = throughput(stats.rows, seconds, workers=analytics.WORKERS)
+    stats, seconds = timed_call(analytics.analyze, path, workers=1)
+    bulk["analyze_serial"] = throughput(stats.rows, seconds)
+    cache = csv_cache.CsvCache(directory=os.path.join(workdir, "csv_cache"))
+    with quiet():
+        loads = cache.compare(path, analytics.SCHEMA)
+    bulk["cache_cold_load"] = throughput(loads["rows"], loads["cold_seconds"], format=cache.format)
+    bulk["cache_warm_load"] = throughput(loads["rows"], loads["warm_seconds"], format=cache.format)
+    stats, seconds = timed_call(analytics.analyze_batches, cache.iter_batches(path, analytics.SCHEMA))
+    bulk["analyze_cached"] = throughput(stats.rows, seconds)
+    return {"operations": {}, "bulk": bulk}
+
+
+def bench_hdfs(args, workdir):
+    from fake_webhdfs import serve
+
+    server, fs, port = serve()
+    os.environ.update({"HDFS_HOST": "127.0.0.1", "HDFS_PORT": str(port), "HDFS_USER": "bench"})
+    os.environ.pop("HDFS_DATANODE_HOST", None)
+    hadoop = load_module("hadoop_crud", os.path.join(ROOT, "Assignment 4", "main.py"))
+    recorder = hadoop.add_timing_hook(Recorder())
+    payload = "x" * args.payload_bytes
+    bulk = {}
+    try:
+        with quiet():
+            crud = hadoop.HadoopCRUD()
+            paths = [f"/bench/ops/file-{i}.txt" for i in range(args.ops)]
+            for path in paths:
+                crud.create_file(path, data=payload)
+            for path in paths:
+                crud.get_file_info(path)
+                crud.read_file(path)
+                crud.update_file(path, data=payload)
+            for _ in range(min(args.ops, SCAN_OPS)):
+                crud.list_files("/bench/ops")
+            for path in paths:
+                crud.delete_file(path)
+
+            local = os.path.join(workdir, "transfer.bin")
+            size = int(args.transfer_mb * 2 ** 20)
+            with open(local, "wb") as handle:
+                handle.write(os.urandom(size))
+            _, seconds = timed_call(crud.upload, local, "/bench/transfer.bin")
+            bulk["upload"] = {"bytes": size, "seconds": seconds, "mb_per_sec": size / 2 ** 20 / seconds}
+            _, seconds = timed_call(crud.download, "/bench/transfer.bin", local + ".out")
+            bulk["download"] = {"bytes": size, "seconds": seconds, "mb_per_sec": size / 2 ** 20 / seconds}
+        bulk["connections"] = crud.connection_stats()
+        bulk["server_requests"] = dict(fs.calls)
+    finally:
+        server.shutdown()
+    return {"operations": recorder.report(), "bulk": bulk}
+
+
+def bench_mongo(args, workdir):
+    for name, value in (("MONGO_USER", "bench"), ("MONGO_PASS", "bench"),
+                        ("MONGO_HOST", "127.0.0.1"), ("MONGO_PORT", "27017")):
+        os.environ.setdefault(name, value)
+    mongo = load_module("mongo_crud", os.path.join(ROOT, "Assignment 3", "main.py"))
+    if args.mongo_uri:
+        from pymongo import MongoClient
+        mongo.db = MongoClient(args.mongo_uri)["bench"]
+        mongo.db.drop_collection("items")
+    else:
+        import mongomock
+        mongo.db = mongomock.MongoClient()["bench"]
+    mongo.collection = mongo.db["items"]
+    recorder = mongo.add_timing_hook(Recorder())
+    bulk = {}
+    with quiet():
+        try:
+            mongo.ensure_indexes()
+        except Exception as exc:  # mongomock has no text indexes
+            bulk["index_error"] = str(exc)
+        summary, seconds = timed_call(mongo.create_items, generators.mongo_items(args.rows, args.seed),
+                                      ordered=False)
+        bulk["create_items"] = throughput(summary["inserted"], seconds, errors=len(summary["errors"]))
+
+        for item in generators.mongo_items(args.ops, args.seed + 1):
+            mongo.create_item("new-" + item["name"], item["description"])
+        ids = [doc["_id"] for doc in mongo.collection.find({}, {"_id": 1}).limit(args.ops)]
+        for _ in range(2):  # second pass is served by ITEM_CACHE
+            for item_id in ids:
+                mongo.get_item(item_id)
+        for item_id in ids:
+            mongo.update_item(str(item_id), "updated", "updated by bench")
+        after = None
+        for _ in range(args.ops):
+            _, after = mongo.read_page(after=after)
+            if after is None:
+                break
+        for _ in range(min(args.ops, SCAN_OPS)):
+            mongo.find_by_name("updated", limit=10)
+            mongo.search_name_prefix("alpha", limit=10)
+        for item_id in ids:
+            mongo.delete_item(str(item_id))
+    bulk["cache"] = mongo.ITEM_CACHE.stats()
+    return {"operations": recorder.report(), "bulk": bulk}
+
+
+RUNNERS = {"paraquat": bench_paraquat, "heart": bench_heart, "hdfs": bench_hdfs, "mongo": bench_mongo}
+
+
+def run_suite(args):
+    """Child process: run one suite and write its result as JSON to args.result."""
+    with tempfile.TemporaryDirectory(prefix=f"bench-{args.run_suite}-") as workdir:
+        start = time.perf_counter()
+        try:
+            result = RUNNERS[args.run_suite](args, workdir)
+        except Exception as exc:
+            result = {"error": f"{type(exc).__name__}: {exc}"}
+        finally:
+            os.chdir(BENCH_DIR)
+    result["seconds"] = time.perf_counter() - start
+    result["peak_rss_mb"] = peak_rss_mb()
+    if resource is not None:
+        result["children_peak_rss_mb"] = peak_rss_mb(resource.RUSAGE_CHILDREN)
+    with open(args.result, "w", encoding="utf-8") as handle:
+        json.dump(result, handle, default=str)
+
+
+def _suite_command(args, suite, result_path):
+    return [sys.executable, os.path.abspath(__file__), "--run-suite", suite, "--result", result_path,
+            "--rows", str(args.rows), "--ops", str(args.ops), "--seed", str(args.seed),
+            "--payload-bytes", str(args.payload_bytes), "--transfer-mb", str(args.transfer_mb),
+            *(["--mongo-uri", args.mongo_uri] if args.mongo_uri else [])]
+
+
+def print_summary(report):
+    for suite, result in report["suites"].items():
+        if "error" in result:
+            print(f"❌ {suite}: {result['error']}")
+            continue
+        print(f"\n== {suite} ({result['seconds']:.1f}s, peak RSS {result['peak_rss_mb'] or 0:.0f} MB)")
+        for operation, stats in result["operations"].items():
+            print(f"  {operation:>20}: n={stats['count']:<7} p50 {stats['p50_ms']:8.2f} ms  "
+                  f"p95 {stats['p95_ms']:8.2f} ms  p99 {stats['p99_ms']:8.2f} ms  "
+                  f"{stats['ops_per_sec']:9.0f} ops/s  errors {stats['errors']}")
+        for name, stats in result["bulk"].items():
+            if isinstance(stats, dict) and "rows_per_sec" in stats:
+                print(f"  {name:>20}: {stats['rows']} rows in {stats['seconds']:.2f}s "
+                      f"({stats['rows_per_sec']:.0f} rows/s)")
+            elif isinstance(stats, dict) and "mb_per_sec" in stats:
+                print(f"  {name:>20}: {stats['bytes'] / 2 ** 20:.0f} MB in {stats['seconds']:.2f}s "
+                      f"({stats['mb_per_sec']:.1f} MB/s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the assignment modules on synthetic data")
+    parser.add_argument("--rows", type=int, default=10_000, help="rows for bulk loads and analysis (10k-100M)")
+    parser.add_argument("--ops", type=int, default=200, help="timed single-item operations per kind")
+    parser.add_argument("--suites", default=",".join(SUITES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--payload-bytes", type=int, default=4096, help="file size for HDFS single-file ops")
+    parser.add_argument("--transfer-mb", type=float, default=32, help="file size for HDFS upload/download")
+    parser.add_argument("--mongo-uri", default=None, help="benchmark a real MongoDB instead of mongomock")
+    parser.add_argument("--output", default="bench_report.json")
+    parser.add_argument("--run-suite", choices=SUITES, help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_suite:
+        run_suite(args)
+        return 0
+
+    suites = [name.strip() for name in args.suites.split(",") if name.strip()]
+    unknown = sorted(set(suites) - set(SUITES))
+    if unknown:
+        print(f"❌ Unknown suite(s) {', '.join(unknown)}; choose from {', '.join(SUITES)}")
+        return 1
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "rows": args.rows, "ops": args.ops,
+              "seed": args.seed, "python": platform.python_version(), "platform": platform.platform(),
+              "cpus": os.cpu_count(), "suites": {}}
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        for suite in suites:
+            print(f"⏱️ Running {suite}...")
+            result_path = os.path.join(tmp, f"{suite}.json")
+            process = subprocess.run(_suite_command(args, suite, result_path), capture_output=True, text=True)
+            if os.path.exists(result_path):
+                with open(result_path, encoding="utf-8") as handle:
+                    report["suites"][suite] = json.load(handle)
+            else:
+                lines = process.stderr.strip().splitlines()
+                report["suites"][suite] = {"error": lines[-1] if lines else f"exit status {process.returncode}"}
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2, default=str)
+    print_summary(report)
+    print(f"\n📄 Report written to {args.output}")
+    return 1 if any("error" in result for result in report["suites"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""In-memory WebHDFS server for benchmarking HadoopCRUD without a cluster.
+
+Implements the operations HadoopCRUD uses, including the NameNode ->
+DataNode 307 redirects of CREATE/APPEND/OPEN (the "DataNode" is the same
+server), so connection pooling and redirect caching behave as they would
+against a real NameNode. Files are kept in memory.
+"""
+import json
+import posixpath
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class FakeFS:
+    def __init__(self):
+        self.files = {}
+        self.dirs = {"/"}
+        self.lock = threading.Lock()
+        self.calls = Counter()
+        # paths whose status requests are refused with AccessControlException
+        self.denied = set()
+        # False answers LISTSTATUS_BATCH like a cluster older than Hadoop 2.8
+        self.batch_listing = True
+
+    def count(self, op):
+        with self.lock:
+            self.calls[op] += 1
+
+    def status(self, path):
+        if path in self.files:
+            return {"type": "FILE", "length": len(self.files[path]), "pathSuffix": "",
+                    "modificationTime": 0, "replication": 1, "blockSize": 134217728,
+                    "owner": "hdfs", "group": "hdfs", "permission": "644", "accessTime": 0,
+                    "fileId": 1, "childrenNum": 0}
+        if path in self.dirs:
+            return {"type": "DIRECTORY", "length": 0, "pathSuffix": "", "modificationTime": 0,
+                    "replication": 0, "blockSize": 0, "owner": "hdfs", "group": "hdfs",
+                    "permission": "755", "accessTime": 0, "fileId": 2, "childrenNum": 0}
+        return None
+
+    def mkdirs(self, path):
+        while path not in self.dirs:
+            self.dirs.add(path)
+            path = posixpath.dirname(path)
+
+    def children(self, path):
+        out = []
+        for p in sorted(self.dirs | set(self.files)):
+            if p != "/" and posixpath.dirname(p) == path:
+                st = dict(self.status(p))
+                st["pathSuffix"] = posixpath.basename(p)
+                out.append(st)
+        return out
+
+
+def make_handler(fs, datanode_url):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out as separate writes; without TCP_NODELAY every
+        # keep-alive response would wait ~40ms for the client's delayed ACK.
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, code, body=b"", headers=None, ctype="application/json"):
+            if isinstance(body, (dict, list)):
+                body = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Content-Type", ctype)
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _parse(self):
+            url = urlparse(self.path)
+            path = url.path[len("/webhdfs/v1"):] or "/"
+            if len(path) > 1:
+                path = path.rstrip("/")
+            q = {k: v[0] for k, v in parse_qs(url.query).items()}
+            return path, q
+
+        def _body(self):
+            if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                data = b""
+                while True:
+                    line = self.rfile.readline().strip()
+                    size = int(line, 16)
+                    if size == 0:
+                        self.rfile.readline()
+                        return data
+                    data += self.rfile.read(size)
+                    self.rfile.readline()
+            n = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(n) if n else b""
+
+        def _notfound(self, path):
+            self._send(404, {"RemoteException": {"exception": "FileNotFoundException",
+                                                 "javaClassName": "java.io.FileNotFoundException",
+                                                 "message": f"File does not exist: {path}"}})
+
+        def do_GET(self):
+            path, q = self._parse()
+            op = q.get("op", "").upper()
+            fs.count(op)
+            if op == "GETHOMEDIRECTORY":
+                return self._send(200, {"Path": "/user/hdfs"})
+            if op == "GETFILESTATUS":
+                if path in fs.denied:
+                    return self._send(403, {"RemoteException": {
+                        "exception": "AccessControlException",
+                        "javaClassName": "org.apache.hadoop.security.AccessControlException",
+                        "message": f"Permission denied: {path}"}})
+                st = fs.status(path)
+                return self._send(200, {"FileStatus": st}) if st else self._notfound(path)
+            if op == "LISTSTATUS":
+                if path not in fs.dirs:
+                    return self._notfound(path)
+                return self._send(200, {"FileStatuses": {"FileStatus": fs.children(path)}})
+            if op == "LISTSTATUS_BATCH" and fs.batch_listing:
+                if path not in fs.dirs:
+                    return self._notfound(path)
+                kids = fs.children(path)
+                after = q.get("startAfter")
+                if after:
+                    kids = [k for k in kids if k["pathSuffix"] > after]
+                batch, rest = kids[:2], kids[2:]
+                return self._send(200, {"DirectoryListing": {
+                    "partialListing": {"FileStatuses": {"FileStatus": batch}},
+                    "remainingEntries": len(rest)}})
+            if op == "OPEN":
+                if path not in fs.files:
+                    return self._notfound(path)
+                if q.get("datanode") != "1":
+                    return self._send(307, b"", {"Location": f"{datanode_url}{self.path}&datanode=1"})
+                data = fs.files[path]
+                off = int(q.get("offset", 0))
+                length = q.get("length")
+                end = off + int(length) if length is not None else len(data)
+                return self._send(200, data[off:end], ctype="application/octet-stream")
+            self._send(400, {"RemoteException": {"message": f"bad op {op}"}})
+
+        def do_PUT(self):
+            path, q = self._parse()
+            op = q.get("op", "").upper()
+            fs.count(op)
+            if op == "MKDIRS":
+                fs.mkdirs(path)
+                return self._send(200, {"boolean": True})
+            if op == "CREATE":
+                if q.get("datanode") != "1":
+                    self._body()
+                    if path in fs.files and q.get("overwrite", "false").lower() != "true":
+                        return self._send(403, {"RemoteException": {"exception": "FileAlreadyExistsException",
+                                                                    "message": f"{path} exists"}})
+                    return self._send(307, b"", {"Location": f"{datanode_url}{self.path}&datanode=1"})
+                data = self._body()
+                with fs.lock:
+                    fs.mkdirs(posixpath.dirname(path))
+                    fs.files[path] = data
+                return self._send(201, b"")
+            if op == "RENAME":
+                dst = q["destination"]
+                with fs.lock:
+                    if fs.status(path) is None or fs.status(dst) is not None:
+                        return self._send(200, {"boolean": False})
+                    for p in [p for p in fs.files if p == path or p.startswith(path + "/")]:
+                        fs.files[dst + p[len(path):]] = fs.files.pop(p)
+                    for d in [d for d in fs.dirs if d == path or d.startswith(path + "/")]:
+                        fs.dirs.discard(d)
+                        fs.dirs.add(dst + d[len(path):])
+                return self._send(200, {"boolean": True})
+            self._send(400, {"RemoteException": {"message": f"bad op {op}"}})
+
+        def do_POST(self):
+            path, q = self._parse()
+            op = q.get("op", "").upper()
+            fs.count(op)
+            if op == "APPEND":
+                if path not in fs.files:
+                    self._body()
+                    return self._notfound(path)
+                if q.get("datanode") != "1":
+                    self._body()
+                    return self._send(307, b"", {"Location": f"{datanode_url}{self.path}&datanode=1"})
+                data = self._body()
+                with fs.lock:
+                    fs.files[path] += data
+                return self._send(200, b"")
+            self._send(400, {"RemoteException": {"message": f"bad op {op}"}})
+
+        def do_DELETE(self):
+            path, q = self._parse()
+            fs.count("DELETE")
+            with fs.lock:
+                removed = False
+                for p in [p for p in fs.files if p == path or p.startswith(path + "/")]:
+                    del fs.files[p]
+                    removed = True
+                for d in [d for d in fs.dirs if d == path or d.startswith(path + "/")]:
+                    fs.dirs.discard(d)
+                    removed = True
+            self._send(200, {"boolean": removed})
+
+    return Handler
+
+
+def serve(port=0, datanode_host="127.0.0.1"):
+    """Start the server on a background thread; returns (server, fs, port)."""
+    fs = FakeFS()
+    server = ThreadingHTTPServer(("127.0.0.1", port), None)
+    port = server.server_address[1]
+    server.RequestHandlerClass = make_handler(fs, f"http://{datanode_host}:{port}")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, fs, port
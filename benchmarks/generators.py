@@ -0,0 +1,97 @@
+"""Synthetic paraquat records, heart-disease rows and Mongo items at any scale.
+
+Everything is produced in chunks of chunk_rows from a seeded numpy
+generator, so 100M rows cost no more memory than one chunk and the same
+seed always gives the same data.
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 100_000
+
+CHEMICALS = np.array(["Paraquat", "Paraquat dichloride", "Gramoxone", "Diquat", "Glyphosate"])
+LOCATIONS = np.array([f"Field {c}" for c in "ABCDEFGHIJKLMNOP"] + ["Lab A", "Lab B", "Warehouse"])
+UNITS = np.array(["%", "mg/L", "ppm", "g/kg"])
+START_DATE = datetime.date(2015, 1, 1)
+DATE_SPAN_DAYS = 10 * 365
+
+HEART_COLUMNS = ["Age", "Sex", "Chest pain type", "BP", "Cholesterol", "FBS over 120", "EKG results",
+                 "Max HR", "Exercise angina", "ST depression", "Slope of ST", "Number of vessels fluro",
+                 "Thallium", "Heart Disease"]
+
+WORDS = np.array(["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india",
+                  "juliet", "kilo", "lima", "mike", "november", "oscar", "papa", "quebec", "romeo"])
+
+
+def _chunk_sizes(rows, chunk_rows):
+    chunk_rows = chunk_rows or CHUNK_ROWS
+    for start in range(0, rows, chunk_rows):
+        yield min(chunk_rows, rows - start)
+
+
+def paraquat_frames(rows, seed=0, chunk_rows=None):
+    """Yield DataFrames of new paraquat entries (the input columns of create_entries)."""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64(START_DATE)
+    for size in _chunk_sizes(rows, chunk_rows):
+        amounts = np.round(rng.gamma(2.0, 2.5, size), 2)
+        units = UNITS[rng.integers(0, len(UNITS), size)]
+        dates = start + rng.integers(0, DATE_SPAN_DAYS, size).astype("timedelta64[D]")
+        yield pd.DataFrame({
+            "chemical_name": CHEMICALS[rng.integers(0, len(CHEMICALS), size)],
+            "concentration": np.char.add(amounts.astype(str), np.where(units == "%", "", " ")) + units,
+            "location": LOCATIONS[rng.integers(0, len(LOCATIONS), size)],
+            "date": np.datetime_as_string(dates, unit="D"),
+        })
+
+
+def paraquat_entries(rows, seed=0):
+    """One create_entry() dict at a time."""
+    for frame in paraquat_frames(rows, seed, chunk_rows=min(rows, 10_000) or 1):
+        yield from frame.to_dict("records")
+
+
+def heart_frames(rows, seed=0, chunk_rows=None):
+    """Yield DataFrames shaped like Heart_Disease_Prediction.csv with plausible value ranges."""
+    rng = np.random.default_rng(seed)
+    for size in _chunk_sizes(rows, chunk_rows):
+        disease = rng.random(size) < 0.45
+        yield pd.DataFrame({
+            "Age": rng.integers(29, 78, size),
+            "Sex": (rng.random(size) < 0.68).astype(int),
+            "Chest pain type": rng.integers(1, 5, size),
+            "BP": rng.integers(94, 201, size),
+            "Cholesterol": rng.integers(126, 565, size),
+            "FBS over 120": (rng.random(size) < 0.15).astype(int),
+            "EKG results": rng.integers(0, 3, size),
+            "Max HR": rng.integers(71, 203, size) - 15 * disease,
+            "Exercise angina": (rng.random(size) < np.where(disease, 0.55, 0.15)).astype(int),
+            "ST depression": np.round(rng.exponential(1.0, size) + 0.6 * disease, 1),
+            "Slope of ST": rng.integers(1, 4, size),
+            "Number of vessels fluro": rng.integers(0, 4, size),
+            "Thallium": rng.choice([3, 6, 7], size),
+            "Heart Disease": np.where(disease, "Presence", "Absence"),
+        }, columns=HEART_COLUMNS)
+
+
+def write_heart_csv(path, rows, seed=0, chunk_rows=None):
+    """Write rows heart-disease rows to path, one chunk at a time; returns path."""
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        handle.write(",".join(HEART_COLUMNS) + "\n")
+        for frame in heart_frames(rows, seed, chunk_rows):
+            frame.to_csv(handle, header=False, index=False)
+    return path
+
+
+def mongo_items(rows, seed=0, chunk_rows=None):
+    """Yield {"name", "description"} dicts for the Mongo CRUD module."""
+    rng = np.random.default_rng(seed)
+    serial = 0
+    for size in _chunk_sizes(rows, chunk_rows):
+        first = WORDS[rng.integers(0, len(WORDS), size)]
+        second = WORDS[rng.integers(0, len(WORDS), size)]
+        for a, b in zip(first, second):
+            yield {"name": f"{a}-{serial}", "description": f"{a} {b} sample {serial}"}
+            serial += 1